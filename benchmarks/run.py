@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Sequence
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_SIZES = (10_000, 100_000)
+DEFAULT_REPEAT = 3
+DEFAULT_TIME_THRESHOLD = 0.25
+DEFAULT_RSS_THRESHOLD = 0.15
+# Differences below these are noise, whatever their relative size.
+_MIN_SECONDS_DELTA = 0.005
+_MIN_RSS_DELTA_MIB = 2.0
+
+
+def _peak_rss_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(stage_name: str, size: int, repeat: int) -> dict[str, float]:
+    """Time one stage in this process; meant to run in a fresh interpreter.
+
+    ``seconds`` is the fastest of ``repeat`` runs.  ``peak_rss_mib`` is the
+    process high-water mark after running, ``stage_rss_mib`` how far the
+    stage pushed it beyond what its input already needed.  RSS rarely
+    shrinks, so a stage can reuse memory freed by its setup unnoticed;
+    ``alloc_peak_mib`` is the exact peak of memory allocated by one more,
+    traced run.
+    """
+
+    from stages import STAGES
+
+    stage = STAGES[stage_name]
+    state = stage.setup(size)
+    before = _peak_rss_mib()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        stage.run(state)
+        timings.append(time.perf_counter() - started)
+    peak = _peak_rss_mib()
+
+    tracemalloc.start()
+    stage.run(state)
+    alloc_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return {
+        "seconds": min(timings),
+        "peak_rss_mib": peak,
+        "stage_rss_mib": peak - before,
+        "alloc_peak_mib": alloc_peak,
+    }
+
+
+def _measure_in_subprocess(stage_name: str, size: int, repeat: int) -> dict[str, float]:
+    command = [sys.executable, __file__, "--child", stage_name, str(size), str(repeat)]
+    completed = subprocess.run(command, check=True, capture_output=True, text=True)
+    return json.loads(completed.stdout)
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    *,
+    time_threshold: float,
+    rss_threshold: float,
+) -> list[str]:
+    """Describe every result that regressed beyond the thresholds."""
+
+    regressions = []
+    for key, result in sorted(results.items()):
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric, threshold, slack in (
+            ("seconds", time_threshold, _MIN_SECONDS_DELTA),
+            ("stage_rss_mib", rss_threshold, _MIN_RSS_DELTA_MIB),
+            ("alloc_peak_mib", rss_threshold, _MIN_RSS_DELTA_MIB),
+        ):
+            if metric not in reference:
+                continue
+            limit = max(reference[metric] * (1 + threshold), reference[metric] + slack)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{key}: {metric} {result[metric]:.4g} > {limit:.4g} "
+                    f"(baseline {reference[metric]:.4g})"
+                )
+    return regressions
+
+
+def parse_arguments(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    from stages import STAGES
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the sacct parse, filter, statistics and render stages.",
+    )
+    parser.add_argument(
+        "--stage",
+        action="append",
+        choices=sorted(STAGES),
+        help="Stage to run (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=list(DEFAULT_SIZES),
+        help="Comma-separated sacct line counts (default: %(default)s)",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the results as the new baseline instead of comparing",
+    )
+    parser.add_argument("--time-threshold", type=float, default=DEFAULT_TIME_THRESHOLD)
+    parser.add_argument("--rss-threshold", type=float, default=DEFAULT_RSS_THRESHOLD)
+    parser.add_argument("--output", type=Path, help="Also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["--child"]:
+        stage_name, size, repeat = argv[1], int(argv[2]), int(argv[3])
+        print(json.dumps(measure(stage_name, size, repeat)))
+        return 0
+
+    from stages import STAGES
+
+    args = parse_arguments(argv)
+    results: dict[str, dict[str, float]] = {}
+    for stage_name in args.stage or list(STAGES):
+        for size in args.sizes:
+            key = f"{stage_name}[{size}]"
+            results[key] = _measure_in_subprocess(stage_name, size, args.repeat)
+            result = results[key]
+            print(
+                f"{key:<36} {result['seconds'] * 1000:10.2f} ms "
+                f"{result['stage_rss_mib']:8.1f} MiB stage "
+                f"{result['peak_rss_mib']:8.1f} MiB peak "
+                f"{result['alloc_peak_mib']:8.1f} MiB allocated"
+            )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.setdefault("results", {}).update(results)
+        baseline["machine"] = f"{platform.machine()} {platform.python_implementation()} {platform.python_version()}"
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline first", file=sys.stderr)
+        return 2
+    regressions = compare(
+        results,
+        json.loads(args.baseline.read_text())["results"],
+        time_threshold=args.time_threshold,
+        rss_threshold=args.rss_threshold,
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
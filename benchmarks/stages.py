@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import itertools
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from slurm_waiting_times.aggregate import GROUP_KEYS, aggregate_waits
+from slurm_waiting_times.histogram import create_histogram
+from slurm_waiting_times.output import write_results_csv
+from slurm_waiting_times.processing import build_job_table, filter_rows, wait_values
+from slurm_waiting_times.sacct import parse_sacct_output, parse_sacct_table
+from slurm_waiting_times.stats import percentile
+from slurm_waiting_times.synthetic import WorkloadSpec, generate_sacct_json, generate_sacct_lines
+from slurm_waiting_times.time_utils import ensure_timezone, freedman_diaconis_bins
+
+# Enough jobs per synthetic day that even large sizes span only a few days.
+_SPEC = WorkloadSpec(jobs_per_day=50_000, seed=20)
+_WINDOW = (datetime(2025, 1, 1), datetime(2025, 12, 31, 23, 59, 59))
+_TIMEZONE = "UTC"
+
+
+@dataclass(frozen=True, slots=True)
+class Stage:
+    """A benchmarked pipeline stage: ``setup(size)`` builds its input, ``run`` is timed."""
+
+    name: str
+    setup: Callable[[int], Any]
+    run: Callable[[Any], object]
+
+
+def _window(size: int) -> tuple[datetime, datetime]:
+    """The window whose synthetic ``--parsable2`` output has about ``size`` lines."""
+
+    start, end = _WINDOW
+    last = next(itertools.islice(generate_sacct_lines(start, end, _SPEC), size - 1, None))
+    return start, datetime.fromisoformat(last.split("|", 6)[5])
+
+
+def sacct_output(size: int) -> str:
+    """About ``size`` synthetic ``--parsable2`` lines, steps included, as one string."""
+
+    return "\n".join(generate_sacct_lines(*_window(size), _SPEC)) + "\n"
+
+
+def sacct_json_output(size: int) -> str:
+    """``sacct --json`` output for exactly the jobs of :func:`sacct_output`."""
+
+    return "".join(generate_sacct_json(*_window(size), _SPEC, tzinfo=ensure_timezone(_TIMEZONE)))
+
+
+def _jobs(size: int):
+    rows = parse_sacct_output(sacct_output(size), timezone=_TIMEZONE)
+    return filter_rows(build_job_table(rows))
+
+
+def _setup_filter(size: int):
+    return build_job_table(parse_sacct_output(sacct_output(size), timezone=_TIMEZONE))
+
+
+def _setup_waits(size: int) -> list[float]:
+    return wait_values(_jobs(size))
+
+
+def _percentiles(waits: list[float]) -> list[float]:
+    ordered = sorted(waits)
+    return [percentile(ordered, fraction) for fraction in (0.25, 0.5, 0.75, 0.95)]
+
+
+def _pyplot():
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from matplotlib import pyplot
+
+    return pyplot
+
+
+def _setup_histogram(size: int):
+    # Import matplotlib up front so that its import time is not measured.
+    _pyplot()
+    return _jobs(size)
+
+
+def _histogram(jobs) -> None:
+    _pyplot().close(create_histogram(jobs, title="benchmark"))
+
+
+def multiline_output(size: int) -> str:
+    """One row whose ``SubmitLine`` spans ``size`` lines, followed by a normal row.
+
+    Parsing it must stay linear in ``size``; re-joining the pending lines
+    for every continuation line made it quadratic.
+    """
+
+    continuation = [f"      echo 'line {index}'" for index in range(size)]
+    return "\n".join(
+        [
+            "1|1|interactive|salloc bash -c",
+            *continuation,
+            "    |carol|2025-08-30T17:40:10|2025-08-30T17:45:10|COMPLETED|gpu|1||00:05:00",
+            "2|2|next|sbatch b.sh|dave|2025-08-30T18:00:00|2025-08-30T18:01:00|COMPLETED|cpu|1||00:01:00",
+        ]
+    )
+
+
+def _setup_csv(size: int):
+    return _jobs(size), Path(tempfile.mkdtemp()) / "results.csv"
+
+
+def _write_csv(state) -> None:
+    jobs, path = state
+    write_results_csv(path, jobs)
+
+
+STAGES = {
+    stage.name: stage
+    for stage in (
+        Stage(
+            "parse_sacct_output",
+            sacct_output,
+            lambda output: parse_sacct_output(output, timezone=_TIMEZONE),
+        ),
+        Stage(
+            "parse_sacct_json",
+            sacct_json_output,
+            lambda output: parse_sacct_output(output, timezone=_TIMEZONE),
+        ),
+        Stage(
+            "parse_multiline_submit_line",
+            multiline_output,
+            lambda output: parse_sacct_output(output, timezone=_TIMEZONE),
+        ),
+        Stage(
+            "parse_sacct_table",
+            lambda size: sacct_output(size).splitlines(),
+            lambda lines: parse_sacct_table(lines, timezone=_TIMEZONE),
+        ),
+        Stage("filter_rows", _setup_filter, filter_rows),
+        # The row path: the result only references the parsed rows.
+        Stage(
+            "filter_rows_objects",
+            lambda size: parse_sacct_output(sacct_output(size), timezone=_TIMEZONE),
+            filter_rows,
+        ),
+        Stage("freedman_diaconis_bins", _setup_waits, freedman_diaconis_bins),
+        Stage("percentile", _setup_waits, _percentiles),
+        Stage("aggregate_waits", _jobs, lambda jobs: aggregate_waits(jobs, GROUP_KEYS)),
+        Stage("create_histogram", _setup_histogram, _histogram),
+        Stage("write_results_csv", _setup_csv, _write_csv),
+    )
+}
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import math
+import operator
+from dataclasses import dataclass
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+
+from .models import Categorical, JobRecord, JobTable, JobView
+from .stats import DEFAULT_RELATIVE_ACCURACY, STATISTICS_MODES
+from .time_utils import local_dates
+
+GROUP_KEYS = ("user", "partition", "job_type", "slurm_job_type", "state", "day")
+GROUP_QUANTILES = (("median", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99))
+# Sorts before every bucket index, like DDSketch's count of non-positive values.
+_ZERO_BUCKET = np.iinfo(np.int64).min
+_GAMMA = (1 + DEFAULT_RELATIVE_ACCURACY) / (1 - DEFAULT_RELATIVE_ACCURACY)
+
+
+@dataclass(frozen=True, slots=True)
+class GroupSummary:
+    """Waiting-time statistics in seconds of the jobs sharing one group key.
+
+    ``key`` holds one value per grouping key; missing values are ``""``.
+    """
+
+    key: tuple[str, ...]
+    count: int
+    mean: float
+    median: float
+    p90: float
+    p95: float
+    p99: float
+    maximum: float
+
+
+def parse_group_keys(value: str) -> list[str]:
+    """Split a comma-separated list of :data:`GROUP_KEYS`."""
+
+    return _check_keys([key.strip() for key in value.split(",") if key.strip()])
+
+
+def _check_keys(keys: Sequence[str]) -> list[str]:
+    if not keys:
+        raise ValueError("at least one group key is required")
+    unknown = [key for key in keys if key not in GROUP_KEYS]
+    if unknown:
+        raise ValueError(
+            f"unknown group key(s) {', '.join(unknown)}; choose from {', '.join(GROUP_KEYS)}"
+        )
+    if len(set(keys)) != len(keys):
+        raise ValueError("group keys must not repeat")
+    return list(keys)
+
+
+class GroupedWaits:
+    """Mergeable partial aggregate of waiting times per group.
+
+    Jobs are assigned a group ID by hashing the values of their ``by`` keys;
+    ``day`` is the calendar date of the job's start.  Count, sum, minimum and
+    maximum are accumulated per group.  For quantiles, ``exact`` mode keeps
+    every waiting time like :class:`~slurm_waiting_times.stats.ExactStatistics`,
+    while ``approx`` mode only keeps per-group counts in the logarithmic
+    buckets of :class:`~slurm_waiting_times.stats.DDSketch`, so its memory
+    depends on the number of groups rather than jobs.  Buckets are never
+    collapsed: waiting times of up to a year span fewer than 900 of them.
+
+    Partials built from separate shards or tables combine with :meth:`merge`;
+    all groups are then summarised together by :meth:`summaries`.
+    """
+
+    def __init__(self, by: Sequence[str], *, mode: str = "exact") -> None:
+        if mode not in STATISTICS_MODES:
+            raise ValueError(f"Unknown statistics mode '{mode}'")
+        self.by = tuple(_check_keys(by))
+        self.mode = mode
+        self._groups: dict[tuple[str, ...], int] = {}
+        self._count = np.zeros(0, dtype=np.int64)
+        self._sum = np.zeros(0, dtype=np.float64)
+        self._min = np.zeros(0, dtype=np.float64)
+        self._max = np.zeros(0, dtype=np.float64)
+        # Exact mode: one entry per job with its waiting time.  Approx mode: one
+        # entry per group and bucket, with the bucket's count in ``_weights``.
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._values = np.zeros(0, dtype=np.float64 if mode == "exact" else np.int64)
+        self._weights = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def update(self, jobs: JobTable | Iterable[JobRecord | JobView]) -> None:
+        """Add the waiting times of ``jobs`` to their groups."""
+
+        if isinstance(jobs, JobTable):
+            ids, waits = self._table_ids(jobs), jobs.wait_seconds.astype(np.float64)
+        else:
+            ids, waits = self._record_ids(jobs)
+        self._add(ids, waits)
+
+    def _table_ids(self, table: JobTable) -> np.ndarray:
+        codes = []
+        labels = []
+        for key in self.by:
+            if key == "day":
+                days, inverse = np.unique(
+                    local_dates(table.start_epoch, table.tzinfo), return_inverse=True
+                )
+                codes.append(inverse.astype(np.int64))
+                labels.append([str(day) for day in days])
+            else:
+                column: Categorical = getattr(table, key)
+                # Shift the missing code -1 onto the empty label.
+                codes.append(column.codes.astype(np.int64) + 1)
+                labels.append(["", *column.categories])
+
+        shape = tuple(len(values) for values in labels)
+        if math.prod(shape) < 2**62:
+            combined = np.ravel_multi_index(codes, shape)
+            groups, inverse = np.unique(combined, return_inverse=True)
+            group_codes = np.unravel_index(groups, shape)
+        else:
+            groups, inverse = np.unique(np.stack(codes, axis=1), axis=0, return_inverse=True)
+            group_codes = groups.T
+        key_columns = [
+            [values[code] for code in column.tolist()]
+            for values, column in zip(labels, group_codes)
+        ]
+        mapping = np.fromiter(
+            map(self._group_id, zip(*key_columns)), dtype=np.int64, count=len(groups)
+        )
+        return mapping[inverse.reshape(-1)]
+
+    def _record_ids(self, jobs: Iterable[JobRecord | JobView]) -> tuple[np.ndarray, np.ndarray]:
+        getters: list[Callable[[JobRecord | JobView], str]] = [
+            _start_day if key == "day" else operator.attrgetter(key) for key in self.by
+        ]
+        ids: list[int] = []
+        waits: list[float] = []
+        groups = self._groups
+        for job in jobs:
+            key = tuple(getter(job) or "" for getter in getters)
+            group = groups.get(key)
+            if group is None:
+                group = self._group_id(key)
+            ids.append(group)
+            waits.append(job.wait_seconds)
+        return np.array(ids, dtype=np.int64), np.array(waits, dtype=np.float64)
+
+    def _group_id(self, key: tuple[str, ...]) -> int:
+        return self._groups.setdefault(key, len(self._groups))
+
+    def _grow(self) -> None:
+        missing = len(self._groups) - len(self._count)
+        if missing <= 0:
+            return
+        self._count = np.concatenate([self._count, np.zeros(missing, dtype=np.int64)])
+        self._sum = np.concatenate([self._sum, np.zeros(missing)])
+        self._min = np.concatenate([self._min, np.full(missing, math.inf)])
+        self._max = np.concatenate([self._max, np.full(missing, -math.inf)])
+
+    def _add(self, ids: np.ndarray, waits: np.ndarray) -> None:
+        self._grow()
+        size = len(self._groups)
+        self._count += np.bincount(ids, minlength=size)
+        self._sum += np.bincount(ids, weights=waits, minlength=size)
+        np.minimum.at(self._min, ids, waits)
+        np.maximum.at(self._max, ids, waits)
+        if self.mode == "exact":
+            self._store(ids, waits)
+        else:
+            self._store(ids, _bucket_indices(waits), np.ones(len(ids), dtype=np.int64))
+
+    def _store(
+        self, ids: np.ndarray, values: np.ndarray, weights: np.ndarray | None = None
+    ) -> None:
+        ids = np.concatenate([self._ids, ids])
+        values = np.concatenate([self._values, values])
+        order = np.lexsort((values, ids))
+        ids, values = ids[order], values[order]
+        if weights is not None and len(ids):
+            weights = np.concatenate([self._weights, weights])[order]
+            # Fold repeated (group, bucket) pairs into one entry.
+            first = np.ones(len(ids), dtype=bool)
+            first[1:] = (ids[1:] != ids[:-1]) | (values[1:] != values[:-1])
+            starts = np.flatnonzero(first)
+            ids, values = ids[starts], values[starts]
+            self._weights = np.add.reduceat(weights, starts)
+        self._ids, self._values = ids, values
+
+    def merge(self, other: "GroupedWaits") -> None:
+        """Fold ``other`` into this aggregate; both must share keys and mode."""
+
+        if other.by != self.by or other.mode != self.mode:
+            raise ValueError("cannot merge aggregates with different keys or modes")
+        mapping = np.fromiter(
+            (self._group_id(key) for key in other._groups), dtype=np.int64, count=len(other)
+        )
+        self._grow()
+        self._count[mapping] += other._count
+        self._sum[mapping] += other._sum
+        self._min[mapping] = np.minimum(self._min[mapping], other._min)
+        self._max[mapping] = np.maximum(self._max[mapping], other._max)
+        weights = other._weights if self.mode == "approx" else None
+        self._store(mapping[other._ids], other._values, weights)
+
+    def summaries(self) -> list[GroupSummary]:
+        """Summarise every group, ordered by key."""
+
+        if not self._groups:
+            return []
+        counts = self._count
+        if self.mode == "exact":
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            quantiles = [
+                _sorted_percentiles(self._values, starts, counts, fraction)
+                for _name, fraction in GROUP_QUANTILES
+            ]
+        else:
+            quantiles = [
+                _bucket_quantiles(self._ids, self._values, self._weights, counts, fraction)
+                for _name, fraction in GROUP_QUANTILES
+            ]
+            quantiles = [np.clip(values, self._min, self._max) for values in quantiles]
+
+        columns = zip(
+            self._groups,
+            counts.tolist(),
+            (self._sum / counts).tolist(),
+            *(values.tolist() for values in quantiles),
+            self._max.tolist(),
+        )
+        summaries = [GroupSummary(*values) for values in columns]
+        summaries.sort(key=operator.attrgetter("key"))
+        return summaries
+
+
+def _start_day(job: JobRecord | JobView) -> str:
+    return job.start_time.date().isoformat()
+
+
+def _bucket_indices(values: np.ndarray) -> np.ndarray:
+    indices = np.full(len(values), _ZERO_BUCKET, dtype=np.int64)
+    positive = values > 0
+    indices[positive] = np.ceil(np.log(values[positive]) / math.log(_GAMMA))
+    return indices
+
+
+def _sorted_percentiles(
+    values: np.ndarray, starts: np.ndarray, counts: np.ndarray, fraction: float
+) -> np.ndarray:
+    """:func:`~slurm_waiting_times.stats.percentile` of every group at once.
+
+    ``values`` are sorted within each group; group ``i`` occupies
+    ``counts[i]`` entries from ``starts[i]``.
+    """
+
+    position = (counts - 1) * fraction
+    lower = np.floor(position)
+    upper = np.ceil(position)
+    lower_values = values[starts + lower.astype(np.int64)]
+    upper_values = values[starts + upper.astype(np.int64)]
+    return lower_values + (upper_values - lower_values) * (position - lower)
+
+
+def _bucket_quantiles(
+    ids: np.ndarray,
+    buckets: np.ndarray,
+    weights: np.ndarray,
+    counts: np.ndarray,
+    fraction: float,
+) -> np.ndarray:
+    """:meth:`~slurm_waiting_times.stats.DDSketch.quantile` of every group at once."""
+
+    cumulative = np.cumsum(weights)
+    first = np.searchsorted(ids, np.arange(len(counts)))
+    before = cumulative[first] - weights[first]
+    # The first bucket whose running count within its group exceeds the rank.
+    position = np.searchsorted(cumulative, before + fraction * (counts - 1), side="right")
+    indices = buckets[position]
+    zero = indices == _ZERO_BUCKET
+    estimates = 2 * _GAMMA ** np.where(zero, 0, indices).astype(np.float64) / (_GAMMA + 1)
+    return np.where(zero, 0.0, estimates)
+
+
+def aggregate_waits(
+    jobs: JobTable | Iterable[JobRecord | JobView],
+    by: Sequence[str],
+    *,
+    mode: str = "exact",
+) -> list[GroupSummary]:
+    """Summarise the waiting times of ``jobs`` grouped by ``by`` in one pass."""
+
+    grouped = GroupedWaits(by, mode=mode)
+    grouped.update(jobs)
+    return grouped.summaries()
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+from .aggregate import parse_group_keys
+from .models import JobTable
+from .processing import JOB_TYPE_CHOICES, SLURM_JOB_TYPE_CHOICES
+
+MANIFEST_SUFFIXES = (".json", ".toml", ".yaml", ".yml")
+
+
+class ManifestError(RuntimeError):
+    """Raised when a batch report manifest cannot be loaded."""
+
+
+@dataclass(slots=True)
+class ReportSpec:
+    """Filter and histogram settings of one report in a batch manifest.
+
+    The fields mirror the single-report command line options.
+    """
+
+    start: str | None = None
+    end: str | None = None
+    user: list[str] | None = None
+    partition: list[str] | None = None
+    job_type: str | None = None
+    slurm_job_type: str | None = None
+    include_steps: bool = False
+    max_wait_hours: float | None = None
+    runtime: list[str] = field(default_factory=list)
+    bins: int | None = None
+    bin_seconds: bool = False
+    group_by: list[str] | None = None
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "ReportSpec":
+        unknown = set(data) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ManifestError(f"unknown report key(s): {', '.join(sorted(unknown))}")
+
+        spec = cls(
+            start=_optional_str(data, "start"),
+            end=_optional_str(data, "end"),
+            user=_string_list(data, "user"),
+            partition=_string_list(data, "partition"),
+            job_type=_choice(data, "job_type", JOB_TYPE_CHOICES),
+            slurm_job_type=_choice(data, "slurm_job_type", SLURM_JOB_TYPE_CHOICES),
+            include_steps=_flag(data, "include_steps"),
+            max_wait_hours=_optional_number(data, "max_wait_hours", float),
+            runtime=_string_list(data, "runtime") or [],
+            bins=_optional_number(data, "bins", int),
+            bin_seconds=_flag(data, "bin_seconds"),
+            group_by=_group_keys(data, "group_by"),
+        )
+        if spec.bins is not None and spec.bins <= 0:
+            raise ManifestError("bins must be a positive integer")
+        if spec.max_wait_hours is not None and spec.max_wait_hours <= 0:
+            raise ManifestError("max_wait_hours must be greater than zero")
+        return spec
+
+
+def _optional_str(data: Mapping[str, Any], key: str) -> str | None:
+    value = data.get(key)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, date):
+        # TOML and YAML parse unquoted dates and datetimes themselves.
+        return value.isoformat()
+    raise ManifestError(f"{key} must be a string")
+
+
+def _string_list(data: Mapping[str, Any], key: str) -> list[str] | None:
+    value = data.get(key)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        items = value.split(",")
+    elif isinstance(value, list) and all(isinstance(item, str) for item in value):
+        items = value
+    else:
+        raise ManifestError(f"{key} must be a string or a list of strings")
+    cleaned = [item.strip() for item in items if item.strip()]
+    return cleaned or None
+
+
+def _group_keys(data: Mapping[str, Any], key: str) -> list[str] | None:
+    keys = _string_list(data, key)
+    if keys is None:
+        return None
+    try:
+        return parse_group_keys(",".join(keys))
+    except ValueError as exc:
+        raise ManifestError(f"{key}: {exc}") from exc
+
+
+def _choice(data: Mapping[str, Any], key: str, choices: Sequence[str]) -> str | None:
+    value = data.get(key)
+    if value is None:
+        return None
+    if value not in choices:
+        raise ManifestError(f"{key} must be one of {', '.join(choices)}")
+    return value
+
+
+def _flag(data: Mapping[str, Any], key: str) -> bool:
+    value = data.get(key, False)
+    if not isinstance(value, bool):
+        raise ManifestError(f"{key} must be true or false")
+    return value
+
+
+def _optional_number(data: Mapping[str, Any], key: str, kind: type) -> Any:
+    value = data.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ManifestError(f"{key} must be a number")
+    if kind is int and value != int(value):
+        raise ManifestError(f"{key} must be an integer")
+    return kind(value)
+
+
+def _read_manifest(path: Path) -> Any:
+    suffix = path.suffix.lower()
+    if suffix not in MANIFEST_SUFFIXES:
+        raise ManifestError(
+            f"Unsupported manifest format '{path.suffix}', expected one of "
+            f"{', '.join(MANIFEST_SUFFIXES)}"
+        )
+    try:
+        text = path.read_text()
+    except OSError as exc:
+        raise ManifestError(f"Cannot read manifest {path}: {exc}") from exc
+
+    try:
+        if suffix == ".json":
+            return json.loads(text)
+        if suffix == ".toml":
+            try:
+                import tomllib
+            except ModuleNotFoundError:  # pragma: no cover - Python 3.10
+                try:
+                    import tomli as tomllib
+                except ModuleNotFoundError as exc:
+                    raise ManifestError("TOML manifests require Python 3.11 or tomli") from exc
+            return tomllib.loads(text)
+        try:
+            import yaml
+        except ModuleNotFoundError as exc:
+            raise ManifestError("YAML manifests require PyYAML") from exc
+        return yaml.safe_load(text)
+    except ManifestError:
+        raise
+    except Exception as exc:
+        raise ManifestError(f"Cannot parse manifest {path}: {exc}") from exc
+
+
+def load_manifest(path: str | Path) -> list[ReportSpec]:
+    """Load the report specifications of a JSON, TOML or YAML manifest.
+
+    The manifest holds a ``reports`` list; keys in the optional ``defaults``
+    table apply to every report that does not set them itself.
+    """
+
+    path = Path(path)
+    data = _read_manifest(path)
+    if not isinstance(data, dict):
+        raise ManifestError(f"{path}: manifest must be a table with a 'reports' list")
+    unknown = set(data) - {"defaults", "reports"}
+    if unknown:
+        raise ManifestError(f"{path}: unknown manifest key(s): {', '.join(sorted(unknown))}")
+
+    defaults = data.get("defaults") or {}
+    reports = data.get("reports")
+    if not isinstance(defaults, dict):
+        raise ManifestError(f"{path}: 'defaults' must be a table")
+    if not isinstance(reports, list) or not reports:
+        raise ManifestError(f"{path}: 'reports' must be a non-empty list")
+
+    specs = []
+    for index, report in enumerate(reports, start=1):
+        if not isinstance(report, dict):
+            raise ManifestError(f"{path}: report {index} must be a table")
+        try:
+            specs.append(ReportSpec.from_mapping({**defaults, **report}))
+        except ManifestError as exc:
+            raise ManifestError(f"{path}: report {index}: {exc}") from exc
+    return specs
+
+
+def shared_filter(values: Sequence[list[str] | None]) -> list[str] | None:
+    """Return the ``sacct`` filter that serves every report at once.
+
+    Server-side filtering is only possible when all reports ask for the same
+    literal values; otherwise everything is fetched and filtered locally.
+    """
+
+    first = values[0]
+    if not first or any(any(ch in item for ch in "*?[") for item in first):
+        return None
+    if any(value != first for value in values[1:]):
+        return None
+    return first
+
+
+def window_mask(table: JobTable, start: datetime, end: datetime) -> np.ndarray:
+    """Select jobs active inside ``[start, end]`` the way ``sacct -S/-E`` does.
+
+    A job qualifies when it was submitted before ``end`` and had not finished
+    before ``start``.  Jobs without an elapsed time are treated as running.
+    """
+
+    end_epochs = table.start_epoch + table.elapsed_seconds
+    finished_before = end_epochs < start.timestamp()
+    return (table.submit_epoch <= end.timestamp()) & ~finished_before
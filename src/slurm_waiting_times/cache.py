@@ -0,0 +1,441 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Iterable, List, Sequence
+
+from .models import SacctRow
+from .sacct import (
+    SACCT_FORMAT,
+    build_sacct_command,
+    dedupe_rows,
+    fetch_shards,
+    iter_sacct_rows,
+    stream_sacct,
+)
+from .time_utils import ensure_timezone, split_window
+
+LOGGER = logging.getLogger(__name__)
+
+ONE_DAY = timedelta(days=1)
+# Jobs that are still pending when a day ends only get a Start value later, so
+# a day is considered final once this much time has passed after its end.
+DEFAULT_SETTLE_TIME = timedelta(days=1)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    scope TEXT NOT NULL,
+    day TEXT NOT NULL,
+    immutable INTEGER NOT NULL,
+    fetched_at TEXT NOT NULL,
+    PRIMARY KEY (scope, day)
+);
+CREATE TABLE IF NOT EXISTS rows (
+    scope TEXT NOT NULL,
+    day TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    job_id TEXT NOT NULL,
+    job_id_raw TEXT,
+    job_name TEXT,
+    submit_line TEXT,
+    user TEXT NOT NULL,
+    submit_time TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    state TEXT NOT NULL,
+    partition TEXT NOT NULL,
+    nodes INTEGER,
+    alloc_tres TEXT,
+    elapsed_seconds REAL,
+    PRIMARY KEY (scope, day, position)
+);
+CREATE TABLE IF NOT EXISTS dataset (
+    scope TEXT NOT NULL,
+    start_epoch REAL NOT NULL,
+    job_id TEXT NOT NULL,
+    job_id_raw TEXT,
+    job_name TEXT,
+    submit_line TEXT,
+    user TEXT NOT NULL,
+    submit_time TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    state TEXT NOT NULL,
+    partition TEXT NOT NULL,
+    nodes INTEGER,
+    alloc_tres TEXT,
+    elapsed_seconds REAL,
+    PRIMARY KEY (scope, job_id_raw, job_id)
+);
+CREATE INDEX IF NOT EXISTS dataset_start ON dataset (scope, start_epoch);
+CREATE TABLE IF NOT EXISTS watermarks (
+    scope TEXT PRIMARY KEY,
+    low_water TEXT NOT NULL,
+    high_water TEXT NOT NULL
+);
+"""
+
+_ROW_COLUMNS = (
+    "job_id, job_id_raw, job_name, submit_line, user, submit_time, start_time, "
+    "state, partition, nodes, alloc_tres, elapsed_seconds"
+)
+
+
+def cache_scope(
+    *,
+    users: Sequence[str] | None = None,
+    partitions: Sequence[str] | None = None,
+    include_steps: bool = False,
+    timezone: str | None = None,
+) -> str:
+    """Return the key under which rows of a particular sacct query are cached.
+
+    Everything that changes what ``sacct`` returns for a given day is part of
+    the key: the server-side user and partition filters, whether steps are
+    requested, the field list and the timezone used to interpret timestamps.
+    """
+
+    return json.dumps(
+        {
+            "format": SACCT_FORMAT,
+            "include_steps": include_steps,
+            "partitions": sorted(partitions) if partitions else None,
+            "tz": ensure_timezone(timezone).key,
+            "users": sorted(users) if users else None,
+        },
+        sort_keys=True,
+    )
+
+
+def _row_to_values(row: SacctRow) -> tuple:
+    return (
+        row.job_id,
+        row.job_id_raw,
+        row.job_name,
+        row.submit_line,
+        row.user,
+        row.submit_time.isoformat(),
+        row.start_time.isoformat(),
+        row.state,
+        row.partition,
+        row.nodes,
+        row.alloc_tres,
+        row.elapsed_seconds,
+    )
+
+
+def _row_from_values(values: Sequence) -> SacctRow:
+    (
+        job_id,
+        job_id_raw,
+        job_name,
+        submit_line,
+        user,
+        submit_time,
+        start_time,
+        state,
+        partition,
+        nodes,
+        alloc_tres,
+        elapsed_seconds,
+    ) = values
+    return SacctRow(
+        job_id=job_id,
+        job_id_raw=job_id_raw,
+        job_name=job_name,
+        submit_line=submit_line,
+        user=user,
+        submit_time=datetime.fromisoformat(submit_time),
+        start_time=datetime.fromisoformat(start_time),
+        state=state,
+        partition=partition,
+        nodes=nodes,
+        alloc_tres=alloc_tres,
+        elapsed_seconds=elapsed_seconds,
+    )
+
+
+class JobCache:
+    """SQLite store of parsed sacct rows.
+
+    Rows are kept in two forms: the results of whole-day ``sacct`` queries,
+    used by :func:`fetch_with_cache`, and an incrementally grown dataset with
+    start-time watermarks, used by :func:`fetch_since_last_run`.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> "JobCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def immutable_days(self, scope: str, days: Iterable[date]) -> set[date]:
+        """Return the subset of ``days`` that is cached and will not change."""
+
+        wanted = {day.isoformat(): day for day in days}
+        if not wanted:
+            return set()
+        cursor = self._connection.execute(
+            "SELECT day FROM days WHERE scope = ? AND immutable = 1",
+            (scope,),
+        )
+        return {wanted[value] for (value,) in cursor if value in wanted}
+
+    def load_day(self, scope: str, day: date) -> List[SacctRow]:
+        cursor = self._connection.execute(
+            f"SELECT {_ROW_COLUMNS} FROM rows WHERE scope = ? AND day = ? ORDER BY position",
+            (scope, day.isoformat()),
+        )
+        return [_row_from_values(values) for values in cursor]
+
+    def store_day(
+        self,
+        scope: str,
+        day: date,
+        rows: Iterable[SacctRow],
+        *,
+        immutable: bool,
+        fetched_at: datetime,
+    ) -> None:
+        """Replace the cached rows of ``day`` within ``scope``."""
+
+        key = day.isoformat()
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM rows WHERE scope = ? AND day = ?",
+                (scope, key),
+            )
+            self._connection.executemany(
+                f"INSERT INTO rows (scope, day, position, {_ROW_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (scope, key, position, *_row_to_values(row))
+                    for position, row in enumerate(rows)
+                ),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO days (scope, day, immutable, fetched_at) VALUES (?, ?, ?, ?)",
+                (scope, key, int(immutable), fetched_at.isoformat()),
+            )
+
+    def watermarks(self, scope: str) -> tuple[datetime, datetime] | None:
+        """Return the span of Start times ingested into the dataset of ``scope``."""
+
+        row = self._connection.execute(
+            "SELECT low_water, high_water FROM watermarks WHERE scope = ?",
+            (scope,),
+        ).fetchone()
+        if row is None:
+            return None
+        low_water, high_water = row
+        return datetime.fromisoformat(low_water), datetime.fromisoformat(high_water)
+
+    def append_rows(
+        self,
+        scope: str,
+        rows: Iterable[SacctRow],
+        *,
+        low_water: datetime,
+        high_water: datetime,
+    ) -> None:
+        """Insert or refresh ``rows`` in the dataset and move its watermarks."""
+
+        with self._connection:
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO dataset (scope, start_epoch, {_ROW_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (scope, row.start_time.timestamp(), *_row_to_values(row))
+                    for row in rows
+                ),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO watermarks (scope, low_water, high_water) VALUES (?, ?, ?)",
+                (scope, low_water.isoformat(), high_water.isoformat()),
+            )
+
+    def load_dataset(self, scope: str, start: datetime, end: datetime) -> List[SacctRow]:
+        """Return dataset rows of ``scope`` that started within ``start``-``end``."""
+
+        cursor = self._connection.execute(
+            f"SELECT {_ROW_COLUMNS} FROM dataset "
+            "WHERE scope = ? AND start_epoch BETWEEN ? AND ? ORDER BY start_epoch, job_id",
+            (scope, start.timestamp(), end.timestamp()),
+        )
+        return [_row_from_values(values) for values in cursor]
+
+
+def _full_day(window_start: datetime, window_end: datetime) -> date | None:
+    """Return the day covered by a shard if the shard spans the whole day."""
+
+    midnight = window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window_start != midnight:
+        return None
+    # Month-based windows end at 23:59:59 rather than at the next midnight.
+    if window_end < midnight + ONE_DAY - timedelta(seconds=1):
+        return None
+    return midnight.date()
+
+
+def fetch_with_cache(
+    cache: JobCache,
+    start: datetime,
+    end: datetime,
+    *,
+    users: Sequence[str] | None = None,
+    partitions: Sequence[str] | None = None,
+    include_steps: bool = False,
+    timezone: str | None = None,
+    workers: int = 4,
+    output_format: str = "text",
+    now: datetime | None = None,
+    settle_time: timedelta = DEFAULT_SETTLE_TIME,
+    runner: Callable[[Sequence[str]], Iterable[str]] = stream_sacct,
+) -> List[SacctRow]:
+    """Return the rows for ``start``-``end``, querying sacct only where needed.
+
+    The window is split into calendar days.  Whole days that were fetched
+    after they had settled are read from ``cache``; everything else, including
+    partial days at the window edges, is fetched with at most ``workers``
+    concurrent ``sacct`` calls.  Fetched whole days are written back and
+    marked immutable once ``settle_time`` has passed since their end.
+    """
+
+    tzinfo = ensure_timezone(timezone)
+    now = datetime.now(tzinfo) if now is None else now
+    scope = cache_scope(
+        users=users,
+        partitions=partitions,
+        include_steps=include_steps,
+        timezone=timezone,
+    )
+
+    windows = split_window(start, end, ONE_DAY)
+    days = [_full_day(window_start, window_end) for window_start, window_end in windows]
+    cached = cache.immutable_days(scope, (day for day in days if day is not None))
+
+    missing = [index for index, day in enumerate(days) if day not in cached]
+    commands = [
+        build_sacct_command(
+            *windows[index],
+            users=users,
+            partitions=partitions,
+            include_steps=include_steps,
+            output_format=output_format,
+        )
+        for index in missing
+    ]
+    LOGGER.info(
+        "Job cache: %d of %d day(s) cached, fetching %d window(s)",
+        len(cached),
+        len(windows),
+        len(commands),
+    )
+    fetched = dict(
+        zip(missing, fetch_shards(commands, workers=workers, timezone=timezone, runner=runner))
+    )
+
+    results: List[List[SacctRow]] = []
+    for index, day in enumerate(days):
+        if index not in fetched:
+            results.append(cache.load_day(scope, day))
+            continue
+        shard_rows = fetched[index]
+        if day is not None:
+            day_end = datetime.combine(day, datetime.min.time(), tzinfo=start.tzinfo) + ONE_DAY
+            cache.store_day(
+                scope,
+                day,
+                shard_rows,
+                immutable=day_end + settle_time <= now,
+                fetched_at=now,
+            )
+        results.append(shard_rows)
+
+    return list(dedupe_rows(row for shard_rows in results for row in shard_rows))
+
+
+def fetch_since_last_run(
+    cache: JobCache,
+    start: datetime,
+    end: datetime,
+    *,
+    users: Sequence[str] | None = None,
+    partitions: Sequence[str] | None = None,
+    include_steps: bool = False,
+    timezone: str | None = None,
+    output_format: str = "text",
+    now: datetime | None = None,
+    runner: Callable[[Sequence[str]], Iterable[str]] = stream_sacct,
+) -> List[SacctRow]:
+    """Return rows that started within ``start``-``end`` from the persisted dataset.
+
+    Only the delta since the dataset's high-water mark, the latest ingested
+    Start timestamp, is requested from ``sacct``; the new rows are merged
+    into the dataset and the mark advances.  Jobs still running at the mark
+    are returned again by ``sacct`` and simply refreshed.  A window starting
+    before the data already ingested triggers a fetch from ``start`` up to at
+    least the ingested data; one starting after the mark is still fetched
+    from the mark, so the dataset never has gaps.  The mark never passes the
+    end of a fetch, even when a job active in the fetched window started
+    later, and it never moves back.
+    """
+
+    tzinfo = ensure_timezone(timezone)
+    now = datetime.now(tzinfo) if now is None else now
+    scope = cache_scope(
+        users=users,
+        partitions=partitions,
+        include_steps=include_steps,
+        timezone=timezone,
+    )
+
+    marks = cache.watermarks(scope)
+    fetch_end = min(end, now)
+    if marks is None:
+        low_water, high_water = start, None
+        fetch_start = start
+    elif start < marks[0]:
+        # Reach the ingested data so that no gap opens before it.
+        low_water, high_water = start, marks[1]
+        fetch_start = start
+        fetch_end = min(max(end, marks[0]), now)
+    else:
+        low_water, high_water = marks
+        fetch_start = high_water
+
+    if fetch_start <= fetch_end:
+        command = build_sacct_command(
+            fetch_start,
+            fetch_end,
+            users=users,
+            partitions=partitions,
+            include_steps=include_steps,
+            output_format=output_format,
+        )
+        rows = list(iter_sacct_rows(runner(command), timezone=timezone))
+        latest = max((row.start_time for row in rows), default=fetch_start)
+        # Jobs submitted before fetch_end may start after it; beyond fetch_end
+        # nothing has been fetched yet.
+        latest = min(latest, fetch_end)
+        if high_water is not None:
+            latest = max(latest, high_water)
+        LOGGER.info(
+            "Incremental fetch from %s: %d row(s), high-water mark %s",
+            fetch_start.isoformat(),
+            len(rows),
+            latest.isoformat(),
+        )
+        cache.append_rows(scope, rows, low_water=low_water, high_water=latest)
+
+    return cache.load_dataset(scope, start, end)
@@ -1,27 +1,72 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import logging
-import re
 import shlex
 import sys
-from datetime import datetime, timedelta
-from statistics import mean
-from typing import Sequence
-
-from .histogram import create_histogram
-from .output import build_prefix, histogram_path, results_csv_path, write_results_csv
-from .processing import RuntimeConstraint, filter_rows
-from .sacct import SacctError, build_sacct_command, parse_sacct_output, run_sacct
+from datetime import datetime, timedelta, tzinfo
+from http.server import ThreadingHTTPServer
+from typing import Callable, Iterable, Sequence
+
+from .aggregate import GROUP_KEYS, aggregate_waits, parse_group_keys
+from .batch import ManifestError, load_manifest, shared_filter, window_mask
+from .cache import JobCache, fetch_since_last_run, fetch_with_cache
+from .exporter import DEFAULT_BUCKETS, MetricsSnapshot, make_metrics_server
+from .histogram import bin_histogram
+from .models import FilteredJobs, JobRecord, JobTable, SacctRow
+from .output import (
+    GROUP_OUTPUT_FORMATS,
+    build_prefix,
+    groups_path,
+    histogram_bins_path,
+    histogram_path,
+    results_csv_path,
+    write_group_summaries,
+    write_histogram_bins_csv,
+    write_results_csv,
+)
+from .processing import (
+    JOB_TYPE_CHOICES,
+    SLURM_JOB_TYPE_CHOICES,
+    RuntimeConstraint,
+    build_job_table,
+    filter_rows,
+    parse_runtime_constraint,
+    wait_values,
+)
+from .render import RenderJob, render_figures
+from .sacct import (
+    SACCT_OUTPUT_FORMATS,
+    SacctError,
+    build_sacct_command,
+    build_sharded_commands,
+    fetch_sharded_rows,
+    iter_sacct_rows,
+    parse_sacct_table,
+    stream_sacct,
+)
+from .server import (
+    DEFAULT_QUERY_TTL,
+    DatasetRefresher,
+    QueryCache,
+    WaitTimeService,
+    make_server,
+)
+from .stats import STATISTICS_MODES, summarize
 from .time_utils import (
+    SHARD_SIZES,
     ensure_timezone,
     format_timedelta_hms,
     parse_cli_datetime_window,
-    parse_duration_to_seconds,
 )
 
 LOGGER = logging.getLogger(__name__)
 DEFAULT_WINDOW_DAYS = 14
+DEFAULT_WORKERS = 4
+DEFAULT_SERVE_PORT = 8642
+DEFAULT_EXPORTER_PORT = 9642
+DEFAULT_REFRESH_SECONDS = 300.0
 
 
 class CliError(RuntimeError):
@@ -51,12 +96,12 @@ def parse_arguments(argv: Sequence[str] | None = None) -> argparse.Namespace:
     )
     parser.add_argument(
         "--job-type",
-        choices=["cpu-only", "1-gpu", "single-node", "multi-node"],
+        choices=JOB_TYPE_CHOICES,
         help="Restrict results to a specific job type derived from sacct metadata.",
     )
     parser.add_argument(
         "--slurm-job-type",
-        choices=["batch", "interactive"],
+        choices=SLURM_JOB_TYPE_CHOICES,
         help="Restrict results to batch or interactive Slurm submissions.",
     )
     parser.add_argument(
@@ -89,7 +134,226 @@ def parse_arguments(argv: Sequence[str] | None = None) -> argparse.Namespace:
             "<01:00:00 or ranges like 01:00:00-02:00:00."
         ),
     )
+    parser.add_argument(
+        "--shard",
+        choices=sorted(SHARD_SIZES),
+        help="Split the window into per-day or per-week sacct queries that run concurrently.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Maximum number of concurrent sacct queries when sharding (default: {DEFAULT_WORKERS}).",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="PATH",
+        help=(
+            "SQLite file used to cache parsed sacct rows per day. Settled past days "
+            "are read from the cache instead of querying sacct again."
+        ),
+    )
+    _add_sacct_format_argument(parser)
+    parser.add_argument(
+        "--since-last-run",
+        action="store_true",
+        help=(
+            "Only query sacct for jobs started since the previous run and append them "
+            "to the dataset kept in --cache."
+        ),
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Hold jobs in compact NumPy columns instead of one object per job.",
+    )
+    parser.add_argument(
+        "--stats",
+        choices=STATISTICS_MODES,
+        default="exact",
+        help=(
+            "How to compute mean/median/percentiles: exact sorts all waiting times, "
+            "approx uses a bounded-memory quantile sketch with 1%% relative error."
+        ),
+    )
+    parser.add_argument(
+        "--group-by",
+        metavar="KEYS",
+        help=(
+            "Comma-separated keys to also report wait statistics per group for: "
+            f"{', '.join(GROUP_KEYS)}."
+        ),
+    )
+    _add_group_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def _add_sacct_format_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--sacct-format",
+        choices=SACCT_OUTPUT_FORMATS,
+        default="text",
+        help=(
+            "Output format requested from sacct. json avoids parsing ambiguities but "
+            "is several times larger and slower to decode (default: text)."
+        ),
+    )
 
+
+def _add_group_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--group-format",
+        choices=GROUP_OUTPUT_FORMATS,
+        default="csv",
+        help="File format of the per-group statistics (default: csv).",
+    )
+
+
+def _add_fetch_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options shared by the subcommands that fetch one dataset for many queries."""
+
+    parser.add_argument("--tz", help="IANA timezone to interpret timestamps.")
+    parser.add_argument(
+        "--shard",
+        choices=sorted(SHARD_SIZES),
+        help="Split the window into per-day or per-week sacct queries that run concurrently.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Maximum number of concurrent sacct queries when sharding (default: {DEFAULT_WORKERS}).",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="PATH",
+        help="SQLite file used to cache parsed sacct rows per day.",
+    )
+    _add_sacct_format_argument(parser)
+
+
+def parse_batch_arguments(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="slurm-waiting-times batch",
+        description=(
+            "Write every report of a manifest from a single sacct fetch covering "
+            "the union of their windows."
+        ),
+    )
+    parser.add_argument("manifest", help="JSON, TOML or YAML file listing the reports.")
+    parser.add_argument("--dry-run", action="store_true", help="Print the sacct command and exit.")
+    _add_fetch_arguments(parser)
+    parser.add_argument(
+        "--stats",
+        choices=STATISTICS_MODES,
+        default="exact",
+        help="How to compute mean/median/percentiles (see the main command).",
+    )
+    _add_group_arguments(parser)
+    parser.add_argument(
+        "--render-workers",
+        type=int,
+        default=1,
+        help="Number of processes that render the histograms in parallel (default: 1).",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_serve_arguments(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="slurm-waiting-times serve",
+        description=(
+            "Keep a rolling window of jobs in memory and answer waiting-time "
+            "queries over HTTP."
+        ),
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on (default: 127.0.0.1).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_SERVE_PORT,
+        help=f"Port to listen on (default: {DEFAULT_SERVE_PORT}).",
+    )
+    parser.add_argument(
+        "--window-days",
+        type=float,
+        default=DEFAULT_WINDOW_DAYS,
+        help=f"Length of the rolling job window in days (default: {DEFAULT_WINDOW_DAYS}).",
+    )
+    parser.add_argument(
+        "--refresh",
+        type=float,
+        default=DEFAULT_REFRESH_SECONDS,
+        help=f"Seconds between dataset refreshes (default: {DEFAULT_REFRESH_SECONDS:g}).",
+    )
+    parser.add_argument(
+        "--ttl",
+        type=float,
+        default=DEFAULT_QUERY_TTL,
+        help=f"Seconds a query result is cached (default: {DEFAULT_QUERY_TTL:g}).",
+    )
+    parser.add_argument(
+        "--include-steps",
+        action="store_true",
+        help="Also load job steps so queries can include them.",
+    )
+    _add_fetch_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def parse_exporter_arguments(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="slurm-waiting-times exporter",
+        description="Expose waiting-time histograms and quantiles as OpenMetrics text.",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on (default: 127.0.0.1).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_EXPORTER_PORT,
+        help=f"Port to listen on (default: {DEFAULT_EXPORTER_PORT}).",
+    )
+    parser.add_argument(
+        "--window-days",
+        type=float,
+        default=1.0,
+        help="Length of the rolling job window in days (default: 1).",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=60.0,
+        help="Minimum seconds between refreshes (default: 60).",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=900.0,
+        help="Maximum seconds between refreshes (default: 900).",
+    )
+    parser.add_argument(
+        "--load-factor",
+        type=float,
+        default=10.0,
+        help=(
+            "Wait at least this multiple of the last refresh duration before "
+            "refreshing again (default: 10)."
+        ),
+    )
+    parser.add_argument(
+        "--buckets",
+        help="Comma-separated histogram bucket bounds in seconds.",
+    )
+    _add_fetch_arguments(parser)
     return parser.parse_args(argv)
 
 
@@ -109,88 +373,34 @@ def _validate_max_wait(value: float | None) -> float | None:
     return value
 
 
+def _validate_workers(value: int) -> int:
+    if value <= 0:
+        raise CliError("--workers must be a positive integer")
+    return value
+
+
+def _validate_group_by(value: str | None) -> list[str] | None:
+    if value is None:
+        return None
+    try:
+        return parse_group_keys(value)
+    except ValueError as exc:
+        raise CliError(f"--group-by: {exc}") from exc
+
+
 def _prepare_filters(user_arg: str | None, partition_arg: str | None) -> tuple[list[str] | None, list[str] | None]:
     users = _split_arg(user_arg)
     partitions = _split_arg(partition_arg)
     return users, partitions
 
 
-_RUNTIME_RANGE_PATTERN = re.compile(
-    r"^(?P<start>(?:\d+-)?\d+:[0-5]?\d:[0-5]?\d)-(?P<end>(?:\d+-)?\d+:[0-5]?\d:[0-5]?\d)$"
-)
-
-
 def _parse_runtime_value(value: str) -> RuntimeConstraint:
     if not value or not value.strip():
         raise CliError("--runtime requires a non-empty value")
-
-    raw = value.strip()
-    lowered = raw.lower()
-
-    if lowered.startswith("shorter:"):
-        _, _, duration = raw.partition(":")
-        if not duration:
-            raise CliError(f"Invalid --runtime value '{value}': missing duration")
-        try:
-            seconds = parse_duration_to_seconds(duration)
-        except ValueError as exc:
-            raise CliError(f"Invalid --runtime value '{value}': {exc}") from exc
-        return RuntimeConstraint(max_seconds=seconds, max_inclusive=False)
-
-    if lowered.startswith("longer:"):
-        _, _, duration = raw.partition(":")
-        if not duration:
-            raise CliError(f"Invalid --runtime value '{value}': missing duration")
-        try:
-            seconds = parse_duration_to_seconds(duration)
-        except ValueError as exc:
-            raise CliError(f"Invalid --runtime value '{value}': {exc}") from exc
-        return RuntimeConstraint(min_seconds=seconds, min_inclusive=False)
-
-    range_match = _RUNTIME_RANGE_PATTERN.match(raw)
-    if range_match:
-        try:
-            start_seconds = parse_duration_to_seconds(range_match.group("start"))
-            end_seconds = parse_duration_to_seconds(range_match.group("end"))
-        except ValueError as exc:
-            raise CliError(f"Invalid --runtime value '{value}': {exc}") from exc
-        if start_seconds > end_seconds:
-            raise CliError(f"Invalid --runtime range '{value}': start exceeds end")
-        return RuntimeConstraint(
-            min_seconds=start_seconds,
-            max_seconds=end_seconds,
-            min_inclusive=True,
-            max_inclusive=True,
-        )
-
-    for prefix, inclusive in (("<=", True), (">=", True), ("<", False), (">", False), ("=", True)):
-        if raw.startswith(prefix):
-            duration = raw[len(prefix) :].strip()
-            try:
-                seconds = parse_duration_to_seconds(duration)
-            except ValueError as exc:
-                raise CliError(f"Invalid --runtime value '{value}': {exc}") from exc
-            if prefix.startswith("<"):
-                return RuntimeConstraint(max_seconds=seconds, max_inclusive=inclusive)
-            if prefix.startswith(">"):
-                return RuntimeConstraint(min_seconds=seconds, min_inclusive=inclusive)
-            return RuntimeConstraint(
-                min_seconds=seconds,
-                max_seconds=seconds,
-                min_inclusive=True,
-                max_inclusive=True,
-            )
-
     try:
-        seconds = parse_duration_to_seconds(raw)
+        return parse_runtime_constraint(value)
     except ValueError as exc:
         raise CliError(f"Invalid --runtime value '{value}': {exc}") from exc
-    return RuntimeConstraint(
-        min_seconds=seconds,
-        max_seconds=seconds,
-        min_inclusive=True,
-        max_inclusive=True,
-    )
 
 
 def _parse_runtime_filters(values: Sequence[str] | None) -> list[RuntimeConstraint]:
@@ -278,13 +488,459 @@ def _title(
     )
 
 
+def _build_commands(
+    start: datetime,
+    end: datetime,
+    *,
+    shard: str | None,
+    users: Sequence[str] | None,
+    partitions: Sequence[str] | None,
+    include_steps: bool,
+    output_format: str,
+) -> list[list[str]]:
+    if shard:
+        return build_sharded_commands(
+            start,
+            end,
+            shard=SHARD_SIZES[shard],
+            users=users,
+            partitions=partitions,
+            include_steps=include_steps,
+            output_format=output_format,
+        )
+    return [
+        build_sacct_command(
+            start,
+            end,
+            users=users,
+            partitions=partitions,
+            include_steps=include_steps,
+            output_format=output_format,
+        )
+    ]
+
+
+def _fetch_rows(
+    commands: Sequence[Sequence[str]],
+    *,
+    start: datetime,
+    end: datetime,
+    users: Sequence[str] | None,
+    partitions: Sequence[str] | None,
+    include_steps: bool,
+    tz: str | None,
+    cache_path: str | None,
+    since_last_run: bool,
+    workers: int,
+    output_format: str,
+) -> Iterable[SacctRow]:
+    if since_last_run:
+        with JobCache(cache_path) as cache:
+            return fetch_since_last_run(
+                cache,
+                start,
+                end,
+                users=users,
+                partitions=partitions,
+                include_steps=include_steps,
+                timezone=tz,
+                output_format=output_format,
+            )
+    if cache_path:
+        with JobCache(cache_path) as cache:
+            return fetch_with_cache(
+                cache,
+                start,
+                end,
+                users=users,
+                partitions=partitions,
+                include_steps=include_steps,
+                timezone=tz,
+                workers=workers,
+                output_format=output_format,
+            )
+    if len(commands) > 1:
+        return fetch_sharded_rows(commands, workers=workers, timezone=tz)
+    return iter_sacct_rows(stream_sacct(commands[0]), timezone=tz)
+
+
+def _fetch_table(
+    commands: Sequence[Sequence[str]],
+    *,
+    start: datetime,
+    end: datetime,
+    users: Sequence[str] | None,
+    partitions: Sequence[str] | None,
+    include_steps: bool,
+    tz: str | None,
+    tzinfo: tzinfo,
+    cache_path: str | None,
+    since_last_run: bool,
+    workers: int,
+    output_format: str,
+) -> JobTable:
+    """Fetch like :func:`_fetch_rows`, into a :class:`JobTable`.
+
+    A single uncached query is parsed straight to epoch seconds, without
+    building a row object per job.
+    """
+
+    if len(commands) == 1 and not cache_path and not since_last_run:
+        return parse_sacct_table(stream_sacct(commands[0]), timezone=tz)
+    rows = _fetch_rows(
+        commands,
+        start=start,
+        end=end,
+        users=users,
+        partitions=partitions,
+        include_steps=include_steps,
+        tz=tz,
+        cache_path=cache_path,
+        since_last_run=since_last_run,
+        workers=workers,
+        output_format=output_format,
+    )
+    return build_job_table(rows, tzinfo=tzinfo)
+
+
+def _write_report(
+    records: Sequence[JobRecord] | FilteredJobs | JobTable,
+    *,
+    start: datetime,
+    end: datetime,
+    prefix: str,
+    title: str,
+    bin_seconds: bool,
+    bins: int | None,
+    stats: str,
+    group_by: Sequence[str] | None = None,
+    group_format: str = "csv",
+) -> RenderJob:
+    """Print the summary line, write the output files and return the figure to draw.
+
+    Per-group statistics are only written when ``group_by`` names keys.
+    """
+
+    wait_summary = summarize(wait_values(records), mode=stats)
+    print(
+        f"Jobs: {len(records)} | Window: {start.isoformat()} -> {end.isoformat()} "
+        f"| Mean wait: {format_timedelta_hms(wait_summary.mean)}"
+    )
+
+    csv_path = results_csv_path(prefix)
+    write_results_csv(csv_path, records)
+
+    histogram_data = bin_histogram(
+        records, use_seconds=bin_seconds, bins=bins, summary=wait_summary
+    )
+    write_histogram_bins_csv(histogram_bins_path(prefix), histogram_data)
+
+    if group_by:
+        write_group_summaries(
+            groups_path(prefix, group_format),
+            group_by,
+            aggregate_waits(records, group_by, mode=stats),
+            output_format=group_format,
+        )
+
+    return RenderJob(data=histogram_data, title=title, path=histogram_path(prefix))
+
+
+def run_batch(argv: Sequence[str]) -> int:
+    """Evaluate every report of a manifest against one shared sacct fetch."""
+
+    try:
+        args = parse_batch_arguments(argv)
+        workers = _validate_workers(args.workers)
+        if args.render_workers <= 0:
+            raise CliError("--render-workers must be a positive integer")
+        specs = load_manifest(args.manifest)
+        tzinfo = ensure_timezone(args.tz)
+    except (CliError, ManifestError, ValueError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 2
+
+    now = datetime.now(tzinfo)
+    default_start = now - timedelta(days=DEFAULT_WINDOW_DAYS)
+
+    reports = []
+    for index, spec in enumerate(specs, start=1):
+        try:
+            start_dt, end_dt = parse_cli_datetime_window(
+                spec.start, spec.end, default_start, now, tzinfo
+            )
+            runtime_constraints = _parse_runtime_filters(spec.runtime)
+        except (CliError, ValueError) as exc:
+            print(f"Error in report {index}: {exc}", file=sys.stderr)
+            return 2
+        if start_dt > end_dt:
+            print(f"Error in report {index}: start must be before end", file=sys.stderr)
+            return 2
+        reports.append((spec, start_dt, end_dt, runtime_constraints))
+
+    union_start = min(start_dt for _, start_dt, _, _ in reports)
+    union_end = max(end_dt for _, _, end_dt, _ in reports)
+    command_users = shared_filter([spec.user for spec in specs])
+    command_partitions = shared_filter([spec.partition for spec in specs])
+    include_steps = any(spec.include_steps for spec in specs)
+
+    commands = _build_commands(
+        union_start,
+        union_end,
+        shard=args.shard,
+        users=command_users,
+        partitions=command_partitions,
+        include_steps=include_steps,
+        output_format=args.sacct_format,
+    )
+    if args.dry_run:
+        for command in commands:
+            print(shlex.join(command))
+        return 0
+
+    try:
+        table = _fetch_table(
+            commands,
+            start=union_start,
+            end=union_end,
+            users=command_users,
+            partitions=command_partitions,
+            include_steps=include_steps,
+            tz=args.tz,
+            tzinfo=tzinfo,
+            cache_path=args.cache,
+            since_last_run=False,
+            workers=workers,
+            output_format=args.sacct_format,
+        )
+    except SacctError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    LOGGER.info("Batch: %d sacct row(s) shared by %d report(s)", len(table), len(reports))
+
+    status = 0
+    render_jobs = []
+    seen_prefixes: set[str] = set()
+    for spec, start_dt, end_dt, runtime_constraints in reports:
+        tokens = _args_tokens(
+            start_supplied=spec.start is not None,
+            start_value=start_dt,
+            end_value=end_dt,
+            users=spec.user,
+            partitions=spec.partition,
+            include_steps=spec.include_steps,
+            tz=args.tz,
+            bins=spec.bins,
+            bin_seconds=spec.bin_seconds,
+            max_wait_hours=spec.max_wait_hours,
+            job_type=spec.job_type,
+            slurm_job_type=spec.slurm_job_type,
+            runtime_filters=spec.runtime,
+        )
+        prefix = build_prefix(now, tokens)
+        if prefix in seen_prefixes:
+            LOGGER.warning("Several reports write to the output prefix %s", prefix)
+        seen_prefixes.add(prefix)
+
+        records = filter_rows(
+            table.take(window_mask(table, start_dt, end_dt)),
+            include_steps=spec.include_steps,
+            user_filters=spec.user,
+            partition_filters=spec.partition,
+            job_type=spec.job_type,
+            slurm_job_type=spec.slurm_job_type,
+            max_wait_hours=spec.max_wait_hours,
+            runtime_filters=runtime_constraints,
+        )
+        if not records:
+            print(f"No jobs found for report {prefix}.", file=sys.stderr)
+            status = 1
+            continue
+
+        job = _write_report(
+            records,
+            start=start_dt,
+            end=end_dt,
+            prefix=prefix,
+            title=_title(
+                start=start_dt,
+                end=end_dt,
+                users=spec.user,
+                partitions=spec.partition,
+                include_steps=spec.include_steps,
+                job_type=spec.job_type,
+                slurm_job_type=spec.slurm_job_type,
+            ),
+            bin_seconds=spec.bin_seconds,
+            bins=spec.bins,
+            stats=args.stats,
+            group_by=spec.group_by,
+            group_format=args.group_format,
+        )
+        render_jobs.append(job)
+
+    render_figures(render_jobs, workers=args.render_workers)
+    return status
+
+
+def _dataset_loader(
+    args: argparse.Namespace, *, tzinfo: tzinfo, workers: int, include_steps: bool
+) -> Callable[[datetime, datetime], JobTable]:
+    """Return ``load(start, end)`` fetching every job of a window into a JobTable."""
+
+    def load(start: datetime, end: datetime) -> JobTable:
+        commands = _build_commands(
+            start,
+            end,
+            shard=args.shard,
+            users=None,
+            partitions=None,
+            include_steps=include_steps,
+            output_format=args.sacct_format,
+        )
+        return _fetch_table(
+            commands,
+            start=start,
+            end=end,
+            users=None,
+            partitions=None,
+            include_steps=include_steps,
+            tz=args.tz,
+            tzinfo=tzinfo,
+            cache_path=args.cache,
+            since_last_run=False,
+            workers=workers,
+            output_format=args.sacct_format,
+        )
+
+    return load
+
+
+def _create_server(args: argparse.Namespace) -> tuple[ThreadingHTTPServer, DatasetRefresher]:
+    """Build the refresher and HTTP server of ``serve`` and load the first snapshot."""
+
+    if args.window_days <= 0:
+        raise CliError("--window-days must be greater than zero")
+    if args.refresh <= 0 or args.ttl < 0:
+        raise CliError("--refresh must be positive and --ttl must not be negative")
+    workers = _validate_workers(args.workers)
+    tzinfo = ensure_timezone(args.tz)
+
+    load = _dataset_loader(args, tzinfo=tzinfo, workers=workers, include_steps=args.include_steps)
+    refresher = DatasetRefresher(
+        load,
+        window=timedelta(days=args.window_days),
+        interval=args.refresh,
+        clock=lambda: datetime.now(tzinfo),
+    )
+    refresher.refresh()
+    service = WaitTimeService(refresher, QueryCache(args.ttl))
+    return make_server(service, args.host, args.port), refresher
+
+
+def run_serve(argv: Sequence[str]) -> int:
+    """Serve waiting-time statistics over HTTP until interrupted."""
+
+    args = parse_serve_arguments(argv)
+    try:
+        server, refresher = _create_server(args)
+    except (CliError, ValueError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 2
+    except SacctError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+
+    return _serve_until_interrupted(server, refresher)
+
+
+def _parse_buckets(value: str | None) -> tuple[float, ...]:
+    if not value:
+        return DEFAULT_BUCKETS
+    try:
+        buckets = tuple(sorted({float(part) for part in value.split(",") if part.strip()}))
+    except ValueError as exc:
+        raise CliError(f"Invalid --buckets value '{value}'") from exc
+    if not buckets or buckets[0] <= 0:
+        raise CliError("--buckets must list positive numbers of seconds")
+    return buckets
+
+
+def _create_exporter(args: argparse.Namespace) -> tuple[ThreadingHTTPServer, DatasetRefresher]:
+    """Build the exporter's refresher and HTTP server and render the first snapshot."""
+
+    if args.window_days <= 0:
+        raise CliError("--window-days must be greater than zero")
+    if not 0 < args.min_interval <= args.max_interval or args.load_factor < 0:
+        raise CliError(
+            "--min-interval must be positive and at most --max-interval, "
+            "--load-factor must not be negative"
+        )
+    workers = _validate_workers(args.workers)
+    tzinfo = ensure_timezone(args.tz)
+    metrics = MetricsSnapshot(buckets=_parse_buckets(args.buckets))
+
+    refresher = DatasetRefresher(
+        _dataset_loader(args, tzinfo=tzinfo, workers=workers, include_steps=False),
+        window=timedelta(days=args.window_days),
+        interval=args.min_interval,
+        load_factor=args.load_factor,
+        max_interval=args.max_interval,
+        clock=lambda: datetime.now(tzinfo),
+        on_refresh=metrics.update,
+    )
+    refresher.refresh()
+    return make_metrics_server(metrics, args.host, args.port), refresher
+
+
+def _serve_until_interrupted(server: ThreadingHTTPServer, refresher: DatasetRefresher) -> int:
+    refresher.start()
+    host, port = server.server_address[:2]
+    LOGGER.info("Listening on http://%s:%d", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        refresher.stop()
+    return 0
+
+
+def run_exporter(argv: Sequence[str]) -> int:
+    """Serve OpenMetrics waiting-time metrics until interrupted."""
+
+    args = parse_exporter_arguments(argv)
+    try:
+        server, refresher = _create_exporter(args)
+    except (CliError, ValueError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 2
+    except SacctError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    return _serve_until_interrupted(server, refresher)
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["batch"]:
+        return run_batch(argv[1:])
+    if argv[:1] == ["serve"]:
+        return run_serve(argv[1:])
+    if argv[:1] == ["exporter"]:
+        return run_exporter(argv[1:])
+
     try:
         args = parse_arguments(argv)
         bins = _validate_bins(args.bins)
         max_wait = _validate_max_wait(args.max_wait_hours)
         runtime_constraints = _parse_runtime_filters(args.runtime)
+        workers = _validate_workers(args.workers)
+        group_by = _validate_group_by(args.group_by)
+        if args.since_last_run and not args.cache:
+            raise CliError("--since-last-run requires --cache")
     except CliError as exc:
         print(f"Error: {exc}", file=sys.stderr)
         return 2
@@ -320,47 +976,54 @@ def main(argv: Sequence[str] | None = None) -> int:
     command_users = users if users and not _has_wildcard(users) else None
     command_partitions = partitions if partitions and not _has_wildcard(partitions) else None
 
-    command = build_sacct_command(
+    commands = _build_commands(
         start_dt,
         end_dt,
+        shard=args.shard,
         users=command_users,
         partitions=command_partitions,
         include_steps=args.include_steps,
+        output_format=args.sacct_format,
     )
 
     if args.dry_run:
-        print(shlex.join(command))
+        for command in commands:
+            print(shlex.join(command))
         return 0
 
     try:
-        sacct_output = run_sacct(command)
+        fetch = functools.partial(_fetch_table, tzinfo=tzinfo) if args.columnar else _fetch_rows
+        rows = fetch(
+            commands,
+            start=start_dt,
+            end=end_dt,
+            users=command_users,
+            partitions=command_partitions,
+            include_steps=args.include_steps,
+            tz=args.tz,
+            cache_path=args.cache,
+            since_last_run=args.since_last_run,
+            workers=workers,
+            output_format=args.sacct_format,
+        )
+        records = filter_rows(
+            rows,
+            include_steps=args.include_steps,
+            user_filters=users,
+            partition_filters=partitions,
+            job_type=args.job_type,
+            slurm_job_type=args.slurm_job_type,
+            max_wait_hours=max_wait,
+            runtime_filters=runtime_constraints,
+        )
     except SacctError as exc:
         print(str(exc), file=sys.stderr)
         return 1
 
-    rows = parse_sacct_output(sacct_output, timezone=args.tz)
-    records = filter_rows(
-        rows,
-        include_steps=args.include_steps,
-        user_filters=users,
-        partition_filters=partitions,
-        job_type=args.job_type,
-        slurm_job_type=args.slurm_job_type,
-        max_wait_hours=max_wait,
-        runtime_filters=runtime_constraints,
-    )
-
     if not records:
         print("No jobs found in the specified window.", file=sys.stderr)
         return 1
 
-    mean_wait_seconds = mean(record.wait_seconds for record in records)
-    summary = (
-        f"Jobs: {len(records)} | Window: {start_dt.isoformat()} -> {end_dt.isoformat()} "
-        f"| Mean wait: {format_timedelta_hms(mean_wait_seconds)}"
-    )
-    print(summary)
-
     tokens = _args_tokens(
         start_supplied=args.start is not None,
         start_value=start_dt,
@@ -376,15 +1039,11 @@ def main(argv: Sequence[str] | None = None) -> int:
         slurm_job_type=args.slurm_job_type,
         runtime_filters=args.runtime,
     )
-    prefix = build_prefix(now, tokens)
-
-    csv_path = results_csv_path(prefix)
-    write_results_csv(csv_path, records)
-
-    fig = create_histogram(
+    job = _write_report(
         records,
-        use_seconds=args.bin_seconds,
-        bins=bins,
+        start=start_dt,
+        end=end_dt,
+        prefix=build_prefix(now, tokens),
         title=_title(
             start=start_dt,
             end=end_dt,
@@ -394,15 +1053,13 @@ def main(argv: Sequence[str] | None = None) -> int:
             job_type=args.job_type,
             slurm_job_type=args.slurm_job_type,
         ),
+        bin_seconds=args.bin_seconds,
+        bins=bins,
+        stats=args.stats,
+        group_by=group_by,
+        group_format=args.group_format,
     )
-    fig.savefig(histogram_path(prefix))
-    fig.clf()
-    try:
-        from matplotlib import pyplot as plt
-    except Exception:  # pragma: no cover - optional dependency may be missing
-        pass
-    else:
-        plt.close(fig)
+    render_figures([job])
     return 0
 
 
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Sequence
+
+import numpy as np
+
+from .models import Categorical, JobTable
+from .processing import filter_rows
+from .server import DatasetSnapshot
+
+LOGGER = logging.getLogger(__name__)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_BUCKETS = (60, 300, 900, 1800, 3600, 7200, 14400, 28800, 86400, 172800, 604800)
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+_UNKNOWN = "unknown"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Sequence[tuple[str, str]]) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _label_values(column: Categorical) -> list[str]:
+    """Label per ``code + 1``; missing values (code -1) become ``unknown``."""
+
+    return [_UNKNOWN, *column.categories]
+
+
+def _groups(codes: np.ndarray) -> list[tuple[int, np.ndarray]]:
+    """Indices of every distinct code, ordered by code."""
+
+    order = np.argsort(codes, kind="stable")
+    unique, starts = np.unique(codes[order], return_index=True)
+    return list(zip(unique.tolist(), np.split(order, starts[1:])))
+
+
+def render_metrics(
+    table: JobTable,
+    snapshot: DatasetSnapshot,
+    *,
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> bytes:
+    """Render waiting-time metrics of ``table`` as OpenMetrics text.
+
+    ``slurm_job_wait_seconds`` is a histogram labelled by partition and job
+    type, so it can be summed over either label.  Quantiles cannot be
+    aggregated, so they are exported as two summaries, one per partition and
+    one per job type.
+    """
+
+    waits = table.wait_seconds.astype(np.float64)
+    bounds = np.asarray(sorted(buckets), dtype=np.float64)
+    partitions = _label_values(table.partition)
+    job_types = _label_values(table.job_type)
+    lines = [
+        "# TYPE slurm_job_wait_seconds histogram",
+        "# UNIT slurm_job_wait_seconds seconds",
+        "# HELP slurm_job_wait_seconds Time between submission and start of jobs in the window.",
+    ]
+
+    # One combined code per (partition, job type) pair.
+    pair_codes = (table.partition.codes.astype(np.int64) + 1) * len(job_types) + (
+        table.job_type.codes + 1
+    )
+    for pair, indices in _groups(pair_codes):
+        partition, job_type = divmod(pair, len(job_types))
+        labels = [("partition", partitions[partition]), ("job_type", job_types[job_type])]
+        values = waits[indices]
+        cumulative = np.searchsorted(np.sort(values), bounds, side="right")
+        for bound, count in zip(bounds.tolist() + [math.inf], cumulative.tolist() + [len(values)]):
+            lines.append(
+                f"slurm_job_wait_seconds_bucket{_labels(labels + [('le', _number(bound))])} {count}"
+            )
+        lines.append(f"slurm_job_wait_seconds_count{_labels(labels)} {len(values)}")
+        lines.append(f"slurm_job_wait_seconds_sum{_labels(labels)} {_number(values.sum())}")
+
+    for name, label, column, names in (
+        ("slurm_partition_wait_seconds", "partition", table.partition, partitions),
+        ("slurm_job_type_wait_seconds", "job_type", table.job_type, job_types),
+    ):
+        lines.append(f"# TYPE {name} summary")
+        lines.append(f"# UNIT {name} seconds")
+        lines.append(f"# HELP {name} Waiting-time quantiles per {label.replace('_', ' ')}.")
+        for code, indices in _groups(column.codes + 1):
+            values = waits[indices]
+            labels = [(label, names[code])]
+            for quantile, value in zip(QUANTILES, np.quantile(values, QUANTILES).tolist()):
+                quantile_labels = _labels(labels + [("quantile", str(quantile))])
+                lines.append(f"{name}{quantile_labels} {_number(value)}")
+            lines.append(f"{name}_count{_labels(labels)} {len(values)}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(values.sum())}")
+
+    lines.extend(
+        [
+            "# TYPE slurm_wait_exporter_jobs gauge",
+            "# HELP slurm_wait_exporter_jobs Jobs in the current snapshot.",
+            f"slurm_wait_exporter_jobs {len(table)}",
+            "# TYPE slurm_wait_exporter_refresh_duration_seconds gauge",
+            "# UNIT slurm_wait_exporter_refresh_duration_seconds seconds",
+            "# HELP slurm_wait_exporter_refresh_duration_seconds Duration of the last fetch and parse.",
+            f"slurm_wait_exporter_refresh_duration_seconds {_number(snapshot.load_seconds)}",
+            "# TYPE slurm_wait_exporter_last_refresh_timestamp_seconds gauge",
+            "# UNIT slurm_wait_exporter_last_refresh_timestamp_seconds seconds",
+            "# HELP slurm_wait_exporter_last_refresh_timestamp_seconds Time of the last refresh.",
+            "slurm_wait_exporter_last_refresh_timestamp_seconds "
+            f"{_number(snapshot.refreshed_at.timestamp())}",
+            "# EOF",
+        ]
+    )
+    return ("\n".join(lines) + "\n").encode()
+
+
+class MetricsSnapshot:
+    """Holds the latest rendered metrics; scrapes only ever read it."""
+
+    def __init__(self, *, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._body = b"# EOF\n"
+        self._lock = threading.Lock()
+
+    @property
+    def body(self) -> bytes:
+        with self._lock:
+            return self._body
+
+    def update(self, snapshot: DatasetSnapshot) -> None:
+        """Refresh callback: filter the new jobs and pre-render the metrics."""
+
+        jobs = filter_rows(snapshot.table)
+        body = render_metrics(jobs, snapshot, buckets=self.buckets)
+        with self._lock:
+            self._body = body
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics: MetricsSnapshot
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = self.metrics.body
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - http.server signature
+        LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_metrics_server(metrics: MetricsSnapshot, host: str, port: int) -> ThreadingHTTPServer:
+    """Create (but do not start) the HTTP server exposing ``/metrics``."""
+
+    handler = type("MetricsRequestHandler", (_MetricsHandler,), {"metrics": metrics})
+    return ThreadingHTTPServer((host, port), handler)
@@ -1,26 +1,43 @@
 from __future__ import annotations
 
 import math
-from statistics import mean, median
-from typing import Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Iterator, Sequence
 
-try:  # pragma: no cover - dependency availability is environment specific
-    import matplotlib
+import numpy as np
 
-    matplotlib.use("Agg")
-    from matplotlib import pyplot as plt, ticker
-except Exception:  # pragma: no cover - handled at runtime
-    matplotlib = None
-    plt = None
+from .models import FilteredJobs, JobRecord, JobTable
+from .processing import wait_values
+from .stats import WaitSummary, summarize
+from .time_utils import format_timedelta_hms
 
-from .models import JobRecord
-from .time_utils import format_timedelta_hms, freedman_diaconis_bins
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from matplotlib.figure import Figure
 
 
-def prepare_histogram_values(records: Sequence[JobRecord], *, use_seconds: bool) -> list[float]:
+def _load_pyplot() -> tuple[Any, Any]:
+    """Import pyplot and ticker on first use.
+
+    Importing matplotlib costs hundreds of milliseconds (more on a cold font
+    cache), so it is deferred until a figure is actually rendered.
+    """
+
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        from matplotlib import pyplot as plt, ticker
+    except Exception as exc:  # pragma: no cover - dependency availability is environment specific
+        raise RuntimeError("matplotlib is required to create histograms") from exc
+    return plt, ticker
+
+
+def prepare_histogram_values(
+    records: Sequence[JobRecord] | FilteredJobs | JobTable, *, use_seconds: bool
+) -> list[float]:
     if use_seconds:
-        return [record.wait_seconds for record in records]
-    return [record.wait_seconds / 60.0 for record in records]
+        return wait_values(records)
+    return [value / 60.0 for value in wait_values(records)]
 
 
 LRZ_SKY_BLUE = "#009FE3"
@@ -86,19 +103,17 @@ def _nice_ticks(min_value: float, max_value: float, *, use_seconds: bool) -> lis
     return [tick / 60 for tick in ticks]
 
 
-def _percentile(sorted_values: Sequence[float], fraction: float) -> float:
-    if not 0 <= fraction <= 1:
-        raise ValueError("percentile fraction must be between 0 and 1")
-    if not sorted_values:
-        raise ValueError("percentile requires at least one value")
-    position = (len(sorted_values) - 1) * fraction
-    lower = math.floor(position)
-    upper = math.ceil(position)
-    if lower == upper:
-        return sorted_values[int(position)]
-    lower_value = sorted_values[lower]
-    upper_value = sorted_values[upper]
-    return lower_value + (upper_value - lower_value) * (position - lower)
+def _logspace_edges(start: float, end: float, *, bin_count: int) -> np.ndarray:
+    if bin_count < 1:
+        raise ValueError("bin_count must be at least 1")
+    if start == end:
+        return np.array([start * 0.8, end * 1.2])
+    edges = np.logspace(math.log10(start), math.log10(end), bin_count + 1)
+    # Pin the outer edges so rounding in the logarithms cannot drop the
+    # smallest or largest value from the histogram.
+    edges[0] = start
+    edges[-1] = end
+    return edges
 
 
 def _logspace_bins(data: Sequence[float], *, bin_count: int) -> list[float]:
@@ -107,79 +122,193 @@ def _logspace_bins(data: Sequence[float], *, bin_count: int) -> list[float]:
     positive = [value for value in data if value > 0]
     if not positive:
         positive = [1e-3]
-    start = min(positive)
-    end = max(positive)
-    if start == end:
-        return [start * 0.8, end * 1.2]
-    log_start = math.log10(start)
-    log_end = math.log10(end)
-    step = (log_end - log_start) / bin_count
-    return [10 ** (log_start + i * step) for i in range(bin_count + 1)]
+    return _logspace_edges(min(positive), max(positive), bin_count=bin_count).tolist()
 
 
-def create_histogram(
-    records: Sequence[JobRecord],
+def _bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Per-bin counts with :func:`numpy.histogram` semantics (last bin closed)."""
+
+    last_bin = len(edges) - 2
+    indices = np.searchsorted(edges, values, side="right") - 1
+    indices[values == edges[-1]] = last_bin
+    inside = (indices >= 0) & (indices <= last_bin)
+    return np.bincount(indices[inside], minlength=last_bin + 1)
+
+
+@dataclass(frozen=True, slots=True)
+class BinnedPanel:
+    """Log-spaced bin edges and job counts of one histogram panel.
+
+    ``edges`` and the value range are in the display unit of the histogram.
+    """
+
+    edges: np.ndarray
+    counts: np.ndarray
+    minimum: float
+    maximum: float
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, *, bin_count: int) -> "BinnedPanel":
+        positive = values[values > 0]
+        if not positive.size:
+            positive = np.array([1e-3])
+        edges = _logspace_edges(
+            float(positive.min()), float(positive.max()), bin_count=bin_count
+        )
+        return cls(
+            edges=edges,
+            counts=_bin_counts(values, edges),
+            minimum=float(values.min()),
+            maximum=float(values.max()),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class HistogramData:
+    """Everything needed to draw the waiting-time histogram.
+
+    Its size depends on the number of bins rather than the number of jobs,
+    so it can be rendered, pickled or exported without the job records.
+    """
+
+    typical: BinnedPanel
+    tail: BinnedPanel | None
+    summary: WaitSummary
+    use_seconds: bool
+    min_positive: float
+
+    @property
+    def scale(self) -> float:
+        """Factor converting seconds into the display unit."""
+
+        return 1.0 if self.use_seconds else 1 / 60.0
+
+    def bin_rows(self) -> Iterator[tuple[str, float, float, int]]:
+        """Yield ``(panel, lower_seconds, upper_seconds, count)`` per bin."""
+
+        panels = [("typical", self.typical), ("tail", self.tail)]
+        for name, panel in panels:
+            if panel is None:
+                continue
+            edges = panel.edges / self.scale
+            for lower, upper, count in zip(edges[:-1], edges[1:], panel.counts):
+                yield name, float(lower), float(upper), int(count)
+
+
+def _wait_array(records: Sequence[JobRecord] | FilteredJobs | JobTable) -> np.ndarray:
+    if isinstance(records, (FilteredJobs, JobTable)):
+        return records.wait_seconds.astype(np.float64)
+    return np.asarray(wait_values(records), dtype=np.float64)
+
+
+def bin_histogram(
+    records: Sequence[JobRecord] | FilteredJobs | JobTable,
     *,
     use_seconds: bool = False,
     bins: int | None = None,
-    title: str = "",
-) -> plt.Figure:
-    if not records:
-        raise ValueError("create_histogram requires at least one record")
+    summary: WaitSummary | None = None,
+) -> HistogramData:
+    """Compute the log-spaced bin counts of both histogram panels.
 
-    if plt is None:
-        raise RuntimeError("matplotlib is required to create histograms")
+    ``summary`` supplies the 95th percentile split between both panels and
+    the default Freedman–Diaconis bin count; it is computed exactly from
+    ``records`` when omitted.
+    """
 
-    values = prepare_histogram_values(records, use_seconds=use_seconds)
+    if not len(records):
+        raise ValueError("bin_histogram requires at least one record")
 
-    if bins is None:
-        bins = freedman_diaconis_bins(values)
+    wait_seconds = _wait_array(records)
+    if summary is None:
+        summary = summarize(wait_seconds.tolist())
+    scale = 1.0 if use_seconds else 1 / 60.0
+    values = wait_seconds * scale
 
-    fig, (ax_typical, ax_tail) = plt.subplots(1, 2, figsize=(12, 5), sharey=True)
+    if bins is None:
+        # The Freedman–Diaconis bin count does not depend on the time unit.
+        bins = summary.freedman_diaconis_bins()
+    bins = max(1, min(80, bins))
 
     # Matplotlib cannot render logarithmic axes that include non-positive values.
     # Replace zeros with a small positive value to keep them visible on the log
     # scale without altering their bin membership in a meaningful way.
-    min_positive = min((value for value in values if value > 0), default=None)
-    if min_positive is None:
-        # All waiting times are zero – fall back to plotting a single bin.
-        min_positive = 1e-3
-    adjusted_values = [value if value > 0 else min_positive / 2 for value in values]
+    positive = values[values > 0]
+    # All waiting times may be zero – fall back to plotting a single bin.
+    min_positive = float(positive.min()) if positive.size else 1e-3
+    adjusted_values = np.where(values > 0, values, min_positive / 2)
+
+    typical_cutoff = summary.p95 * scale
+    if typical_cutoff <= 0:
+        typical_cutoff = min_positive / 2
+    typical_mask = adjusted_values <= typical_cutoff
+    typical_values = adjusted_values[typical_mask]
+    tail_values = adjusted_values[~typical_mask]
+
+    typical = BinnedPanel.from_values(
+        typical_values if typical_values.size else adjusted_values, bin_count=bins
+    )
+    tail = None
+    if tail_values.size:
+        tail = BinnedPanel.from_values(tail_values, bin_count=max(1, bins // 2))
+
+    return HistogramData(
+        typical=typical,
+        tail=tail,
+        summary=summary,
+        use_seconds=use_seconds,
+        min_positive=min_positive,
+    )
 
-    if bins is None:
-        bins = freedman_diaconis_bins(adjusted_values)
 
-    bins = max(1, min(80, bins))
+def create_histogram(
+    records: Sequence[JobRecord] | FilteredJobs | JobTable,
+    *,
+    use_seconds: bool = False,
+    bins: int | None = None,
+    title: str = "",
+    summary: WaitSummary | None = None,
+) -> Figure:
+    """Render the two-panel waiting-time histogram.
 
-    sorted_values = sorted(adjusted_values)
-    typical_cutoff = _percentile(sorted_values, 0.95)
-    typical_values = [value for value in adjusted_values if value <= typical_cutoff]
-    tail_values = [value for value in adjusted_values if value > typical_cutoff]
+    ``summary`` supplies the statistics shown in the figure and the 95th
+    percentile split between both panels; it is computed exactly from
+    ``records`` when omitted.
+    """
 
-    typical_bins = _logspace_bins(typical_values or adjusted_values, bin_count=bins)
-    ax_typical.hist(
-        typical_values or adjusted_values,
-        bins=typical_bins,
-        color=LRZ_SKY_BLUE,
-        alpha=0.75,
-        edgecolor="none",
-    )
+    if not len(records):
+        raise ValueError("create_histogram requires at least one record")
+
+    data = bin_histogram(records, use_seconds=use_seconds, bins=bins, summary=summary)
+    return render_histogram(data, title=title)
+
+
+def render_histogram(data: HistogramData, *, title: str = "") -> Figure:
+    """Draw pre-binned histogram data; the cost depends only on the bin count."""
 
-    if tail_values:
-        tail_bins = _logspace_bins(tail_values, bin_count=max(1, bins // 2))
-        ax_tail.hist(
-            tail_values,
-            bins=tail_bins,
+    plt, ticker = _load_pyplot()
+
+    summary = data.summary
+    use_seconds = data.use_seconds
+    min_positive = data.min_positive
+    tail = data.tail
+
+    fig, (ax_typical, ax_tail) = plt.subplots(1, 2, figsize=(12, 5), sharey=True)
+
+    for ax, panel in ((ax_typical, data.typical), (ax_tail, tail)):
+        if panel is None:
+            ax.set_axis_off()
+            continue
+        ax.stairs(
+            panel.counts,
+            panel.edges,
+            fill=True,
             color=LRZ_SKY_BLUE,
             alpha=0.75,
-            edgecolor="none",
+            linewidth=0,
         )
-    else:
-        ax_tail.set_axis_off()
 
-    wait_seconds = [record.wait_seconds for record in records]
-    mean_seconds = mean(wait_seconds)
-    median_seconds = median(wait_seconds)
+    mean_seconds = summary.mean
+    median_seconds = summary.median
     mean_display = format_timedelta_hms(mean_seconds)
     if use_seconds:
         xlabel = "Waiting time [seconds]"
@@ -205,16 +334,12 @@ def create_histogram(
         label=f"Mean wait: {mean_display}",
     )
 
-    axes = [
-        (ax_typical, typical_values or adjusted_values),
-        (ax_tail, tail_values),
-    ]
     formatter = ticker.FuncFormatter(tick_formatter)
-    for ax, axis_values in axes:
-        if not ax.has_data() or not axis_values:
+    for ax, panel in ((ax_typical, data.typical), (ax_tail, tail)):
+        if panel is None:
             continue
         ax.set_xscale("log")
-        ticks = _nice_ticks(min(axis_values), max(axis_values), use_seconds=use_seconds)
+        ticks = _nice_ticks(panel.minimum, panel.maximum, use_seconds=use_seconds)
         if ticks:
             ax.xaxis.set_major_locator(ticker.FixedLocator(ticks))
         ax.xaxis.set_major_formatter(formatter)
@@ -230,7 +355,7 @@ def create_histogram(
         ax.margins(x=0.02)
 
     ax_typical.set_xlabel(xlabel, fontsize=13, color="#202020")
-    if tail_values:
+    if tail is not None:
         ax_tail.tick_params(labelleft=False)
         ax_tail.set_xlabel(xlabel, fontsize=13, color="#202020")
 
@@ -240,13 +365,13 @@ def create_histogram(
         fig.suptitle(title, fontsize=16, color="#202020", y=0.98)
 
     ax_typical.set_title("Typical waits (≤95th percentile)", fontsize=12, color="#202020")
-    if tail_values:
+    if tail is not None:
         ax_tail.set_title("Long tail (>95th percentile)", fontsize=12, color="#202020")
 
-    p95_seconds = _percentile(sorted(wait_seconds), 0.95)
-    max_seconds = max(wait_seconds)
+    p95_seconds = summary.p95
+    max_seconds = summary.maximum
     stats_lines = [
-        f"Jobs: {len(records)}",
+        f"Jobs: {summary.count}",
         f"Mean: {mean_display}",
         f"Median: {format_timedelta_hms(median_seconds)}",
         f"95th: {format_timedelta_hms(p95_seconds)}",
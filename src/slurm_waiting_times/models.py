@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import operator
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, tzinfo
+from typing import Callable, Iterable, Iterator, Sequence
+
+import numpy as np
 
 
 @dataclass(slots=True)
@@ -39,3 +43,365 @@ class JobRecord(SacctRow):
     wait_seconds: float
     job_type: str | None = None
     slurm_job_type: str | None = None
+
+
+class JobView:
+    """A filtered job: a reference to its :class:`SacctRow` plus derived fields.
+
+    Row fields are read through to ``row``, so a view stands in for a
+    :class:`JobRecord` without copying the row.
+    """
+
+    __slots__ = ("row", "wait_seconds", "job_type", "slurm_job_type")
+
+    def __init__(
+        self,
+        row: SacctRow,
+        wait_seconds: float,
+        job_type: str | None = None,
+        slurm_job_type: str | None = None,
+    ) -> None:
+        self.row = row
+        self.wait_seconds = wait_seconds
+        self.job_type = job_type
+        self.slurm_job_type = slurm_job_type
+
+    def __repr__(self) -> str:
+        return (
+            f"JobView(row={self.row!r}, wait_seconds={self.wait_seconds!r}, "
+            f"job_type={self.job_type!r}, slurm_job_type={self.slurm_job_type!r})"
+        )
+
+
+for _field in SacctRow.__dataclass_fields__:
+    setattr(JobView, _field, property(operator.attrgetter(f"row.{_field}")))
+del _field
+
+
+@dataclass(slots=True)
+class FilteredJobs:
+    """Rows kept by a filter, with their derived fields in parallel columns.
+
+    Only references to the original rows are held; :class:`JobView` objects
+    are created on access, one at a time while iterating.
+    """
+
+    rows: list[SacctRow]
+    wait_seconds: np.ndarray
+    job_type: list[str | None]
+    slurm_job_type: list[str | None]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index: int) -> JobView:
+        return JobView(
+            self.rows[index],
+            float(self.wait_seconds[index]),
+            self.job_type[index],
+            self.slurm_job_type[index],
+        )
+
+    def __iter__(self) -> Iterator[JobView]:
+        columns = zip(self.rows, self.wait_seconds.tolist(), self.job_type, self.slurm_job_type)
+        for row, wait_seconds, job_type, slurm_job_type in columns:
+            yield JobView(row, wait_seconds, job_type, slurm_job_type)
+
+    def take(self, indices: Sequence[int]) -> "FilteredJobs":
+        """Return the jobs at ``indices``."""
+
+        return FilteredJobs(
+            rows=[self.rows[index] for index in indices],
+            wait_seconds=self.wait_seconds[np.asarray(indices, dtype=np.intp)],
+            job_type=[self.job_type[index] for index in indices],
+            slurm_job_type=[self.slurm_job_type[index] for index in indices],
+        )
+
+
+# The fields of one sacct row in :class:`SacctRow` order, except that the
+# submit and start times are UTC epoch seconds rather than datetimes.
+SacctValues = tuple[
+    str,
+    str | None,
+    str | None,
+    str | None,
+    str,
+    int,
+    int,
+    str,
+    str,
+    int | None,
+    str | None,
+    float | None,
+]
+
+_MISSING_CODE = -1
+
+
+@dataclass(slots=True)
+class StringPool:
+    """Many short strings packed into one UTF-8 buffer plus offsets."""
+
+    data: bytes
+    offsets: np.ndarray
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> "StringPool":
+        encoded = [value.encode() for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        lengths = np.fromiter((len(value) for value in encoded), dtype=np.int64, count=len(encoded))
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(b"".join(encoded), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self.data[self.offsets[index] : self.offsets[index + 1]].decode()
+
+    def __iter__(self) -> Iterator[str]:
+        offsets = self.offsets.tolist()
+        data = self.data
+        for begin, end in zip(offsets, offsets[1:]):
+            yield data[begin:end].decode()
+
+    def take(self, indices: np.ndarray) -> "StringPool":
+        starts = self.offsets[:-1][indices]
+        lengths = self.offsets[1:][indices] - starts
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Gather the bytes of every selected string in one vectorised step.
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        buffer = np.frombuffer(self.data, dtype=np.uint8)
+        return StringPool(buffer[positions].tobytes(), offsets)
+
+
+@dataclass(slots=True)
+class Categorical:
+    """Low-cardinality string column stored as ``int32`` codes.
+
+    Code ``-1`` marks a missing value.
+    """
+
+    codes: np.ndarray
+    categories: tuple[str, ...]
+
+    @classmethod
+    def from_values(cls, values: Iterable[str | None]) -> "Categorical":
+        lookup: dict[str, int] = {}
+        codes = np.fromiter(
+            (
+                _MISSING_CODE if value is None else lookup.setdefault(value, len(lookup))
+                for value in values
+            ),
+            dtype=np.int32,
+        )
+        return cls(codes, tuple(lookup))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> str | None:
+        code = self.codes[index]
+        return None if code == _MISSING_CODE else self.categories[code]
+
+    def __iter__(self) -> Iterator[str | None]:
+        categories = self.categories
+        for code in self.codes.tolist():
+            yield None if code == _MISSING_CODE else categories[code]
+
+    def code_of(self, value: str) -> int | None:
+        try:
+            return self.categories.index(value)
+        except ValueError:
+            return None
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, categories: Sequence[str]) -> "Categorical":
+        return cls(np.asarray(codes, dtype=np.int32), tuple(categories))
+
+    def equals(self, value: str) -> np.ndarray:
+        """Return a boolean mask of the rows holding ``value``."""
+
+        code = self.code_of(value)
+        if code is None:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == code
+
+    def mask_where(self, predicate: Callable[[str], bool]) -> np.ndarray:
+        """Return a boolean mask of the rows whose value satisfies ``predicate``.
+
+        ``predicate`` runs once per distinct value; missing values never match.
+        """
+
+        lookup = np.array([predicate(value) for value in self.categories] + [False], dtype=bool)
+        # Code -1 indexes the trailing ``False`` entry.
+        return lookup[self.codes]
+
+    def take(self, indices: np.ndarray) -> "Categorical":
+        return Categorical(self.codes[indices], self.categories)
+
+
+def _as_node_array(values: Sequence[int | None] | np.ndarray) -> np.ndarray:
+    if isinstance(values, np.ndarray):
+        return values.astype(np.int32, copy=False)
+    return np.array([-1 if value is None else value for value in values], dtype=np.int32)
+
+
+def _as_elapsed_array(values: Sequence[float | None] | np.ndarray) -> np.ndarray:
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float32)
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float32)
+
+
+def _as_categorical(values: Sequence[str | None] | Categorical) -> Categorical:
+    if isinstance(values, Categorical):
+        return values
+    return Categorical.from_values(values)
+
+
+@dataclass(slots=True)
+class JobTable:
+    """Columnar counterpart of a list of :class:`JobRecord` objects.
+
+    Timestamps are UTC epoch seconds and are converted to ``tzinfo`` only when
+    rows are materialised.  Missing node counts are stored as ``-1`` and
+    missing elapsed times as ``NaN``.  Iterating over a table yields
+    :class:`JobRecord` objects one at a time, so code written for record
+    lists keeps working.  ``JobName`` and ``SubmitLine`` are not retained.
+    """
+
+    job_id: StringPool
+    job_id_raw: StringPool
+    user: Categorical
+    partition: Categorical
+    state: Categorical
+    alloc_tres: Categorical
+    job_type: Categorical
+    slurm_job_type: Categorical
+    submit_epoch: np.ndarray
+    start_epoch: np.ndarray
+    nodes: np.ndarray
+    elapsed_seconds: np.ndarray
+    wait_seconds: np.ndarray
+    is_step: np.ndarray
+    tzinfo: tzinfo
+
+    @classmethod
+    def from_columns(
+        cls,
+        *,
+        job_id: Sequence[str],
+        job_id_raw: Sequence[str],
+        user: Sequence[str],
+        partition: Sequence[str],
+        state: Sequence[str],
+        alloc_tres: Sequence[str | None] | Categorical,
+        job_type: Sequence[str | None] | Categorical,
+        slurm_job_type: Sequence[str | None] | Categorical,
+        submit_epoch: Sequence[int],
+        start_epoch: Sequence[int],
+        nodes: Sequence[int | None] | np.ndarray,
+        elapsed_seconds: Sequence[float | None] | np.ndarray,
+        tzinfo: tzinfo,
+    ) -> "JobTable":
+        submit = np.asarray(submit_epoch, dtype=np.int64)
+        start = np.asarray(start_epoch, dtype=np.int64)
+        return cls(
+            job_id=StringPool.from_strings(job_id),
+            job_id_raw=StringPool.from_strings(job_id_raw),
+            user=Categorical.from_values(user),
+            partition=Categorical.from_values(partition),
+            state=Categorical.from_values(state),
+            alloc_tres=_as_categorical(alloc_tres),
+            job_type=_as_categorical(job_type),
+            slurm_job_type=_as_categorical(slurm_job_type),
+            submit_epoch=submit,
+            start_epoch=start,
+            nodes=_as_node_array(nodes),
+            elapsed_seconds=_as_elapsed_array(elapsed_seconds),
+            wait_seconds=(start - submit).astype(np.float32),
+            is_step=np.array(["." in value for value in job_id], dtype=bool),
+            tzinfo=tzinfo,
+        )
+
+    def __len__(self) -> int:
+        return len(self.submit_epoch)
+
+    def __iter__(self) -> Iterator[JobRecord]:
+        for index in range(len(self)):
+            yield self.record(index)
+
+    def record(self, index: int) -> JobRecord:
+        """Materialise row ``index`` as a :class:`JobRecord`."""
+
+        nodes = int(self.nodes[index])
+        elapsed = float(self.elapsed_seconds[index])
+        return JobRecord(
+            job_id=self.job_id[index],
+            job_id_raw=self.job_id_raw[index],
+            job_name=None,
+            submit_line=None,
+            user=self.user[index],
+            submit_time=datetime.fromtimestamp(int(self.submit_epoch[index]), self.tzinfo),
+            start_time=datetime.fromtimestamp(int(self.start_epoch[index]), self.tzinfo),
+            state=self.state[index],
+            partition=self.partition[index],
+            nodes=None if nodes < 0 else nodes,
+            alloc_tres=self.alloc_tres[index],
+            elapsed_seconds=None if np.isnan(elapsed) else elapsed,
+            wait_seconds=float(self.wait_seconds[index]),
+            job_type=self.job_type[index],
+            slurm_job_type=self.slurm_job_type[index],
+        )
+
+    def take(self, indices: np.ndarray) -> "JobTable":
+        """Return a new table holding the rows at ``indices`` (or a boolean mask)."""
+
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        return JobTable(
+            job_id=self.job_id.take(indices),
+            job_id_raw=self.job_id_raw.take(indices),
+            user=self.user.take(indices),
+            partition=self.partition.take(indices),
+            state=self.state.take(indices),
+            alloc_tres=self.alloc_tres.take(indices),
+            job_type=self.job_type.take(indices),
+            slurm_job_type=self.slurm_job_type.take(indices),
+            submit_epoch=self.submit_epoch[indices],
+            start_epoch=self.start_epoch[indices],
+            nodes=self.nodes[indices],
+            elapsed_seconds=self.elapsed_seconds[indices],
+            wait_seconds=self.wait_seconds[indices],
+            is_step=self.is_step[indices],
+            tzinfo=self.tzinfo,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the column buffers."""
+
+        pools = (self.job_id, self.job_id_raw)
+        categoricals = (
+            self.user,
+            self.partition,
+            self.state,
+            self.alloc_tres,
+            self.job_type,
+            self.slurm_job_type,
+        )
+        arrays = (
+            self.submit_epoch,
+            self.start_epoch,
+            self.nodes,
+            self.elapsed_seconds,
+            self.wait_seconds,
+            self.is_step,
+        )
+        return (
+            sum(len(pool.data) + pool.offsets.nbytes for pool in pools)
+            + sum(column.codes.nbytes for column in categoricals)
+            + sum(array.nbytes for array in arrays)
+        )
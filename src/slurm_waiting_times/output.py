@@ -1,15 +1,28 @@
 from __future__ import annotations
 
 import csv
+import json
 import re
 from datetime import datetime
 from pathlib import Path
 from typing import Iterable, Sequence
 
-from .models import JobRecord
+from .aggregate import GroupSummary
+from .histogram import HistogramData
+from .models import FilteredJobs, JobRecord, JobTable
+from .time_utils import format_epochs
 
 _OUTPUT_DIR = Path("output")
 _SANITIZE_RE = re.compile(r"[^A-Za-z0-9,._=-]")
+GROUP_OUTPUT_FORMATS = ("csv", "json")
+_GROUP_KEY_HEADERS = {
+    "user": "User",
+    "partition": "Partition",
+    "job_type": "JobType",
+    "slurm_job_type": "SlurmJobType",
+    "state": "State",
+    "day": "Day",
+}
 
 
 def ensure_output_dir() -> Path:
@@ -43,7 +56,77 @@ def histogram_path(prefix: str) -> Path:
     return ensure_output_dir() / f"{prefix}-waiting-times.png"
 
 
-def write_results_csv(path: Path, records: Iterable[JobRecord]) -> None:
+def histogram_bins_path(prefix: str) -> Path:
+    return ensure_output_dir() / f"{prefix}-waiting-times-bins.csv"
+
+
+def groups_path(prefix: str, output_format: str) -> Path:
+    return ensure_output_dir() / f"{prefix}-waiting-times-groups.{output_format}"
+
+
+def write_group_summaries(
+    path: Path,
+    by: Sequence[str],
+    summaries: Iterable[GroupSummary],
+    *,
+    output_format: str = "csv",
+) -> None:
+    """Write one row (CSV) or object (JSON) per group with its wait statistics."""
+
+    if output_format not in GROUP_OUTPUT_FORMATS:
+        raise ValueError(f"Unknown group output format '{output_format}'")
+
+    if output_format == "json":
+        groups = [
+            {
+                **dict(zip(by, summary.key)),
+                "jobs": summary.count,
+                "wait_seconds": {
+                    "mean": summary.mean,
+                    "median": summary.median,
+                    "p90": summary.p90,
+                    "p95": summary.p95,
+                    "p99": summary.p99,
+                    "max": summary.maximum,
+                },
+            }
+            for summary in summaries
+        ]
+        path.write_text(json.dumps({"group_by": list(by), "groups": groups}, indent=2) + "\n")
+        return
+
+    with path.open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(
+            [_GROUP_KEY_HEADERS[key] for key in by]
+            + ["Jobs", "MeanSeconds", "MedianSeconds", "P90Seconds", "P95Seconds"]
+            + ["P99Seconds", "MaxSeconds"]
+        )
+        for summary in summaries:
+            statistics = (
+                summary.mean,
+                summary.median,
+                summary.p90,
+                summary.p95,
+                summary.p99,
+                summary.maximum,
+            )
+            writer.writerow(
+                [*summary.key, summary.count, *(f"{value:.2f}" for value in statistics)]
+            )
+
+
+def write_histogram_bins_csv(path: Path, data: HistogramData) -> None:
+    with path.open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Panel", "LowerSeconds", "UpperSeconds", "Jobs"])
+        for panel, lower, upper, count in data.bin_rows():
+            writer.writerow([panel, f"{lower:.2f}", f"{upper:.2f}", count])
+
+
+def write_results_csv(
+    path: Path, records: Iterable[JobRecord] | FilteredJobs | JobTable
+) -> None:
     with path.open("w", newline="") as handle:
         writer = csv.writer(handle)
         writer.writerow(
@@ -60,6 +143,9 @@ def write_results_csv(path: Path, records: Iterable[JobRecord]) -> None:
                 "WaitSeconds",
             ]
         )
+        if isinstance(records, JobTable):
+            writer.writerows(_table_csv_rows(records))
+            return
         for record in records:
             writer.writerow(
                 [
@@ -75,3 +161,33 @@ def write_results_csv(path: Path, records: Iterable[JobRecord]) -> None:
                     f"{record.wait_seconds:.2f}",
                 ]
             )
+
+
+def _table_csv_rows(table: JobTable) -> Iterable[list]:
+    """CSV rows of ``table``; timestamps are only converted to its zone here."""
+
+    columns = zip(
+        table.job_id,
+        table.user,
+        format_epochs(table.submit_epoch, table.tzinfo),
+        format_epochs(table.start_epoch, table.tzinfo),
+        table.state,
+        table.partition,
+        table.nodes.tolist(),
+        table.alloc_tres,
+        table.job_type,
+        table.wait_seconds.tolist(),
+    )
+    for job_id, user, submit, start, state, partition, nodes, tres, job_type, wait in columns:
+        yield [
+            job_id,
+            user,
+            submit,
+            start,
+            state,
+            partition,
+            "" if nodes < 0 else nodes,
+            tres or "",
+            job_type or "",
+            f"{wait:.2f}",
+        ]
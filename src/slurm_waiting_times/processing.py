@@ -1,21 +1,72 @@
 from __future__ import annotations
 
 import fnmatch
+import functools
+import itertools
+import math
+import os
 import re
-from collections import defaultdict
+from array import array
 from dataclasses import dataclass
-from typing import Iterable, List, Sequence
-
-from .models import JobRecord, SacctRow
-
+from datetime import timezone, tzinfo
+from typing import Any, Iterable, List, Sequence
+
+import numpy as np
+
+from .models import (
+    Categorical,
+    FilteredJobs,
+    JobRecord,
+    JobTable,
+    SacctRow,
+    SacctValues,
+)
+from .time_utils import parse_duration_to_seconds
+
+
+class PatternMatcher:
+    """Match values against shell-style patterns compiled once up front.
+
+    Patterns without wildcards become a set lookup, the remaining ones are
+    merged into a single regular expression, and the outcome is cached per
+    value.  Matching follows :func:`fnmatch.fnmatch`, including its
+    ``os.path.normcase`` normalisation.
+    """
+
+    def __init__(self, patterns: Sequence[str]) -> None:
+        normalised = [os.path.normcase(pattern) for pattern in patterns]
+        self._literals = frozenset(
+            pattern for pattern in normalised if not any(ch in pattern for ch in "*?[")
+        )
+        wildcards = [pattern for pattern in normalised if pattern not in self._literals]
+        self._regex = (
+            re.compile("|".join(fnmatch.translate(pattern) for pattern in wildcards))
+            if wildcards
+            else None
+        )
+        self._results: dict[str, bool] = {}
 
-def _matches(value: str, patterns: Sequence[str]) -> bool:
-    return any(fnmatch.fnmatch(value, pattern) for pattern in patterns)
+    def __call__(self, value: str) -> bool:
+        try:
+            return self._results[value]
+        except KeyError:
+            pass
+        normalised = os.path.normcase(value)
+        result = normalised in self._literals or (
+            self._regex is not None and self._regex.match(normalised) is not None
+        )
+        self._results[value] = result
+        return result
 
 
 _GPU_PATTERN = re.compile(r"gpu(?::[^,()]+)*:(\d+)", flags=re.IGNORECASE)
 
+# Clusters only have a few hundred distinct AllocTRES strings, so job typing
+# is memoised per distinct input instead of being recomputed for every row.
+JOB_TYPE_CACHE_SIZE = 4096
 
+
+@functools.lru_cache(maxsize=JOB_TYPE_CACHE_SIZE)
 def _count_gpus(alloc_tres: str | None) -> int:
     if not alloc_tres:
         return 0
@@ -78,11 +129,70 @@ class RuntimeConstraint:
         return True
 
 
-def determine_job_type(row: SacctRow) -> str | None:
-    """Infer the job type from sacct metadata."""
+_RUNTIME_RANGE_PATTERN = re.compile(
+    r"^(?P<start>(?:\d+-)?\d+:[0-5]?\d:[0-5]?\d)-(?P<end>(?:\d+-)?\d+:[0-5]?\d:[0-5]?\d)$"
+)
+
+
+def parse_runtime_constraint(value: str) -> RuntimeConstraint:
+    """Parse a runtime filter such as ``<01:00:00``, ``longer:00:10:00`` or a range.
+
+    Raises :class:`ValueError` for malformed values.
+    """
+
+    raw = value.strip()
+    if not raw:
+        raise ValueError("empty runtime filter")
+    lowered = raw.lower()
+
+    if lowered.startswith("shorter:") or lowered.startswith("longer:"):
+        _, _, duration = raw.partition(":")
+        if not duration:
+            raise ValueError("missing duration")
+        seconds = parse_duration_to_seconds(duration)
+        if lowered.startswith("shorter:"):
+            return RuntimeConstraint(max_seconds=seconds, max_inclusive=False)
+        return RuntimeConstraint(min_seconds=seconds, min_inclusive=False)
+
+    range_match = _RUNTIME_RANGE_PATTERN.match(raw)
+    if range_match:
+        start_seconds = parse_duration_to_seconds(range_match.group("start"))
+        end_seconds = parse_duration_to_seconds(range_match.group("end"))
+        if start_seconds > end_seconds:
+            raise ValueError("range start exceeds end")
+        return RuntimeConstraint(
+            min_seconds=start_seconds,
+            max_seconds=end_seconds,
+            min_inclusive=True,
+            max_inclusive=True,
+        )
+
+    for prefix, inclusive in (("<=", True), (">=", True), ("<", False), (">", False), ("=", True)):
+        if raw.startswith(prefix):
+            seconds = parse_duration_to_seconds(raw[len(prefix) :].strip())
+            if prefix.startswith("<"):
+                return RuntimeConstraint(max_seconds=seconds, max_inclusive=inclusive)
+            if prefix.startswith(">"):
+                return RuntimeConstraint(min_seconds=seconds, min_inclusive=inclusive)
+            return RuntimeConstraint(
+                min_seconds=seconds,
+                max_seconds=seconds,
+                min_inclusive=True,
+                max_inclusive=True,
+            )
+
+    seconds = parse_duration_to_seconds(raw)
+    return RuntimeConstraint(
+        min_seconds=seconds,
+        max_seconds=seconds,
+        min_inclusive=True,
+        max_inclusive=True,
+    )
 
-    nodes = row.nodes
-    gpu_count = _count_gpus(row.alloc_tres)
+
+@functools.lru_cache(maxsize=JOB_TYPE_CACHE_SIZE)
+def _job_type_for(nodes: int | None, alloc_tres: str | None) -> str | None:
+    gpu_count = _count_gpus(alloc_tres)
 
     if nodes is not None and nodes > 1:
         return "multi-node"
@@ -99,42 +209,275 @@ def determine_job_type(row: SacctRow) -> str | None:
     return None
 
 
-def _infer_slurm_job_types(rows: Sequence[SacctRow]) -> dict[str, str | None]:
-    groups: dict[str, list[SacctRow]] = defaultdict(list)
-    for row in rows:
-        key = row.job_id_raw or row.job_id.split(".", 1)[0]
-        groups[key].append(row)
+def determine_job_type(row: SacctRow) -> str | None:
+    """Infer the job type from sacct metadata."""
 
-    slurm_types: dict[str, str | None] = {}
-    for key, group_rows in groups.items():
-        job_ids = [entry.job_id for entry in group_rows]
-        submit_lines = [entry.submit_line for entry in group_rows if entry.submit_line]
+    return _job_type_for(row.nodes, row.alloc_tres)
 
-        if any(job_id.endswith(".batch") for job_id in job_ids):
-            slurm_types[key] = "batch"
-            continue
 
-        step_ids = [job_id for job_id in job_ids if "." in job_id]
-        if step_ids:
-            slurm_types[key] = "interactive"
-            continue
+def job_type_cache_info() -> dict[str, Any]:
+    """Return hit/miss statistics of the job typing caches."""
 
-        lowered_submit_lines = [line.strip().lower() for line in submit_lines if line.strip()]
-        if any(line.startswith("sbatch") for line in lowered_submit_lines):
-            slurm_types[key] = "batch"
-            continue
+    return {
+        "count_gpus": _count_gpus.cache_info(),
+        "job_type": _job_type_for.cache_info(),
+    }
 
-        if any(line.startswith(("salloc", "srun")) for line in lowered_submit_lines):
-            slurm_types[key] = "interactive"
-            continue
 
-        slurm_types[key] = None
+def clear_job_type_caches() -> None:
+    _count_gpus.cache_clear()
+    _job_type_for.cache_clear()
+
+
+_JOB_TYPES = ("multi-node", "cpu-only", "1-gpu", "single-node")
+JOB_TYPE_CHOICES = ("cpu-only", "1-gpu", "single-node", "multi-node")
+SLURM_JOB_TYPE_CHOICES = ("batch", "interactive")
+
+
+def _job_type_column(alloc_tres: Categorical, nodes: np.ndarray) -> Categorical:
+    """Vectorised :func:`determine_job_type` over a whole table.
+
+    GPUs are counted once per distinct ``AllocTRES`` string; ``nodes`` uses
+    ``-1`` for unknown node counts.
+    """
+
+    gpu_lookup = np.array(
+        [_count_gpus(value) for value in alloc_tres.categories] + [0],
+        dtype=np.int64,
+    )
+    gpus = gpu_lookup[alloc_tres.codes]
+    codes = np.select(
+        [nodes > 1, gpus == 0, gpus == 1, (nodes == 1) | (nodes < 0)],
+        [0, 1, 2, 3],
+        default=-1,
+    )
+    return Categorical.from_codes(codes, _JOB_TYPES)
+
+
+def _group_key(row: SacctRow) -> str:
+    return row.job_id_raw or row.job_id.split(".", 1)[0]
+
+
+_SEEN_BATCH_STEP = 1
+_SEEN_STEP = 2
+_SBATCH_SUBMIT = 4
+_INTERACTIVE_SUBMIT = 8
+
+
+class SlurmJobTypeClassifier:
+    """Infer batch/interactive submissions in a single pass over sacct rows.
+
+    Only a small bit set is kept per ``JobIDRaw``: whether a ``.batch`` step
+    or any other step was seen and which command submitted the job.  Call
+    :meth:`observe` for every row, including steps, and :meth:`resolve`
+    once all rows of a job have been seen.
+    """
 
-    return slurm_types
+    def __init__(self) -> None:
+        self._flags: dict[str, int] = {}
+
+    def observe(self, row: SacctRow) -> None:
+        self.observe_values(_group_key(row), row.job_id, row.submit_line)
+
+    def observe_values(self, key: str, job_id: str, submit_line: str | None) -> None:
+        """Like :meth:`observe` for a row given as its group key, JobID and SubmitLine."""
+
+        flags = self._flags.get(key, 0)
+
+        if job_id.endswith(".batch"):
+            flags |= _SEEN_BATCH_STEP
+        elif "." in job_id:
+            flags |= _SEEN_STEP
+
+        if submit_line:
+            line = submit_line.strip().lower()
+            if line.startswith("sbatch"):
+                flags |= _SBATCH_SUBMIT
+            elif line.startswith(("salloc", "srun")):
+                flags |= _INTERACTIVE_SUBMIT
+
+        self._flags[key] = flags
+
+    def resolve(self, key: str) -> str | None:
+        flags = self._flags.get(key, 0)
+        if flags & _SEEN_BATCH_STEP:
+            return "batch"
+        if flags & _SEEN_STEP:
+            return "interactive"
+        if flags & _SBATCH_SUBMIT:
+            return "batch"
+        if flags & _INTERACTIVE_SUBMIT:
+            return "interactive"
+        return None
+
+
+def wait_values(records: Sequence[JobRecord] | FilteredJobs | JobTable) -> list[float]:
+    """Return the waiting times of ``records`` in seconds."""
+
+    if isinstance(records, (FilteredJobs, JobTable)):
+        return records.wait_seconds.astype(np.float64).tolist()
+    return [record.wait_seconds for record in records]
+
+
+def build_job_table(rows: Iterable[SacctRow], *, tzinfo: tzinfo | None = None) -> JobTable:
+    """Convert sacct rows into a :class:`JobTable` with derived job types.
+
+    The table keeps every row, including steps, so that filtering it yields
+    the same jobs as :func:`filter_rows` on the original rows.  ``tzinfo``
+    defaults to the zone of the first row's timestamps.
+    """
+
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return build_epoch_table((), tzinfo=tzinfo or timezone.utc)
+    if tzinfo is None:
+        tzinfo = first.submit_time.tzinfo
+    values = (
+        (
+            row.job_id,
+            row.job_id_raw,
+            row.job_name,
+            row.submit_line,
+            row.user,
+            int(row.submit_time.timestamp()),
+            int(row.start_time.timestamp()),
+            row.state,
+            row.partition,
+            row.nodes,
+            row.alloc_tres,
+            row.elapsed_seconds,
+        )
+        for row in itertools.chain([first], rows)
+    )
+    return build_epoch_table(values, tzinfo=tzinfo or timezone.utc)
+
+
+def build_epoch_table(values: Iterable[SacctValues], *, tzinfo: tzinfo) -> JobTable:
+    """Build a :class:`JobTable` from row values with epoch-second timestamps.
+
+    This is the datetime-free path used by
+    :func:`~slurm_waiting_times.sacct.parse_sacct_table`; ``tzinfo`` is only
+    kept for presenting the rows.
+    """
+
+    classifier = SlurmJobTypeClassifier()
+    job_ids: list[str] = []
+    job_ids_raw: list[str] = []
+    users: list[str] = []
+    partitions: list[str] = []
+    states: list[str] = []
+    alloc_tres_values: list[str | None] = []
+    # Numeric columns are collected in compact ``array`` buffers.
+    submit_epochs = array("q")
+    start_epochs = array("q")
+    nodes_values = array("i")
+    elapsed_values = array("d")
+
+    for (
+        job_id,
+        job_id_raw,
+        _job_name,
+        submit_line,
+        user,
+        submit_epoch,
+        start_epoch,
+        state,
+        partition,
+        nodes,
+        alloc_tres,
+        elapsed_seconds,
+    ) in values:
+        key = job_id_raw or job_id.split(".", 1)[0]
+        classifier.observe_values(key, job_id, submit_line)
+        job_ids.append(job_id)
+        job_ids_raw.append(key)
+        users.append(user)
+        partitions.append(partition)
+        states.append(state)
+        alloc_tres_values.append(alloc_tres)
+        submit_epochs.append(submit_epoch)
+        start_epochs.append(start_epoch)
+        nodes_values.append(-1 if nodes is None else nodes)
+        elapsed_values.append(math.nan if elapsed_seconds is None else elapsed_seconds)
+
+    alloc_tres_column = Categorical.from_values(alloc_tres_values)
+    nodes_column = np.frombuffer(nodes_values, dtype=np.int32)
+    return JobTable.from_columns(
+        job_id=job_ids,
+        job_id_raw=job_ids_raw,
+        user=users,
+        partition=partitions,
+        state=states,
+        alloc_tres=alloc_tres_column,
+        job_type=_job_type_column(alloc_tres_column, nodes_column),
+        slurm_job_type=[classifier.resolve(key) for key in job_ids_raw],
+        submit_epoch=np.frombuffer(submit_epochs, dtype=np.int64),
+        start_epoch=np.frombuffer(start_epochs, dtype=np.int64),
+        nodes=nodes_column,
+        elapsed_seconds=np.frombuffer(elapsed_values, dtype=np.float64),
+        tzinfo=tzinfo,
+    )
+
+
+def filter_table(
+    table: JobTable,
+    *,
+    include_steps: bool = False,
+    user_filters: Sequence[str] | None = None,
+    partition_filters: Sequence[str] | None = None,
+    job_type: str | None = None,
+    slurm_job_type: str | None = None,
+    max_wait_hours: float | None = None,
+    runtime_filters: Sequence[RuntimeConstraint] | None = None,
+) -> JobTable:
+    """Columnar equivalent of :func:`filter_rows`.
+
+    Every predicate becomes a boolean mask over the whole table.  Pattern
+    matches are evaluated once per distinct user or partition and broadcast
+    through the categorical codes.
+    """
+
+    keep = np.ones(len(table), dtype=bool)
+
+    if not include_steps:
+        keep &= ~table.is_step
+
+    if user_filters:
+        keep &= table.user.mask_where(PatternMatcher(user_filters))
+
+    if partition_filters:
+        keep &= table.partition.mask_where(PatternMatcher(partition_filters))
+
+    if job_type:
+        keep &= table.job_type.equals(job_type)
+
+    if slurm_job_type:
+        keep &= table.slurm_job_type.equals(slurm_job_type)
+
+    if max_wait_hours is not None:
+        keep &= table.wait_seconds <= max_wait_hours * 3600
+
+    if runtime_filters:
+        elapsed = table.elapsed_seconds
+        keep &= ~np.isnan(elapsed)
+        for constraint in runtime_filters:
+            if constraint.min_seconds is not None:
+                if constraint.min_inclusive:
+                    keep &= elapsed >= constraint.min_seconds
+                else:
+                    keep &= elapsed > constraint.min_seconds
+            if constraint.max_seconds is not None:
+                if constraint.max_inclusive:
+                    keep &= elapsed <= constraint.max_seconds
+                else:
+                    keep &= elapsed < constraint.max_seconds
+
+    return table.take(keep)
 
 
 def filter_rows(
-    rows: Iterable[SacctRow],
+    rows: Iterable[SacctRow] | JobTable,
     *,
     include_steps: bool = False,
     user_filters: Sequence[str] | None = None,
@@ -143,34 +486,58 @@ def filter_rows(
     slurm_job_type: str | None = None,
     max_wait_hours: float | None = None,
     runtime_filters: Sequence[RuntimeConstraint] | None = None,
-) -> List[JobRecord]:
-    rows_sequence = list(rows)
-    slurm_types = _infer_slurm_job_types(rows_sequence)
+) -> FilteredJobs | JobTable:
+    """Keep the jobs matching all filters, with their waiting times and job types.
+
+    A :class:`JobTable` is filtered column-wise by :func:`filter_table`.
+    Other rows are filtered in one pass into :class:`FilteredJobs`, which
+    references the kept rows instead of copying them.
+    """
+
+    if isinstance(rows, JobTable):
+        return filter_table(
+            rows,
+            include_steps=include_steps,
+            user_filters=user_filters,
+            partition_filters=partition_filters,
+            job_type=job_type,
+            slurm_job_type=slurm_job_type,
+            max_wait_hours=max_wait_hours,
+            runtime_filters=runtime_filters,
+        )
 
-    filtered: List[JobRecord] = []
+    # Rows are consumed in a single pass.  The Slurm job type of a job is only
+    # known once all of its steps have been seen, so that filter is applied to
+    # the surviving rows afterwards.  Kept rows are referenced, not copied;
+    # their derived fields go into parallel columns.
+    classifier = SlurmJobTypeClassifier()
+    kept: List[SacctRow] = []
+    wait_column = array("d")
+    job_types: List[str | None] = []
     wait_cap = None if max_wait_hours is None else max_wait_hours * 3600
+    user_matcher = PatternMatcher(user_filters) if user_filters else None
+    partition_matcher = PatternMatcher(partition_filters) if partition_filters else None
+
+    for row in rows:
+        classifier.observe(row)
 
-    for row in rows_sequence:
         if not include_steps and "." in row.job_id:
             continue
 
-        if user_filters and not _matches(row.user, user_filters):
+        if user_matcher and not user_matcher(row.user):
             continue
 
-        if partition_filters and not _matches(row.partition, partition_filters):
+        if partition_matcher and not partition_matcher(row.partition):
             continue
 
-        wait_seconds = (row.start_time - row.submit_time).total_seconds()
+        # Subtracting aware datetimes of one zone ignores DST changes in between.
+        wait_seconds = row.start_time.timestamp() - row.submit_time.timestamp()
 
         row_job_type = determine_job_type(row)
-        row_slurm_job_type = slurm_types.get(row.job_id_raw or row.job_id.split(".", 1)[0])
 
         if job_type and row_job_type != job_type:
             continue
 
-        if slurm_job_type and row_slurm_job_type != slurm_job_type:
-            continue
-
         if wait_cap is not None and wait_seconds > wait_cap:
             continue
 
@@ -180,24 +547,24 @@ def filter_rows(
             if not all(constraint.matches(row.elapsed_seconds) for constraint in runtime_filters):
                 continue
 
-        filtered.append(
-            JobRecord(
-                job_id=row.job_id,
-                job_id_raw=row.job_id_raw,
-                job_name=row.job_name,
-                submit_line=row.submit_line,
-                user=row.user,
-                submit_time=row.submit_time,
-                start_time=row.start_time,
-                state=row.state,
-                partition=row.partition,
-                nodes=row.nodes,
-                alloc_tres=row.alloc_tres,
-                elapsed_seconds=row.elapsed_seconds,
-                wait_seconds=wait_seconds,
-                job_type=row_job_type,
-                slurm_job_type=row_slurm_job_type,
-            )
+        kept.append(row)
+        wait_column.append(wait_seconds)
+        job_types.append(row_job_type)
+
+    filtered = FilteredJobs(
+        rows=kept,
+        wait_seconds=np.frombuffer(wait_column, dtype=np.float64),
+        job_type=job_types,
+        slurm_job_type=[classifier.resolve(_group_key(row)) for row in kept],
+    )
+
+    if slurm_job_type:
+        filtered = filtered.take(
+            [
+                index
+                for index, value in enumerate(filtered.slurm_job_type)
+                if value == slurm_job_type
+            ]
         )
 
     return filtered
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence
+
+from .histogram import HistogramData, _load_pyplot, render_histogram
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class RenderJob:
+    """A figure to draw: pre-binned histogram data, its title and target file."""
+
+    data: HistogramData
+    title: str
+    path: Path
+
+
+@dataclass(frozen=True, slots=True)
+class RenderResult:
+    path: Path
+    seconds: float
+
+
+def render_figure(job: RenderJob) -> RenderResult:
+    """Render ``job`` with the Agg backend and save it to ``job.path``."""
+
+    started = time.perf_counter()
+    fig = render_histogram(job.data, title=job.title)
+    fig.savefig(job.path)
+    fig.clf()
+    plt, _ = _load_pyplot()
+    plt.close(fig)
+    return RenderResult(path=job.path, seconds=time.perf_counter() - started)
+
+
+def render_figures(
+    jobs: Sequence[RenderJob],
+    *,
+    workers: int = 1,
+    executor_factory: Callable[[int], Executor] = ProcessPoolExecutor,
+) -> list[RenderResult]:
+    """Render every job, in a pool of ``workers`` processes when above one.
+
+    Only the pre-binned :class:`HistogramData` is sent to the workers, so
+    the cost of shipping a job does not depend on the number of jobs it
+    summarises.  Results are returned in the order of ``jobs``.
+    """
+
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    started = time.perf_counter()
+    if workers == 1 or len(jobs) <= 1:
+        results = [render_figure(job) for job in jobs]
+    else:
+        with executor_factory(min(workers, len(jobs))) as executor:
+            results = list(executor.map(render_figure, jobs))
+
+    for result in results:
+        LOGGER.info("Rendered %s in %.2f s", result.path.name, result.seconds)
+    if len(results) > 1:
+        LOGGER.info(
+            "Rendered %d figure(s) in %.2f s with %d worker(s)",
+            len(results),
+            time.perf_counter() - started,
+            min(workers, len(results)),
+        )
+    return results
@@ -1,12 +1,24 @@
 from __future__ import annotations
 
+import itertools
 import logging
 import subprocess
-from datetime import datetime
-from typing import Iterable, List, Sequence
-
-from .models import SacctRow
-from .time_utils import ensure_timezone, parse_datetime, parse_duration_to_seconds
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
+from zoneinfo import ZoneInfo
+
+from .models import JobTable, SacctRow
+from .processing import build_epoch_table
+from .sacct_json import iter_sacct_json_values
+from .time_utils import (
+    ensure_timezone,
+    parse_duration_to_seconds,
+    parse_epoch_seconds,
+    parse_sacct_timestamp,
+    split_window,
+)
 
 LOGGER = logging.getLogger(__name__)
 
@@ -14,6 +26,8 @@ LOGGER = logging.getLogger(__name__)
 SACCT_FORMAT = (
     "JobID,JobIDRaw,JobName,SubmitLine,User,Submit,Start,State,Partition,NNodes,AllocTRES,Elapsed"
 )
+SACCT_FIELD_COUNT = SACCT_FORMAT.count(",") + 1
+SACCT_OUTPUT_FORMATS = ("text", "json")
 INVALID_START_VALUES = {"unknown", "none", "", "n/a", "invalid"}
 EMPTY_FIELD_VALUES = {"", "none", "n/a", "unknown", "(null)"}
 
@@ -29,17 +43,24 @@ def build_sacct_command(
     users: Sequence[str] | None = None,
     partitions: Sequence[str] | None = None,
     include_steps: bool = False,
+    output_format: str = "text",
 ) -> List[str]:
-    command = [
-        "sacct",
-        "--parsable2",
-        "--noheader",
-        f"--format={SACCT_FORMAT}",
-        "-S",
-        start.strftime("%Y-%m-%dT%H:%M:%S"),
-        "-E",
-        end.strftime("%Y-%m-%dT%H:%M:%S"),
-    ]
+    if output_format not in SACCT_OUTPUT_FORMATS:
+        raise ValueError(f"Unknown sacct output format '{output_format}'")
+
+    # ``--json`` always reports the full job record, so ``--format`` does not apply.
+    if output_format == "json":
+        command = ["sacct", "--json"]
+    else:
+        command = ["sacct", "--parsable2", "--noheader", f"--format={SACCT_FORMAT}"]
+    command.extend(
+        [
+            "-S",
+            start.strftime("%Y-%m-%dT%H:%M:%S"),
+            "-E",
+            end.strftime("%Y-%m-%dT%H:%M:%S"),
+        ]
+    )
 
     if users:
         command.extend(["--user", ",".join(users)])
@@ -73,109 +94,316 @@ def run_sacct(command: Sequence[str]) -> str:
     return result.stdout
 
 
-def parse_sacct_output(
-    output: str,
-    *,
-    timezone: str | None = None,
-) -> List[SacctRow]:
-    tzinfo = ensure_timezone(timezone)
-    rows: List[SacctRow] = []
-    pending_lines: List[str] = []
+def stream_sacct(command: Sequence[str]) -> Iterator[str]:
+    """Yield the lines written by ``sacct`` while the command is still running.
 
-    def process_parts(parts: Sequence[str]) -> None:
-        (
-            job_id,
-            job_id_raw,
-            job_name,
-            submit_line,
-            user,
-            submit,
-            start,
-            state,
-            partition,
-            raw_nodes,
-            alloc_tres,
-            elapsed,
-        ) = parts
-
-        if start.strip().lower() in INVALID_START_VALUES:
-            LOGGER.debug("Dropping job %s due to invalid start value '%s'", job_id, start)
-            return
+    Unlike :func:`run_sacct` the output is never held in memory as a whole, so
+    large queries only cost as much as the consumer keeps around.  Standard
+    error is spooled to a temporary file to avoid blocking the child process
+    and is used for the error message when ``sacct`` fails.
+    """
+
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            process = subprocess.Popen(
+                list(command),
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                text=True,
+            )
+        except FileNotFoundError as exc:  # pragma: no cover - environment dependent
+            raise SacctError("sacct command not found") from exc
+
+        with process:
+            assert process.stdout is not None
+            for line in process.stdout:
+                yield line.rstrip("\n")
+            returncode = process.wait()
+
+        if returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode(errors="replace").strip()
+            raise SacctError(f"sacct returned non-zero exit code {returncode}: {message}")
+
+
+def _row_values(
+    parts: Sequence[str],
+    tzinfo: ZoneInfo,
+    parse_time: Callable[[str, ZoneInfo], Any],
+    strings: dict[str, str],
+) -> tuple | None:
+    """Normalise the fields of one row; times are converted with ``parse_time``.
+
+    User, state, partition and AllocTRES values are looked up in ``strings``
+    so that every row with the same value shares one string object.
+    """
+
+    (
+        job_id,
+        job_id_raw,
+        job_name,
+        submit_line,
+        user,
+        submit,
+        start,
+        state,
+        partition,
+        raw_nodes,
+        alloc_tres,
+        elapsed,
+    ) = parts
+
+    if start.strip().lower() in INVALID_START_VALUES:
+        LOGGER.debug("Dropping job %s due to invalid start value '%s'", job_id, start)
+        return None
 
+    try:
+        submit_time = parse_time(submit, tzinfo)
+        start_time = parse_time(start, tzinfo)
+    except ValueError as exc:
+        LOGGER.warning("Skipping job %s because of timestamp error: %s", job_id, exc)
+        return None
+
+    nodes = None
+    raw_nodes_stripped = raw_nodes.strip()
+    if raw_nodes_stripped and raw_nodes_stripped.lower() not in EMPTY_FIELD_VALUES:
+        try:
+            nodes = int(raw_nodes_stripped)
+        except ValueError:
+            LOGGER.debug("Unable to parse node count '%s' for job %s", raw_nodes, job_id)
+
+    alloc_tres_value = alloc_tres.strip() or None
+    if alloc_tres_value and alloc_tres_value.lower() in EMPTY_FIELD_VALUES:
+        alloc_tres_value = None
+    elif alloc_tres_value:
+        alloc_tres_value = strings.setdefault(alloc_tres_value, alloc_tres_value)
+
+    elapsed_seconds = None
+    elapsed_value = elapsed.strip()
+    if elapsed_value and elapsed_value.lower() not in EMPTY_FIELD_VALUES:
         try:
-            submit_dt = parse_datetime(submit, tzinfo)
-            start_dt = parse_datetime(start, tzinfo)
-        except ValueError as exc:
-            LOGGER.warning("Skipping job %s because of timestamp error: %s", job_id, exc)
+            elapsed_seconds = parse_duration_to_seconds(elapsed_value)
+        except ValueError:
+            LOGGER.debug("Unable to parse elapsed '%s' for job %s", elapsed, job_id)
+
+    job_id_raw_value = job_id_raw.strip() or None
+    if not job_id_raw_value:
+        job_id_raw_value = job_id.split(".", 1)[0]
+
+    job_name_value = job_name.strip() or None
+    if job_name_value and job_name_value.lower() in EMPTY_FIELD_VALUES:
+        job_name_value = None
+
+    submit_line_value = submit_line.strip() or None
+    if submit_line_value and submit_line_value.lower() in EMPTY_FIELD_VALUES:
+        submit_line_value = None
+
+    return (
+        job_id,
+        job_id_raw_value,
+        job_name_value,
+        submit_line_value,
+        strings.setdefault(user, user),
+        submit_time,
+        start_time,
+        strings.setdefault(state, state),
+        strings.setdefault(partition, partition),
+        nodes,
+        alloc_tres_value,
+        elapsed_seconds,
+    )
+
+
+def _iter_values(
+    lines: Iterable[str],
+    tzinfo: ZoneInfo,
+    *,
+    epochs: bool,
+) -> Iterator[tuple]:
+    """Row values of ``sacct`` output in either format.
+
+    Times are UTC epoch seconds when ``epochs`` is set and aware datetimes
+    in ``tzinfo`` otherwise.
+    """
+
+    lines = iter(lines)
+    for first_line in lines:
+        if first_line.strip():
+            break
+    else:
+        return
+
+    lines = itertools.chain([first_line], lines)
+    if not first_line.lstrip().startswith("{"):
+        parse_time = parse_epoch_seconds if epochs else parse_sacct_timestamp
+        yield from _iter_parsable_values(lines, tzinfo, parse_time)
+        return
+
+    try:
+        if epochs:
+            yield from iter_sacct_json_values(lines)
             return
+        for values in iter_sacct_json_values(lines):
+            submit = datetime.fromtimestamp(values[5], tzinfo)
+            start = datetime.fromtimestamp(values[6], tzinfo)
+            yield (*values[:5], submit, start, *values[7:])
+    except (KeyError, ValueError) as exc:
+        raise SacctError(f"Malformed sacct JSON output: {exc}") from exc
 
-        nodes = None
-        raw_nodes_stripped = raw_nodes.strip()
-        if raw_nodes_stripped and raw_nodes_stripped.lower() not in EMPTY_FIELD_VALUES:
-            try:
-                nodes = int(raw_nodes_stripped)
-            except ValueError:
-                LOGGER.debug("Unable to parse node count '%s' for job %s", raw_nodes, job_id)
-
-        alloc_tres_value = alloc_tres.strip() or None
-        if alloc_tres_value and alloc_tres_value.lower() in EMPTY_FIELD_VALUES:
-            alloc_tres_value = None
-
-        elapsed_seconds = None
-        elapsed_value = elapsed.strip()
-        if elapsed_value and elapsed_value.lower() not in EMPTY_FIELD_VALUES:
-            try:
-                elapsed_seconds = parse_duration_to_seconds(elapsed_value)
-            except ValueError:
-                LOGGER.debug("Unable to parse elapsed '%s' for job %s", elapsed, job_id)
-
-        job_id_raw_value = job_id_raw.strip() or None
-        if not job_id_raw_value:
-            job_id_raw_value = job_id.split(".", 1)[0]
-
-        job_name_value = job_name.strip() or None
-        if job_name_value and job_name_value.lower() in EMPTY_FIELD_VALUES:
-            job_name_value = None
-
-        submit_line_value = submit_line.strip() or None
-        if submit_line_value and submit_line_value.lower() in EMPTY_FIELD_VALUES:
-            submit_line_value = None
-
-        rows.append(
-            SacctRow(
-                job_id=job_id,
-                job_id_raw=job_id_raw_value,
-                job_name=job_name_value,
-                submit_line=submit_line_value,
-                user=user,
-                submit_time=submit_dt,
-                start_time=start_dt,
-                state=state,
-                partition=partition,
-                nodes=nodes,
-                alloc_tres=alloc_tres_value,
-                elapsed_seconds=elapsed_seconds,
-            )
-        )
 
-    for raw_line in output.splitlines():
+def iter_sacct_rows(
+    lines: Iterable[str],
+    *,
+    timezone: str | None = None,
+) -> Iterator[SacctRow]:
+    """Lazily parse ``sacct`` output lines into :class:`SacctRow` objects.
+
+    ``lines`` may be any iterable, including the generator returned by
+    :func:`stream_sacct`, so rows are produced while ``sacct`` is running.
+    Output starting with ``{`` is ``sacct --json`` and is decoded
+    incrementally; anything else is read as ``--parsable2`` rows.
+    """
+
+    for values in _iter_values(lines, ensure_timezone(timezone), epochs=False):
+        yield SacctRow(*values)
+
+
+def _iter_parsable_values(
+    lines: Iterable[str],
+    tzinfo: ZoneInfo,
+    parse_time: Callable[[str, ZoneInfo], Any],
+) -> Iterator[tuple]:
+    separators = SACCT_FIELD_COUNT - 1
+    pending_lines: List[str] = []
+    pending_separators = 0
+    # Low-cardinality values are shared between rows for the duration of one parse.
+    strings: dict[str, str] = {}
+
+    for raw_line in lines:
         if not pending_lines and not raw_line.strip():
             continue
 
+        # Values such as SubmitLine may contain newlines, so a row is complete
+        # only once all field separators have been seen.  Counting them per
+        # physical line keeps long continuation runs linear.
         pending_lines.append(raw_line)
-        raw_row = "\n".join(pending_lines)
-        parts = raw_row.split("|", 11)
-        if len(parts) < 12:
-            continue
-        if len(parts) > 12:
-            LOGGER.warning("Skipping malformed sacct row: %s", raw_row)
-            pending_lines.clear()
+        pending_separators += raw_line.count("|")
+        if pending_separators < separators:
             continue
 
-        process_parts(parts)
+        raw_row = pending_lines[0] if len(pending_lines) == 1 else "\n".join(pending_lines)
         pending_lines.clear()
+        pending_separators = 0
+        values = _row_values(raw_row.split("|", separators), tzinfo, parse_time, strings)
+        if values is not None:
+            yield values
 
     if pending_lines:
         LOGGER.warning("Skipping malformed sacct row: %s", "\n".join(pending_lines))
 
-    return rows
+
+def parse_sacct_output(
+    output: str,
+    *,
+    timezone: str | None = None,
+) -> List[SacctRow]:
+    return list(iter_sacct_rows(output.splitlines(), timezone=timezone))
+
+
+def parse_sacct_table(
+    lines: Iterable[str],
+    *,
+    timezone: str | None = None,
+) -> JobTable:
+    """Parse ``sacct`` output straight into a columnar :class:`JobTable`.
+
+    Timestamps go from text (or JSON epochs) to UTC epoch seconds without
+    ever becoming :class:`~datetime.datetime` objects.
+    """
+
+    tzinfo = ensure_timezone(timezone)
+    return build_epoch_table(_iter_values(lines, tzinfo, epochs=True), tzinfo=tzinfo)
+
+
+def dedupe_rows(rows: Iterable[SacctRow]) -> Iterator[SacctRow]:
+    """Drop repeated jobs, e.g. jobs returned by several overlapping queries.
+
+    Rows are identified by ``JobIDRaw`` together with ``JobID`` so that job
+    steps sharing their parent's raw ID are kept apart.  The first occurrence
+    wins.
+    """
+
+    seen: set[tuple[str | None, str]] = set()
+    for row in rows:
+        key = (row.job_id_raw, row.job_id)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield row
+
+
+def build_sharded_commands(
+    start: datetime,
+    end: datetime,
+    *,
+    shard: timedelta,
+    users: Sequence[str] | None = None,
+    partitions: Sequence[str] | None = None,
+    include_steps: bool = False,
+    output_format: str = "text",
+) -> List[List[str]]:
+    """Return one ``sacct`` command per sub-window of ``start``-``end``."""
+
+    return [
+        build_sacct_command(
+            shard_start,
+            shard_end,
+            users=users,
+            partitions=partitions,
+            include_steps=include_steps,
+            output_format=output_format,
+        )
+        for shard_start, shard_end in split_window(start, end, shard)
+    ]
+
+
+def fetch_shards(
+    commands: Sequence[Sequence[str]],
+    *,
+    workers: int = 4,
+    timezone: str | None = None,
+    runner: Callable[[Sequence[str]], Iterable[str]] = stream_sacct,
+) -> List[List[SacctRow]]:
+    """Run ``commands`` concurrently and return the parsed rows of each.
+
+    At most ``workers`` ``sacct`` processes run at the same time.  The result
+    preserves the order of ``commands``.
+    """
+
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if not commands:
+        return []
+
+    def fetch(command: Sequence[str]) -> List[SacctRow]:
+        return list(iter_sacct_rows(runner(command), timezone=timezone))
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(commands))) as executor:
+        return list(executor.map(fetch, commands))
+
+
+def fetch_sharded_rows(
+    commands: Sequence[Sequence[str]],
+    *,
+    workers: int = 4,
+    timezone: str | None = None,
+    runner: Callable[[Sequence[str]], Iterable[str]] = stream_sacct,
+) -> List[SacctRow]:
+    """Fetch all shard ``commands`` and merge them into one list of rows.
+
+    Rows are returned in shard order with jobs spanning shard boundaries
+    reported once.
+    """
+
+    shards = fetch_shards(commands, workers=workers, timezone=timezone, runner=runner)
+    return list(dedupe_rows(row for shard_rows in shards for row in shard_rows))
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+from typing import Any, Iterable, Iterator, Sequence
+
+from .models import SacctValues
+
+LOGGER = logging.getLogger(__name__)
+
+# Lines are decoded in blocks of this many, so a job object is usually
+# complete after one read and seldom decoded twice.
+_BLOCK_LINES = 4096
+_WHITESPACE = " \t\r\n"
+_DECODER = json.JSONDecoder()
+
+
+def ijson_available() -> bool:
+    """Whether the optional ``ijson`` package can decode sacct JSON."""
+
+    try:
+        import ijson  # noqa: F401
+    except ModuleNotFoundError:
+        return False
+    return True
+
+
+class _LineBuffer:
+    """Text read so far from an iterable of lines, consumed front to back."""
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        self._lines = iter(lines)
+        self.text = ""
+        self.pos = 0
+
+    def fill(self) -> bool:
+        """Append the next block of lines; ``False`` once the input is exhausted."""
+
+        block = list(itertools.islice(self._lines, _BLOCK_LINES))
+        if not block:
+            return False
+        block.append("")
+        self.text = self.text[self.pos :] + "\n".join(block)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str | None:
+        """Skip whitespace and return the next character without consuming it."""
+
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return None
+
+    def expect(self, *characters: str) -> str:
+        character = self.peek()
+        if character is None or character not in characters:
+            found = "end of output" if character is None else repr(character)
+            raise ValueError(f"expected {' or '.join(map(repr, characters))}, found {found}")
+        self.pos += 1
+        return character
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+
+        if self.peek() is None:
+            raise ValueError("unexpected end of output")
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end == len(self.text) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_jobs_fallback(lines: Iterable[str]) -> Iterator[dict]:
+    buffer = _LineBuffer(lines)
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        return
+    while True:
+        key = buffer.value()
+        buffer.expect(":")
+        if key == "jobs":
+            buffer.expect("[")
+            if buffer.peek() == "]":
+                buffer.pos += 1
+            else:
+                while True:
+                    yield buffer.value()
+                    if buffer.expect(",", "]") == "]":
+                        break
+        else:
+            value = buffer.value()
+            if key == "errors" and value:
+                LOGGER.warning("sacct reported errors: %s", value)
+        if buffer.expect(",", "}") == "}":
+            return
+
+
+class _LineReader:
+    """Minimal binary file object over text lines, as ``ijson`` expects."""
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        self._lines = iter(lines)
+        self._pending = b""
+
+    def read(self, size: int = -1) -> bytes:
+        pieces = [self._pending]
+        length = len(self._pending)
+        while size < 0 or length < size:
+            block = list(itertools.islice(self._lines, _BLOCK_LINES))
+            if not block:
+                break
+            block.append("")
+            data = "\n".join(block).encode()
+            pieces.append(data)
+            length += len(data)
+        data = b"".join(pieces)
+        if size < 0:
+            self._pending = b""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+
+def iter_json_jobs(lines: Iterable[str]) -> Iterator[dict]:
+    """Incrementally decode the ``jobs`` array of ``sacct --json`` output.
+
+    ``lines`` are the lines of the document without their newline, as
+    :func:`~slurm_waiting_times.sacct.stream_sacct` yields them.  Only a
+    block of lines and the current job object are held in memory.  The
+    ``ijson`` package is used when installed; otherwise the document is
+    walked with :meth:`json.JSONDecoder.raw_decode`, one job at a time.
+    Malformed documents raise :class:`ValueError`.
+    """
+
+    try:
+        import ijson
+    except ModuleNotFoundError:
+        yield from _iter_jobs_fallback(lines)
+        return
+
+    try:
+        yield from ijson.items(_LineReader(lines), "jobs.item", use_float=True)
+    except ijson.JSONError as exc:
+        raise ValueError(str(exc)) from exc
+
+
+def _number(value: Any) -> Any:
+    """Unwrap Slurm's ``{"set": ..., "infinite": ..., "number": ...}`` values."""
+
+    if isinstance(value, dict):
+        if not value.get("set", True) or value.get("infinite", False):
+            return None
+        return value.get("number")
+    return value
+
+
+def _state(value: Any) -> str:
+    if isinstance(value, dict):
+        value = value.get("current")
+    if isinstance(value, list):
+        return " ".join(value)
+    return value or ""
+
+
+def _tres(entries: Sequence[dict[str, Any]] | None) -> str | None:
+    """Format allocated TRES the way ``sacct --format=AllocTRES`` prints them."""
+
+    parts = []
+    for entry in entries or ():
+        count = _number(entry.get("count"))
+        if count is None:
+            continue
+        name = entry.get("name")
+        key = f"{entry['type']}/{name}" if name else entry["type"]
+        if key == "mem":
+            value = f"{count // 1024}G" if count % 1024 == 0 else f"{count}M"
+        else:
+            value = str(count)
+        parts.append(f"{key}={value}")
+    return ",".join(sorted(parts)) or None
+
+
+def _epoch(value: Any) -> int | None:
+    epoch = _number(value)
+    # Slurm reports jobs that have not started with a start time of 0.
+    return int(epoch) if epoch else None
+
+
+def _step_suffix(step: dict[str, Any]) -> str:
+    identifier = step.get("id")
+    if isinstance(identifier, dict):
+        return str(identifier.get("step_id"))
+    identifier = str(identifier)
+    return identifier.rsplit(".", 1)[-1]
+
+
+def job_values(
+    job: dict[str, Any],
+    strings: dict[str, str] | None = None,
+) -> Iterator[SacctValues]:
+    """Yield the values of the allocation row of ``job`` and of each of its steps.
+
+    The values match what the ``--parsable2`` parser produces for the job;
+    jobs and steps that have not started are skipped.  User, state,
+    partition and AllocTRES values are shared through ``strings`` when given.
+    """
+
+    if strings is None:
+        strings = {}
+
+    def share(value: str | None) -> str | None:
+        return value if value is None else strings.setdefault(value, value)
+
+    raw_id = str(job["job_id"])
+    array = job.get("array") or {}
+    task = _number(array.get("task_id"))
+    array_id = _number(array.get("job_id"))
+    job_id = f"{array_id}_{task}" if task is not None and array_id else raw_id
+    times = job.get("time") or {}
+    submit = _epoch(times.get("submission"))
+    if submit is None:
+        LOGGER.warning("Skipping job %s without a submit time", job_id)
+        return
+
+    start = _epoch(times.get("start"))
+    if start is None:
+        LOGGER.debug("Dropping job %s because it has not started", job_id)
+    else:
+        yield (
+            job_id,
+            raw_id,
+            job.get("name") or None,
+            (job.get("submit_line") or "").strip() or None,
+            share(job.get("user") or ""),
+            submit,
+            start,
+            share(_state(job.get("state"))),
+            share(job.get("partition") or ""),
+            _number(job.get("allocation_nodes")),
+            share(_tres((job.get("tres") or {}).get("allocated"))),
+            _number(times.get("elapsed")),
+        )
+
+    for step in job.get("steps") or ():
+        details = step.get("step") or {}
+        suffix = _step_suffix(details)
+        step_times = step.get("time") or {}
+        step_start = _epoch(step_times.get("start"))
+        if step_start is None:
+            continue
+        # Steps carry no user, partition or submit line, like in the text output.
+        yield (
+            f"{job_id}.{suffix}",
+            f"{raw_id}.{suffix}",
+            details.get("name") or None,
+            None,
+            "",
+            submit,
+            step_start,
+            share(_state(step.get("state"))),
+            "",
+            _number((step.get("nodes") or {}).get("count")),
+            share(_tres((step.get("tres") or {}).get("allocated"))),
+            _number(step_times.get("elapsed")),
+        )
+
+
+def iter_sacct_json_values(lines: Iterable[str]) -> Iterator[SacctValues]:
+    """Lazily turn ``sacct --json`` output lines into row values."""
+
+    strings: dict[str, str] = {}
+    for job in iter_json_jobs(lines):
+        yield from job_values(job, strings)
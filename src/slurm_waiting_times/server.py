@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import io
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Hashable
+from urllib.parse import parse_qs, urlsplit
+
+from .batch import ManifestError, ReportSpec, window_mask
+from .histogram import _load_pyplot, bin_histogram, render_histogram
+from .models import JobTable
+from .processing import filter_rows, parse_runtime_constraint, wait_values
+from .stats import STATISTICS_MODES, summarize
+from .time_utils import format_timedelta_hms, parse_cli_datetime_window
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_QUERY_TTL = 60.0
+DEFAULT_QUERY_CACHE_SIZE = 256
+
+_BOOLEAN_VALUES = {"1": True, "true": True, "yes": True, "0": False, "false": False, "no": False}
+_LIST_PARAMS = ("user", "partition", "runtime")
+_BOOLEAN_PARAMS = ("include_steps", "bin_seconds")
+_NUMBER_PARAMS = {"max_wait_hours": float, "bins": int}
+
+
+class QueryError(RuntimeError):
+    """Raised when an HTTP query has invalid parameters."""
+
+
+class QueryCache:
+    """Bounded, thread-safe result cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_QUERY_TTL,
+        *,
+        max_entries: int = DEFAULT_QUERY_CACHE_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            now = self._clock()
+            expired = [k for k, (expires, _) in self._entries.items() if expires <= now]
+            for k in expired:
+                del self._entries[k]
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@dataclass(frozen=True, slots=True)
+class DatasetSnapshot:
+    """Jobs of one refresh together with the window they were fetched for."""
+
+    table: JobTable
+    start: datetime
+    end: datetime
+    refreshed_at: datetime
+    generation: int
+    load_seconds: float = 0.0
+
+
+class DatasetRefresher:
+    """Keeps a rolling window of jobs in memory and refreshes it periodically.
+
+    ``load(start, end)`` fetches and parses the jobs of a window.  A failed
+    refresh is logged and the previous snapshot stays in service.  With a
+    ``load_factor`` the pause between refreshes grows to that multiple of
+    the last refresh duration (between ``interval`` and ``max_interval``),
+    so a slow ``sacct`` is queried less often.  ``on_refresh`` is called
+    with every new snapshot.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[datetime, datetime], JobTable],
+        *,
+        window: timedelta,
+        interval: float,
+        clock: Callable[[], datetime],
+        load_factor: float | None = None,
+        max_interval: float | None = None,
+        on_refresh: Callable[[DatasetSnapshot], None] | None = None,
+    ) -> None:
+        self._load = load
+        self.window = window
+        self.interval = interval
+        self.load_factor = load_factor
+        self.max_interval = max_interval
+        self._clock = clock
+        self._on_refresh = on_refresh
+        self._snapshot: DatasetSnapshot | None = None
+        self._generation = 0
+        self.last_duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def snapshot(self) -> DatasetSnapshot:
+        if self._snapshot is None:
+            raise RuntimeError("the dataset has not been loaded yet")
+        return self._snapshot
+
+    def refresh(self) -> DatasetSnapshot:
+        end = self._clock()
+        start = end - self.window
+        started = time.perf_counter()
+        table = self._load(start, end)
+        self.last_duration = time.perf_counter() - started
+        self._generation += 1
+        snapshot = DatasetSnapshot(
+            table=table,
+            start=start,
+            end=end,
+            refreshed_at=self._clock(),
+            generation=self._generation,
+            load_seconds=self.last_duration,
+        )
+        if self._on_refresh is not None:
+            self._on_refresh(snapshot)
+        self._snapshot = snapshot
+        LOGGER.info("Dataset refreshed: %d job row(s) in %.2f s", len(table), self.last_duration)
+        return snapshot
+
+    def next_interval(self) -> float:
+        """Seconds to wait before the next refresh."""
+
+        if self.load_factor is None:
+            return self.interval
+        interval = max(self.interval, self.last_duration * self.load_factor)
+        if self.max_interval is not None:
+            interval = min(interval, self.max_interval)
+        return interval
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.next_interval()):
+            try:
+                self.refresh()
+            except Exception:  # pragma: no cover - logged and retried on the next interval
+                LOGGER.exception("Dataset refresh failed; keeping the previous snapshot")
+
+    def start(self) -> None:
+        """Keep refreshing in a daemon thread, pausing :meth:`next_interval` in between."""
+
+        self._thread = threading.Thread(target=self._run, name="dataset-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def _single(params: dict[str, list[str]], key: str) -> str | None:
+    values = params.get(key)
+    if not values:
+        return None
+    if len(values) > 1:
+        raise QueryError(f"{key} may only be given once")
+    return values[0]
+
+
+def parse_query(params: dict[str, list[str]]) -> tuple[ReportSpec, str]:
+    """Translate query-string parameters into a report spec and statistics mode.
+
+    Parameters mirror the CLI options with underscores (``job_type``,
+    ``max_wait_hours`` …).  ``user``, ``partition`` and ``runtime`` may be
+    repeated or comma-separated.
+    """
+
+    mapping: dict[str, Any] = {}
+    for key, values in params.items():
+        if key == "stats":
+            continue
+        if key in _LIST_PARAMS:
+            mapping[key] = [item for value in values for item in value.split(",")]
+        elif key in _BOOLEAN_PARAMS:
+            value = _single(params, key).lower()
+            if value not in _BOOLEAN_VALUES:
+                raise QueryError(f"{key} must be true or false")
+            mapping[key] = _BOOLEAN_VALUES[value]
+        elif key in _NUMBER_PARAMS:
+            try:
+                mapping[key] = _NUMBER_PARAMS[key](_single(params, key))
+            except ValueError as exc:
+                raise QueryError(f"{key} must be a number") from exc
+        else:
+            mapping[key] = _single(params, key)
+
+    try:
+        spec = ReportSpec.from_mapping(mapping)
+    except ManifestError as exc:
+        raise QueryError(str(exc)) from exc
+
+    mode = _single(params, "stats") or "exact"
+    if mode not in STATISTICS_MODES:
+        raise QueryError(f"stats must be one of {', '.join(STATISTICS_MODES)}")
+    return spec, mode
+
+
+def _cache_key(path: str, generation: int, params: dict[str, list[str]]) -> tuple:
+    return (path, generation, tuple(sorted((key, tuple(values)) for key, values in params.items())))
+
+
+class WaitTimeService:
+    """Answers statistics and histogram queries from the current snapshot."""
+
+    def __init__(self, refresher: DatasetRefresher, cache: QueryCache) -> None:
+        self.refresher = refresher
+        self.cache = cache
+        # pyplot keeps global state and is not safe to drive from several threads.
+        self._render_lock = threading.Lock()
+
+    def _select(self, snapshot: DatasetSnapshot, spec: ReportSpec):
+        tzinfo = snapshot.table.tzinfo
+        try:
+            start, end = parse_cli_datetime_window(
+                spec.start, spec.end, snapshot.start, snapshot.end, tzinfo
+            )
+            runtime = [parse_runtime_constraint(value) for value in spec.runtime]
+        except ValueError as exc:
+            raise QueryError(str(exc)) from exc
+        if start > end:
+            raise QueryError("start must be before end")
+
+        table = snapshot.table
+        if start > snapshot.start or end < snapshot.end:
+            table = table.take(window_mask(table, start, end))
+        records = filter_rows(
+            table,
+            include_steps=spec.include_steps,
+            user_filters=spec.user,
+            partition_filters=spec.partition,
+            job_type=spec.job_type,
+            slurm_job_type=spec.slurm_job_type,
+            max_wait_hours=spec.max_wait_hours,
+            runtime_filters=runtime,
+        )
+        return records, start, end
+
+    def _cached(self, path: str, params: dict[str, list[str]], compute: Callable) -> Any:
+        snapshot = self.refresher.snapshot
+        key = _cache_key(path, snapshot.generation, params)
+        result = self.cache.get(key)
+        if result is None:
+            result = compute(snapshot)
+            self.cache.put(key, result)
+        return result
+
+    def stats(self, params: dict[str, list[str]]) -> dict[str, Any]:
+        spec, mode = parse_query(params)
+
+        def compute(snapshot: DatasetSnapshot) -> dict[str, Any]:
+            records, start, end = self._select(snapshot, spec)
+            result: dict[str, Any] = {
+                "jobs": len(records),
+                "window": {"start": start.isoformat(), "end": end.isoformat()},
+                "refreshed_at": snapshot.refreshed_at.isoformat(),
+                "wait_seconds": None,
+            }
+            if len(records):
+                summary = summarize(wait_values(records), mode=mode)
+                result["wait_seconds"] = {
+                    "mean": summary.mean,
+                    "min": summary.minimum,
+                    "q1": summary.q1,
+                    "median": summary.median,
+                    "q3": summary.q3,
+                    "p95": summary.p95,
+                    "max": summary.maximum,
+                }
+                result["mean_wait"] = format_timedelta_hms(summary.mean)
+            return result
+
+        return self._cached("/stats", params, compute)
+
+    def histogram_png(self, params: dict[str, list[str]]) -> bytes:
+        spec, mode = parse_query(params)
+
+        def compute(snapshot: DatasetSnapshot) -> bytes:
+            records, _, _ = self._select(snapshot, spec)
+            if not len(records):
+                raise QueryError("no jobs match the query")
+            data = bin_histogram(
+                records,
+                use_seconds=spec.bin_seconds,
+                bins=spec.bins,
+                summary=summarize(wait_values(records), mode=mode),
+            )
+            buffer = io.BytesIO()
+            with self._render_lock:
+                fig = render_histogram(data)
+                fig.savefig(buffer, format="png")
+                plt, _ = _load_pyplot()
+                plt.close(fig)
+            return buffer.getvalue()
+
+        return self._cached("/histogram.png", params, compute)
+
+    def health(self) -> dict[str, Any]:
+        snapshot = self.refresher.snapshot
+        return {
+            "status": "ok",
+            "jobs": len(snapshot.table),
+            "window": {"start": snapshot.start.isoformat(), "end": snapshot.end.isoformat()},
+            "refreshed_at": snapshot.refreshed_at.isoformat(),
+        }
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    service: WaitTimeService
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        url = urlsplit(self.path)
+        params = parse_qs(url.query, keep_blank_values=False)
+        try:
+            if url.path == "/stats":
+                self._send_json(HTTPStatus.OK, self.service.stats(params))
+            elif url.path == "/histogram.png":
+                self._send(HTTPStatus.OK, "image/png", self.service.histogram_png(params))
+            elif url.path == "/healthz":
+                self._send_json(HTTPStatus.OK, self.service.health())
+            else:
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": f"unknown path {url.path}"})
+        except QueryError as exc:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+        except Exception:
+            LOGGER.exception("Failed to answer %s", self.path)
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal server error"})
+
+    def _send_json(self, status: HTTPStatus, payload: dict[str, Any]) -> None:
+        self._send(status, "application/json", json.dumps(payload).encode())
+
+    def _send(self, status: HTTPStatus, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - http.server signature
+        LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(service: WaitTimeService, host: str, port: int) -> ThreadingHTTPServer:
+    """Create (but do not start) the HTTP server answering with ``service``."""
+
+    handler = type("WaitTimeRequestHandler", (_RequestHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
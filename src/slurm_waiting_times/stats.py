@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+STATISTICS_MODES = ("exact", "approx")
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BUCKETS = 2048
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Linearly interpolated percentile of already sorted values."""
+
+    if not 0 <= fraction <= 1:
+        raise ValueError("percentile fraction must be between 0 and 1")
+    if not sorted_values:
+        raise ValueError("percentile requires at least one value")
+    position = (len(sorted_values) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[int(position)]
+    lower_value = sorted_values[lower]
+    upper_value = sorted_values[upper]
+    return lower_value + (upper_value - lower_value) * (position - lower)
+
+
+@dataclass(frozen=True, slots=True)
+class WaitSummary:
+    """Summary statistics of waiting times in seconds."""
+
+    count: int
+    mean: float
+    minimum: float
+    q1: float
+    median: float
+    q3: float
+    p95: float
+    maximum: float
+
+    def freedman_diaconis_bins(self) -> int:
+        """Freedman–Diaconis bin count derived from the summarised quartiles.
+
+        Mirrors :func:`~slurm_waiting_times.time_utils.freedman_diaconis_bins`
+        without needing the raw values.
+        """
+
+        n = self.count
+        if n <= 1:
+            return 1
+        iqr = self.q3 - self.q1
+        if iqr == 0:
+            return max(1, int(round(n ** 0.5)))
+        width = 2 * iqr / (n ** (1 / 3))
+        data_range = self.maximum - self.minimum
+        if data_range == 0:
+            return 1
+        return max(1, math.ceil(data_range / width))
+
+
+class ExactStatistics:
+    """Keeps every value and sorts them once when summarised."""
+
+    def __init__(self) -> None:
+        self._values: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, value: float) -> None:
+        self._values.append(value)
+
+    def update(self, values: Iterable[float]) -> None:
+        self._values.extend(values)
+
+    def merge(self, other: "ExactStatistics") -> None:
+        self._values.extend(other._values)
+
+    def quantile(self, fraction: float) -> float:
+        return percentile(sorted(self._values), fraction)
+
+    def summary(self) -> WaitSummary:
+        if not self._values:
+            raise ValueError("cannot summarise an empty sample")
+        ordered = sorted(self._values)
+        return WaitSummary(
+            count=len(ordered),
+            mean=math.fsum(ordered) / len(ordered),
+            minimum=ordered[0],
+            q1=percentile(ordered, 0.25),
+            median=percentile(ordered, 0.5),
+            q3=percentile(ordered, 0.75),
+            p95=percentile(ordered, 0.95),
+            maximum=ordered[-1],
+        )
+
+
+class DDSketch:
+    """Mergeable quantile sketch with bounded relative error.
+
+    Values are counted in logarithmically sized buckets so that every
+    quantile estimate is within ``relative_accuracy`` of a value of the
+    sample (Masson, Rim & Lee, "DDSketch", VLDB 2019).  Non-positive values
+    share one bucket.  When more than ``max_buckets`` buckets are in use the
+    lowest ones are collapsed, which only affects the smallest quantiles.
+    Count, mean, minimum and maximum are tracked exactly.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        *,
+        max_buckets: int = DEFAULT_MAX_BUCKETS,
+    ) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        if max_buckets < 1:
+            raise ValueError("max_buckets must be at least 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: dict[int, int] = {}
+        self._zero_count = 0
+        self._count = 0
+        self._sum = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, value: float) -> None:
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+            if len(self._buckets) > self.max_buckets:
+                self._collapse()
+        else:
+            self._zero_count += 1
+        self._count += 1
+        self._sum += value
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    def update(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "DDSketch") -> None:
+        """Fold ``other`` into this sketch; both must share their accuracy."""
+
+        if other._gamma != self._gamma:
+            raise ValueError("cannot merge sketches with different relative accuracy")
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+        self._zero_count += other._zero_count
+        self._count += other._count
+        self._sum += other._sum
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+
+    def _collapse(self) -> None:
+        indices = sorted(self._buckets)
+        excess = len(indices) - self.max_buckets
+        target = indices[excess]
+        for index in indices[:excess]:
+            self._buckets[target] += self._buckets.pop(index)
+
+    def quantile(self, fraction: float) -> float:
+        if not 0 <= fraction <= 1:
+            raise ValueError("quantile fraction must be between 0 and 1")
+        if not self._count:
+            raise ValueError("quantile requires at least one value")
+
+        rank = fraction * (self._count - 1)
+        seen = self._zero_count
+        if seen > rank:
+            estimate = 0.0
+        else:
+            estimate = self._max
+            for index in sorted(self._buckets):
+                seen += self._buckets[index]
+                if seen > rank:
+                    estimate = 2 * self._gamma**index / (self._gamma + 1)
+                    break
+        return min(max(estimate, self._min), self._max)
+
+    def summary(self) -> WaitSummary:
+        if not self._count:
+            raise ValueError("cannot summarise an empty sample")
+        return WaitSummary(
+            count=self._count,
+            mean=self._sum / self._count,
+            minimum=self._min,
+            q1=self.quantile(0.25),
+            median=self.quantile(0.5),
+            q3=self.quantile(0.75),
+            p95=self.quantile(0.95),
+            maximum=self._max,
+        )
+
+
+def create_statistics(mode: str = "exact") -> ExactStatistics | DDSketch:
+    """Return an empty accumulator for ``mode`` (one of :data:`STATISTICS_MODES`)."""
+
+    if mode == "exact":
+        return ExactStatistics()
+    if mode == "approx":
+        return DDSketch()
+    raise ValueError(f"Unknown statistics mode '{mode}'")
+
+
+def summarize(values: Iterable[float], *, mode: str = "exact") -> WaitSummary:
+    """Summarise ``values`` in a single pass using the requested mode."""
+
+    statistics = create_statistics(mode)
+    statistics.update(values)
+    return statistics.summary()
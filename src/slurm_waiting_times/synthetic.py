@@ -0,0 +1,440 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterator, Sequence, TextIO
+from zoneinfo import ZoneInfo
+
+from .time_utils import parse_duration_to_seconds
+
+JOBS_PER_DAY_ENV = "SLURM_WAITING_TIMES_FAKE_JOBS_PER_DAY"
+SEED_ENV = "SLURM_WAITING_TIMES_FAKE_SEED"
+DEFAULT_JOBS_PER_DAY = 1000
+
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+_DAY_SECONDS = 86400
+# JobIDs are unique per generated day: day number times this stride plus index.
+_JOB_ID_STRIDE = 10_000_000
+_EPOCH_ORDINAL = date(2000, 1, 1).toordinal()
+# Waits are capped at 14 days and run times below 3 days, so no job submitted
+# earlier than this before a window can still be active in it.
+_LOOKBACK = timedelta(days=17)
+
+_PARTITIONS = ("cpu", "cpu_long", "gpu", "mcml-a100", "mcml-h100", "lrz-hgx-h100")
+_GPU_PARTITIONS = frozenset({"gpu", "mcml-a100", "mcml-h100", "lrz-hgx-h100"})
+_FINAL_STATES = (
+    ("COMPLETED", 0.72),
+    ("FAILED", 0.1),
+    ("CANCELLED by 1000", 0.08),
+    ("TIMEOUT", 0.06),
+    ("OUT_OF_MEMORY", 0.04),
+)
+_JOB_NAMES = ("train", "eval", "preprocess", "bash", "jupyter", "sweep", "render", "sim")
+
+
+@dataclass(slots=True)
+class WorkloadSpec:
+    """Shape of the synthetic workload; fractions are per top-level job."""
+
+    jobs_per_day: int = DEFAULT_JOBS_PER_DAY
+    seed: int = 0
+    users: int = 200
+    array_fraction: float = 0.1
+    interactive_fraction: float = 0.15
+    multiline_fraction: float = 0.02
+    pending_fraction: float = 0.03
+    running_fraction: float = 0.05
+
+
+def _elapsed(seconds: int) -> str:
+    days, remainder = divmod(seconds, _DAY_SECONDS)
+    hours, remainder = divmod(remainder, 3600)
+    minutes, secs = divmod(remainder, 60)
+    if days:
+        return f"{days}-{hours:02d}:{minutes:02d}:{secs:02d}"
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+
+
+def _wait_seconds(rng: random.Random) -> int:
+    # Most jobs start within minutes; a Pareto tail reaches days.
+    if rng.random() < 0.35:
+        return int(rng.expovariate(1 / 20))
+    return min(int(30 * rng.paretovariate(0.7)), 14 * _DAY_SECONDS)
+
+
+def _alloc_tres(rng: random.Random, partition: str) -> tuple[int, str]:
+    if partition in _GPU_PARTITIONS:
+        nodes = 1 if rng.random() < 0.85 else rng.choice((2, 4, 8))
+        gpus = rng.choice((1, 1, 1, 2, 4, 8)) if nodes == 1 else 8 * nodes
+        cpus = gpus * rng.choice((4, 8, 16))
+        tres = f"billing={cpus},cpu={cpus},gres/gpu={gpus},mem={cpus * 8}G,node={nodes}"
+    else:
+        nodes = 1 if rng.random() < 0.9 else rng.choice((2, 4, 16))
+        cpus = rng.choice((1, 2, 4, 8, 16, 32, 64)) * nodes
+        tres = f"billing={cpus},cpu={cpus},mem={cpus * 4}G,node={nodes}"
+    return nodes, tres
+
+
+def _state(rng: random.Random) -> str:
+    roll = rng.random()
+    for state, weight in _FINAL_STATES:
+        if roll < weight:
+            return state
+        roll -= weight
+    return "COMPLETED"
+
+
+def generate_day(
+    day: date,
+    spec: WorkloadSpec,
+    *,
+    include_steps: bool = True,
+    now: datetime | None = None,
+) -> Iterator[list[str]]:
+    """Yield the field lists of every row submitted on ``day``.
+
+    The rows only depend on ``day`` and ``spec``, so any split of a window
+    into sub-windows yields the same jobs.  Jobs that would start after
+    ``now`` are reported as pending.
+    """
+
+    rng = random.Random(spec.seed * 1_000_003 + day.toordinal())
+    midnight = datetime.combine(day, datetime.min.time())
+    base_id = (day.toordinal() - _EPOCH_ORDINAL) * _JOB_ID_STRIDE
+    offsets = sorted(rng.randrange(_DAY_SECONDS) for _ in range(spec.jobs_per_day))
+
+    index = 0
+    while index < len(offsets):
+        submit = midnight + timedelta(seconds=offsets[index])
+        job_number = base_id + index
+        user = f"user{int(rng.paretovariate(1.2) * 7) % spec.users:03d}"
+        partition = rng.choice(_PARTITIONS)
+        nodes, alloc_tres = _alloc_tres(rng, partition)
+        interactive = rng.random() < spec.interactive_fraction
+        name = "bash" if interactive else rng.choice(_JOB_NAMES)
+        if interactive:
+            submit_line = rng.choice(
+                (f"salloc -p {partition} --time=01:00:00", f"srun -p {partition} --pty bash -i")
+            )
+        elif rng.random() < spec.multiline_fraction:
+            submit_line = f"sbatch -p {partition} --wrap='cd $WORK\npython {name}.py'"
+        else:
+            submit_line = f"sbatch -p {partition} {name}.sh"
+
+        tasks = 1
+        if not interactive and rng.random() < spec.array_fraction:
+            tasks = min(rng.choice((2, 4, 10, 25, 100)), len(offsets) - index)
+
+        for task in range(tasks):
+            raw_id = str(job_number + task)
+            job_id = f"{job_number}_{task}" if tasks > 1 else raw_id
+            # Draw every random value up front so ``now`` does not shift the stream.
+            start = submit + timedelta(seconds=_wait_seconds(rng))
+            roll = rng.random()
+            final_state = _state(rng)
+            elapsed = _elapsed(int(rng.lognormvariate(7.5, 1.5)) % (3 * _DAY_SECONDS))
+            submit_text = submit.strftime(_TIMESTAMP_FORMAT)
+            if roll < spec.pending_fraction or (now is not None and start > now):
+                fields = [name, submit_line, user, submit_text, "Unknown", "PENDING"]
+                yield [job_id, raw_id, *fields, partition, str(nodes), "", "00:00:00"]
+                continue
+
+            running = roll < spec.pending_fraction + spec.running_fraction
+            state = "RUNNING" if running else final_state
+            start_text = start.strftime(_TIMESTAMP_FORMAT)
+            fields = [name, submit_line, user, submit_text, start_text, state, partition]
+            yield [job_id, raw_id, *fields, str(nodes), alloc_tres, elapsed]
+            if not include_steps:
+                continue
+
+            # Steps carry no user, partition or submit line, like real sacct.
+            step_tres = alloc_tres.replace(f"node={nodes}", "node=1")
+            for step in ("extern", "0" if interactive else "batch"):
+                step_state = "RUNNING" if running else ("COMPLETED" if step == "extern" else state)
+                step_nodes = str(nodes if step == "extern" else 1)
+                fields = [step, "", "", submit_text, start_text, step_state, ""]
+                step_ids = [f"{job_id}.{step}", f"{raw_id}.{step}"]
+                yield [*step_ids, *fields, step_nodes, step_tres, elapsed]
+        index += tasks
+
+
+def _window_fields(
+    start: datetime,
+    end: datetime,
+    spec: WorkloadSpec,
+    *,
+    include_steps: bool,
+    users: Sequence[str] | None,
+    partitions: Sequence[str] | None,
+    now: datetime | None,
+) -> Iterator[list[str]]:
+    user_filter = set(users) if users else None
+    partition_filter = set(partitions) if partitions else None
+    lower = start.strftime(_TIMESTAMP_FORMAT)
+    upper = end.strftime(_TIMESTAMP_FORMAT)
+    keep_job = False
+
+    day = (start - _LOOKBACK).date()
+    while day <= end.date():
+        for fields in generate_day(day, spec, include_steps=include_steps, now=now):
+            if "." not in fields[0]:
+                keep_job = (
+                    fields[5] <= upper
+                    and (fields[5] >= lower or _end_text(fields) >= lower)
+                    and (user_filter is None or fields[4] in user_filter)
+                    and (partition_filter is None or fields[8] in partition_filter)
+                )
+            if keep_job:
+                yield fields
+        day += timedelta(days=1)
+
+
+def _end_text(fields: list[str]) -> str:
+    """Return the end of a job's activity; pending and running jobs never end."""
+
+    start, state = fields[6], fields[7]
+    if start == "Unknown" or state == "RUNNING":
+        return "9999"
+    end = datetime.fromisoformat(start) + timedelta(seconds=parse_duration_to_seconds(fields[11]))
+    return end.strftime(_TIMESTAMP_FORMAT)
+
+
+def generate_sacct_lines(
+    start: datetime,
+    end: datetime,
+    spec: WorkloadSpec | None = None,
+    *,
+    include_steps: bool = True,
+    users: Sequence[str] | None = None,
+    partitions: Sequence[str] | None = None,
+    now: datetime | None = None,
+) -> Iterator[str]:
+    """Yield ``--parsable2`` lines for jobs active in ``[start, end]``.
+
+    Like ``sacct -S/-E``, this includes jobs submitted before ``start`` that
+    were still pending or running at ``start``.
+
+    ``start`` and ``end`` are naive local times, as ``sacct -S/-E`` takes
+    them.  Multi-line submit lines are yielded as one string containing a
+    newline, exactly as ``sacct`` would print them.
+    """
+
+    fields = _window_fields(
+        start,
+        end,
+        spec or WorkloadSpec(),
+        include_steps=include_steps,
+        users=users,
+        partitions=partitions,
+        now=now,
+    )
+    for row in fields:
+        yield "|".join(row)
+
+
+def _epoch(value: str, tzinfo: ZoneInfo | None) -> int:
+    if value == "Unknown":
+        return 0
+    return int(datetime.fromisoformat(value).replace(tzinfo=tzinfo).timestamp())
+
+
+def _json_tres(value: str) -> list[dict[str, Any]]:
+    entries = []
+    for position, item in enumerate(filter(None, value.split(","))):
+        key, count = item.split("=", 1)
+        kind, _, name = key.partition("/")
+        if count.endswith("G"):
+            count = str(int(count[:-1]) * 1024)
+        entry = {"type": kind, "name": name, "id": position + 1, "count": int(count)}
+        entries.append(entry)
+    return entries
+
+
+def _no_value(number: int | None) -> dict[str, Any]:
+    return {"set": number is not None, "infinite": False, "number": number or 0}
+
+
+def _json_job(fields: list[str], tzinfo: ZoneInfo | None) -> dict[str, Any]:
+    job_id, raw_id, name, submit_line, user, submit, start, state, partition = fields[:9]
+    nodes, alloc_tres, elapsed = fields[9:]
+    array_id, _, task = job_id.partition("_")
+    allocated = _json_tres(alloc_tres)
+    # Real records carry many more fields than the parser reads; a selection
+    # keeps the document size realistic.
+    return {
+        "account": "synthetic",
+        "allocation_nodes": int(nodes),
+        "array": {
+            "job_id": int(array_id) if task else 0,
+            "limits": {"max": {"running": {"tasks": 0}}},
+            "task_id": _no_value(int(task) if task else None),
+        },
+        "cluster": "synthetic",
+        "constraints": "",
+        "exit_code": {"status": ["SUCCESS"], "return_code": _no_value(0)},
+        "flags": ["CLEAR_SCHEDULING", "STARTED_ON_SUBMIT"],
+        "group": user,
+        "job_id": int(raw_id),
+        "name": name,
+        "nodes": "None assigned" if start == "Unknown" else f"node{int(raw_id) % 500:03d}",
+        "partition": partition,
+        "priority": _no_value(int(raw_id) % 100_000),
+        "qos": "normal",
+        "state": {"current": [state.split(" ", 1)[0]], "reason": "None"},
+        "steps": [],
+        "submit_line": submit_line,
+        "time": {
+            "elapsed": parse_duration_to_seconds(elapsed),
+            "eligible": _epoch(submit, tzinfo),
+            "end": 0,
+            "limit": _no_value(2880),
+            "start": _epoch(start, tzinfo),
+            "submission": _epoch(submit, tzinfo),
+            "suspended": 0,
+        },
+        "tres": {"allocated": allocated, "requested": allocated},
+        "user": user,
+        "wckey": {"wckey": "", "flags": []},
+        "working_directory": f"/home/{user}",
+    }
+
+
+def _json_step(fields: list[str], tzinfo: ZoneInfo | None) -> dict[str, Any]:
+    job_id, raw_id, name, _, _, _, start, state, _, nodes, alloc_tres, elapsed = fields
+    job_number, _, step_id = raw_id.partition(".")
+    return {
+        "nodes": {"count": int(nodes), "range": f"node{int(job_number) % 500:03d}"},
+        "state": [state],
+        "step": {"id": {"job_id": int(job_number), "step_id": step_id}, "name": name},
+        "time": {
+            "elapsed": parse_duration_to_seconds(elapsed),
+            "start": _no_value(_epoch(start, tzinfo)),
+        },
+        "tres": {"allocated": _json_tres(alloc_tres)},
+    }
+
+
+def generate_sacct_json(
+    start: datetime,
+    end: datetime,
+    spec: WorkloadSpec | None = None,
+    *,
+    include_steps: bool = True,
+    users: Sequence[str] | None = None,
+    partitions: Sequence[str] | None = None,
+    now: datetime | None = None,
+    tzinfo: ZoneInfo | None = None,
+) -> Iterator[str]:
+    """Yield ``sacct --json`` output for the jobs of :func:`generate_sacct_lines`.
+
+    The document is produced piecewise, one job at a time.  Naive times are
+    local to ``tzinfo`` (the system zone by default) when converted to the
+    epoch seconds of the JSON format.
+    """
+
+    fields = _window_fields(
+        start,
+        end,
+        spec or WorkloadSpec(),
+        include_steps=include_steps,
+        users=users,
+        partitions=partitions,
+        now=now,
+    )
+    meta = {"plugin": {"type": "openapi/v0.0.39", "name": "Slurm OpenAPI v0.0.39"}}
+    yield f'{{\n  "meta": {json.dumps(meta)},\n  "jobs": [\n'
+    job = None
+    for row in fields:
+        if "." in row[0]:
+            job["steps"].append(_json_step(row, tzinfo))
+            continue
+        if job is not None:
+            yield json.dumps(job, indent=2) + ",\n"
+        job = _json_job(row, tzinfo)
+    if job is not None:
+        yield json.dumps(job, indent=2) + "\n"
+    yield '  ],\n  "warnings": [],\n  "errors": []\n}\n'
+
+
+def write_sacct_shim(directory: str | Path) -> Path:
+    """Write an executable ``sacct`` into ``directory`` that runs this module.
+
+    Prepending ``directory`` to ``PATH`` makes every ``sacct`` call of the
+    tool answer with synthetic rows (see :func:`run_fake_sacct`).  The same
+    is available as ``python -m slurm_waiting_times.synthetic install-shim DIR``.
+    """
+
+    path = Path(directory) / "sacct"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f'#!/bin/sh\nexec "{sys.executable}" -m slurm_waiting_times.synthetic "$@"\n')
+    path.chmod(0o755)
+    return path
+
+
+def _parse_sacct_arguments(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="sacct", description="Synthetic sacct stand-in.")
+    parser.add_argument("-S", "--starttime", required=True)
+    parser.add_argument("-E", "--endtime", required=True)
+    parser.add_argument("-X", "--allocations", action="store_true")
+    parser.add_argument("-u", "--user")
+    parser.add_argument("-r", "--partition")
+    parser.add_argument("-a", "--allusers", action="store_true")
+    parser.add_argument("-P", "--parsable2", action="store_true")
+    parser.add_argument("-n", "--noheader", action="store_true")
+    parser.add_argument("-o", "--format")
+    parser.add_argument("--json", action="store_true")
+    return parser.parse_args(argv)
+
+
+def _split(value: str | None) -> list[str] | None:
+    return value.split(",") if value else None
+
+
+def run_fake_sacct(argv: Sequence[str], out: TextIO) -> int:
+    """Answer a ``sacct`` command line with synthetic ``--parsable2`` or ``--json`` output.
+
+    The workload size and seed come from the :data:`JOBS_PER_DAY_ENV` and
+    :data:`SEED_ENV` environment variables.
+    """
+
+    args = _parse_sacct_arguments(argv)
+    spec = WorkloadSpec(
+        jobs_per_day=int(os.environ.get(JOBS_PER_DAY_ENV, DEFAULT_JOBS_PER_DAY)),
+        seed=int(os.environ.get(SEED_ENV, 0)),
+    )
+    generate = generate_sacct_json if args.json else generate_sacct_lines
+    output = generate(
+        datetime.fromisoformat(args.starttime),
+        datetime.fromisoformat(args.endtime),
+        spec,
+        include_steps=not args.allocations,
+        users=_split(args.user),
+        partitions=_split(args.partition),
+        now=datetime.now(),
+    )
+    if args.json:
+        out.writelines(output)
+    else:
+        out.writelines(f"{line}\n" for line in output)
+    return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["install-shim"]:
+        if len(argv) != 2:
+            print("usage: python -m slurm_waiting_times.synthetic install-shim DIR", file=sys.stderr)
+            return 2
+        print(write_sacct_shim(argv[1]))
+        return 0
+    return run_fake_sacct(argv, sys.stdout)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
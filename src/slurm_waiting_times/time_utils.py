@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-import math
 import calendar
+import functools
+import math
 import re
-from datetime import datetime
-from typing import Iterable
+from datetime import datetime, timedelta, tzinfo
+from typing import Iterable, List
 from zoneinfo import ZoneInfo
 
+import numpy as np
+
 
 def ensure_timezone(tz_name: str | None) -> ZoneInfo:
     """Return a :class:`~zoneinfo.ZoneInfo` instance for ``tz_name``.
@@ -72,6 +75,100 @@ def parse_datetime(value: str, tzinfo: ZoneInfo) -> datetime:
     return dt
 
 
+# sacct prints Submit/Start as ``YYYY-MM-DDTHH:MM:SS`` and many jobs share the
+# same values, so parsed timestamps are cached per raw string.
+TIMESTAMP_CACHE_SIZE = 65536
+
+
+@functools.lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def parse_sacct_timestamp(value: str, tzinfo: ZoneInfo) -> datetime:
+    """Parse a timestamp as printed by ``sacct`` into an aware datetime.
+
+    Values in sacct's fixed ``YYYY-MM-DDTHH:MM:SS`` format skip the format
+    probing of :func:`parse_datetime`; anything else falls back to it.
+    Results are cached per raw string and zone.
+    """
+
+    if len(value) == 19 and value[10] == "T":
+        try:
+            dt = datetime.fromisoformat(value)
+        except ValueError:
+            pass
+        else:
+            if dt.tzinfo is None:
+                return dt.replace(tzinfo=tzinfo)
+    return parse_datetime(value, tzinfo)
+
+
+@functools.lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def parse_epoch_seconds(value: str, tzinfo: ZoneInfo) -> int:
+    """Return the UTC epoch seconds of a sacct timestamp local to ``tzinfo``."""
+
+    return int(parse_sacct_timestamp(value, tzinfo).timestamp())
+
+
+def _hourly_offsets(
+    epochs: np.ndarray, tz: tzinfo
+) -> tuple[np.ndarray, np.ndarray, list[datetime], np.ndarray]:
+    """UTC offsets of ``epochs`` in ``tz``, looked up once per hour of the data.
+
+    Returns the offset in seconds of every value, the hour of every value as
+    an index into the per-hour lists, the first local time of each hour and
+    whether the offset is constant throughout each hour.
+    """
+
+    hours, inverse = np.unique(epochs // 3600, return_inverse=True)
+    offsets = np.empty(len(hours), dtype=np.int64)
+    firsts: list[datetime] = []
+    uniform = np.ones(len(hours), dtype=bool)
+    for index, hour in enumerate(hours.tolist()):
+        first = datetime.fromtimestamp(hour * 3600, tz)
+        last = datetime.fromtimestamp(hour * 3600 + 3599, tz)
+        offsets[index] = int(first.utcoffset().total_seconds())
+        firsts.append(first)
+        uniform[index] = first.utcoffset() == last.utcoffset()
+    return offsets[inverse], inverse, firsts, uniform
+
+
+def format_epochs(epochs: np.ndarray, tz: tzinfo) -> list[str]:
+    """Render UTC epoch seconds as ISO 8601 strings in ``tz``.
+
+    The result matches ``datetime.fromtimestamp(epoch, tz).isoformat()`` for
+    every value, but UTC offsets are looked up once per hour of the data
+    instead of once per value.
+    """
+
+    epochs = np.asarray(epochs, dtype=np.int64)
+    if not epochs.size:
+        return []
+
+    offsets, inverse, firsts, uniform = _hourly_offsets(epochs, tz)
+    suffixes = [first.isoformat()[19:] for first in firsts]
+    local = (epochs + offsets).astype("datetime64[s]")
+    texts = np.datetime_as_string(local, unit="s").tolist()
+    result = [text + suffixes[index] for text, index in zip(texts, inverse.tolist())]
+    if not uniform.all():
+        # The offset changes within these hours; such values are formatted one by one.
+        for position in np.flatnonzero(~uniform[inverse]).tolist():
+            result[position] = datetime.fromtimestamp(int(epochs[position]), tz).isoformat()
+    return result
+
+
+def local_dates(epochs: np.ndarray, tz: tzinfo) -> np.ndarray:
+    """Return the calendar dates in ``tz`` of UTC epoch seconds as ``datetime64[D]``."""
+
+    epochs = np.asarray(epochs, dtype=np.int64)
+    if not epochs.size:
+        return np.empty(0, dtype="datetime64[D]")
+
+    offsets, inverse, _firsts, uniform = _hourly_offsets(epochs, tz)
+    dates = (epochs + offsets).astype("datetime64[s]").astype("datetime64[D]")
+    if not uniform.all():
+        for position in np.flatnonzero(~uniform[inverse]).tolist():
+            dates[position] = datetime.fromtimestamp(int(epochs[position]), tz).date()
+    return dates
+
+
 _MONTH_ONLY_PATTERN = re.compile(r"^(?P<year>\d{4})-(?P<month>\d{2})$")
 
 
@@ -139,6 +236,41 @@ def parse_cli_datetime_window(
     return start_dt, end_dt
 
 
+SHARD_SIZES = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+
+def split_window(start: datetime, end: datetime, step: timedelta) -> List[tuple[datetime, datetime]]:
+    """Split ``start``-``end`` into consecutive sub-windows of at most ``step``.
+
+    Boundaries fall on midnight of ``start``'s day plus multiples of ``step``.
+    Day-sized shards therefore always cover whole calendar days, which is
+    what the per-day cache relies on; week-sized shards start on
+    ``start``'s weekday, so runs starting on different weekdays split
+    differently.  The first and last shard are clipped to the requested window.
+    """
+
+    if step <= timedelta(0):
+        raise ValueError("shard step must be positive")
+    if start > end:
+        raise ValueError("window start must not be after its end")
+
+    boundary = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while boundary <= start:
+        boundary += step
+
+    windows: List[tuple[datetime, datetime]] = []
+    shard_start = start
+    while boundary < end:
+        windows.append((shard_start, boundary))
+        shard_start = boundary
+        boundary += step
+    windows.append((shard_start, end))
+    return windows
+
+
 def format_timedelta_hms(seconds: float) -> str:
     """Format ``seconds`` as a human readable duration without seconds."""
 
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from slurm_waiting_times.aggregate import GroupedWaits, aggregate_waits, parse_group_keys
+from slurm_waiting_times.models import JobTable
+from slurm_waiting_times.processing import filter_rows, filter_table
+from slurm_waiting_times.sacct import parse_sacct_output, parse_sacct_table
+from slurm_waiting_times.stats import DDSketch, ExactStatistics
+from slurm_waiting_times.synthetic import WorkloadSpec, generate_sacct_lines
+
+QUANTILES = {"median": 0.5, "p90": 0.9, "p95": 0.95, "p99": 0.99}
+
+
+@pytest.fixture(scope="module")
+def sacct_text():
+    start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    spec = WorkloadSpec(jobs_per_day=1000, seed=5)
+    return "\n".join(generate_sacct_lines(start, start + timedelta(days=2), spec))
+
+
+@pytest.mark.parametrize("mode", ["exact", "approx"])
+def test_groups_match_per_group_statistics(sacct_text, mode):
+    jobs = filter_rows(parse_sacct_output(sacct_text, timezone="Europe/Berlin"))
+    table = filter_table(parse_sacct_table(sacct_text.splitlines(), timezone="Europe/Berlin"))
+    by = ["partition", "job_type", "day"]
+
+    expected = {}
+    for job in jobs:
+        key = (job.partition, job.job_type or "", job.start_time.date().isoformat())
+        statistics = expected.setdefault(key, ExactStatistics() if mode == "exact" else DDSketch())
+        statistics.add(job.wait_seconds)
+
+    from_rows = aggregate_waits(jobs, by, mode=mode)
+    from_table = aggregate_waits(table, by, mode=mode)
+
+    assert [summary.key for summary in from_rows] == sorted(expected)
+    for rows_summary, table_summary in zip(from_rows, from_table):
+        statistics = expected[rows_summary.key]
+        assert rows_summary.key == table_summary.key
+        assert rows_summary.count == table_summary.count == len(statistics)
+        assert rows_summary.mean == pytest.approx(table_summary.mean)
+        assert rows_summary.maximum == statistics.summary().maximum
+        for name, fraction in QUANTILES.items():
+            assert getattr(rows_summary, name) == pytest.approx(statistics.quantile(fraction))
+            assert getattr(table_summary, name) == pytest.approx(statistics.quantile(fraction))
+
+
+@pytest.mark.parametrize("mode", ["exact", "approx"])
+def test_merged_partials_equal_one_pass(sacct_text, mode):
+    table = parse_sacct_table(sacct_text.splitlines(), timezone="UTC")
+    half = len(table) // 2
+    first = GroupedWaits(["user", "state"], mode=mode)
+    second = GroupedWaits(["user", "state"], mode=mode)
+    first.update(table.take(np.arange(half)))
+    second.update(table.take(np.arange(half, len(table))))
+
+    first.merge(second)
+
+    assert first.summaries() == aggregate_waits(table, ["user", "state"], mode=mode)
+    with pytest.raises(ValueError):
+        first.merge(GroupedWaits(["user"], mode=mode))
+
+
+def test_many_groups_in_one_pass():
+    size = 200_000
+    users = np.arange(size) % 100_000
+    table = JobTable.from_columns(
+        job_id=[str(index) for index in range(size)],
+        job_id_raw=[str(index) for index in range(size)],
+        user=[f"user{user}" for user in users],
+        partition=["gpu"] * size,
+        state=["COMPLETED"] * size,
+        alloc_tres=[None] * size,
+        job_type=[None] * size,
+        slurm_job_type=[None] * size,
+        submit_epoch=np.zeros(size, dtype=np.int64),
+        start_epoch=users * 2 + np.arange(size) // 100_000,
+        nodes=np.ones(size, dtype=np.int32),
+        elapsed_seconds=np.zeros(size),
+        tzinfo=timezone.utc,
+    )
+
+    summaries = aggregate_waits(table, ["user", "partition", "job_type"])
+
+    assert len(summaries) == 100_000
+    first = summaries[0]
+    assert first.key == ("user0", "gpu", "")
+    assert (first.count, first.mean, first.median, first.maximum) == (2, 0.5, 0.5, 1.0)
+
+
+def test_parse_group_keys_rejects_unknown_and_repeated_keys():
+    assert parse_group_keys("user, day") == ["user", "day"]
+    with pytest.raises(ValueError, match="unknown group key"):
+        parse_group_keys("user,account")
+    with pytest.raises(ValueError, match="must not repeat"):
+        parse_group_keys("user,user")
+    with pytest.raises(ValueError, match="at least one"):
+        parse_group_keys(" , ")
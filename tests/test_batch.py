@@ -0,0 +1,131 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from slurm_waiting_times import cli
+from slurm_waiting_times.batch import ManifestError, load_manifest, shared_filter, window_mask
+from slurm_waiting_times.processing import build_job_table
+from slurm_waiting_times.sacct import parse_sacct_output
+
+SACCT_LINES = [
+    "1|1|a|sbatch a.sh|alice|2025-09-01T10:00:00|2025-09-01T10:05:00|COMPLETED|cpu|1|cpu=4,node=1|00:30:00",
+    "2|2|b|sbatch b.sh|bob|2025-09-02T10:00:00|2025-09-02T10:30:00|COMPLETED|gpu|1|cpu=8,node=1,gres/gpu=1|01:00:00",
+    "3|3|c|sbatch c.sh|carol|2025-09-20T10:00:00|2025-09-20T11:00:00|COMPLETED|gpu|2|cpu=64,node=2,gres/gpu=8|02:00:00",
+]
+
+
+def test_load_manifest_applies_defaults(tmp_path):
+    path = tmp_path / "reports.json"
+    path.write_text(
+        json.dumps(
+            {
+                "defaults": {"start": "2025-09-01", "end": "2025-09-30", "bins": 20},
+                "reports": [
+                    {"partition": "gpu,cpu"},
+                    {"user": ["alice"], "job_type": "1-gpu", "bins": 10},
+                ],
+            }
+        )
+    )
+
+    first, second = load_manifest(path)
+    assert first.partition == ["gpu", "cpu"]
+    assert first.bins == 20
+    assert second.user == ["alice"]
+    assert second.job_type == "1-gpu"
+    assert second.bins == 10
+    assert second.start == "2025-09-01"
+
+
+def test_load_manifest_reads_toml_dates(tmp_path):
+    pytest.importorskip("tomllib")
+    path = tmp_path / "reports.toml"
+    path.write_text(
+        "[defaults]\nstart = 2025-09-01\n\n[[reports]]\nslurm_job_type = \"batch\"\n"
+    )
+    (spec,) = load_manifest(path)
+    assert spec.start == "2025-09-01"
+    assert spec.slurm_job_type == "batch"
+
+
+@pytest.mark.parametrize(
+    "report, message",
+    [
+        ({"partitions": "gpu"}, "unknown report key"),
+        ({"job_type": "gpu"}, "job_type must be one of"),
+        ({"bins": 0}, "bins must be a positive integer"),
+        ({"include_steps": "yes"}, "include_steps must be true or false"),
+        ({"group_by": "user,account"}, "group_by: unknown group key"),
+    ],
+)
+def test_load_manifest_rejects_invalid_reports(tmp_path, report, message):
+    path = tmp_path / "reports.json"
+    path.write_text(json.dumps({"reports": [report]}))
+    with pytest.raises(ManifestError, match=message):
+        load_manifest(path)
+
+
+def test_shared_filter_only_for_identical_literals():
+    assert shared_filter([["gpu"], ["gpu"]]) == ["gpu"]
+    assert shared_filter([["gpu"], ["cpu"]]) is None
+    assert shared_filter([["gpu"], None]) is None
+    assert shared_filter([["gpu*"], ["gpu*"]]) is None
+
+
+def test_window_mask_selects_jobs_active_in_window():
+    table = build_job_table(parse_sacct_output("\n".join(SACCT_LINES), timezone="UTC"))
+    mask = window_mask(
+        table,
+        datetime(2025, 9, 2, tzinfo=timezone.utc),
+        datetime(2025, 9, 3, tzinfo=timezone.utc),
+    )
+    assert mask.tolist() == [False, True, False]
+
+
+def test_batch_fetches_once_and_writes_every_report(tmp_path, monkeypatch):
+    pytest.importorskip("matplotlib")
+    manifest = tmp_path / "reports.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "defaults": {"start": "2025-09-01", "end": "2025-09-10"},
+                "reports": [
+                    {"partition": "gpu", "group_by": ["user", "day"]},
+                    {"job_type": "cpu-only"},
+                    {"start": "2025-09-15", "end": "2025-09-30", "partition": "gpu"},
+                ],
+            }
+        )
+    )
+    commands = []
+
+    def fake_stream(command):
+        commands.append(command)
+        return iter(SACCT_LINES)
+
+    monkeypatch.setattr(cli, "stream_sacct", fake_stream)
+    monkeypatch.chdir(tmp_path)
+
+    assert cli.main(["batch", str(manifest), "--tz", "UTC"]) == 0
+
+    assert len(commands) == 1
+    command = commands[0]
+    assert command[command.index("-S") + 1] == "2025-09-01T00:00:00"
+    assert command[command.index("-E") + 1] == "2025-09-30T00:00:00"
+    assert "--partition" not in command
+
+    outputs = sorted(path.name for path in (tmp_path / "output").iterdir())
+    expected = [
+        f"{prefix}-waiting-times{suffix}"
+        for prefix in (
+            "start=2025-09-01_end=2025-09-10_user=all_partition=gpu",
+            "start=2025-09-01_end=2025-09-10_user=all_jobtype=cpu-only",
+            "start=2025-09-15_end=2025-09-30_user=all_partition=gpu",
+        )
+        for suffix in (".csv", ".png", "-bins.csv")
+    ]
+    expected.append("start=2025-09-01_end=2025-09-10_user=all_partition=gpu-waiting-times-groups.csv")
+    assert outputs == sorted(expected)
+    gpu_csv = tmp_path / "output" / "start=2025-09-15_end=2025-09-30_user=all_partition=gpu-waiting-times.csv"
+    assert len(gpu_csv.read_text().splitlines()) == 2
@@ -0,0 +1,200 @@
+import io
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from slurm_waiting_times.cache import JobCache, cache_scope, fetch_since_last_run, fetch_with_cache
+from slurm_waiting_times.synthetic import JOBS_PER_DAY_ENV, run_fake_sacct
+
+
+TZ = ZoneInfo("UTC")
+
+
+class FakeSacct:
+    def __init__(self):
+        self.windows = []
+
+    def __call__(self, command):
+        window_start = command[command.index("-S") + 1]
+        self.windows.append(window_start)
+        day = window_start[:10]
+        return [
+            f"{day}|{day}|job||alice|{day}T10:00:00|{day}T10:05:00|COMPLETED|cpu|1|cpu=1|00:01:00",
+        ]
+
+
+def test_fetch_with_cache_reuses_settled_days(tmp_path):
+    start = datetime(2025, 9, 1, tzinfo=TZ)
+    end = datetime(2025, 9, 3, 23, 59, 59, tzinfo=TZ)
+    fake = FakeSacct()
+
+    with JobCache(tmp_path / "jobs.sqlite") as cache:
+        first = fetch_with_cache(
+            cache, start, end, timezone="UTC", now=datetime(2025, 9, 4, 12, tzinfo=TZ), runner=fake
+        )
+    with JobCache(tmp_path / "jobs.sqlite") as cache:
+        second = fetch_with_cache(
+            cache, start, end, timezone="UTC", now=datetime(2025, 9, 10, tzinfo=TZ), runner=fake
+        )
+
+    # 2025-09-03 had not settled during the first run and is fetched again.
+    assert fake.windows == [
+        "2025-09-01T00:00:00",
+        "2025-09-02T00:00:00",
+        "2025-09-03T00:00:00",
+        "2025-09-03T00:00:00",
+    ]
+    assert [row.job_id for row in first] == ["2025-09-01", "2025-09-02", "2025-09-03"]
+    assert [row.job_id for row in second] == [row.job_id for row in first]
+    assert second[0].submit_time == first[0].submit_time
+    assert second[0].elapsed_seconds == 60
+    assert second[0].alloc_tres == "cpu=1"
+
+
+def test_fetch_with_cache_always_fetches_partial_days(tmp_path):
+    start = datetime(2025, 9, 1, 12, tzinfo=TZ)
+    end = datetime(2025, 9, 2, 23, 59, 59, tzinfo=TZ)
+    now = datetime(2025, 9, 10, tzinfo=TZ)
+    fake = FakeSacct()
+
+    with JobCache(tmp_path / "jobs.sqlite") as cache:
+        fetch_with_cache(cache, start, end, timezone="UTC", now=now, runner=fake)
+        fetch_with_cache(cache, start, end, timezone="UTC", now=now, runner=fake)
+
+    assert fake.windows == [
+        "2025-09-01T12:00:00",
+        "2025-09-02T00:00:00",
+        "2025-09-01T12:00:00",
+    ]
+
+
+def test_cache_scope_depends_on_filters():
+    assert cache_scope(users=["bob", "alice"], timezone="UTC") == cache_scope(
+        users=["alice", "bob"], timezone="UTC"
+    )
+    assert cache_scope(timezone="UTC") != cache_scope(include_steps=True, timezone="UTC")
+    assert cache_scope(timezone="UTC") != cache_scope(timezone="Europe/Berlin")
+
+
+def test_fetch_since_last_run_only_requests_delta(tmp_path):
+    start = datetime(2025, 9, 1, tzinfo=TZ)
+    end = datetime(2025, 9, 30, 23, 59, 59, tzinfo=TZ)
+    fake = FakeSacct()
+
+    with JobCache(tmp_path / "jobs.sqlite") as cache:
+        first = fetch_since_last_run(
+            cache, start, end, timezone="UTC", now=datetime(2025, 9, 2, tzinfo=TZ), runner=fake
+        )
+        second = fetch_since_last_run(
+            cache, start, end, timezone="UTC", now=datetime(2025, 9, 3, tzinfo=TZ), runner=fake
+        )
+
+    # The second run starts at the latest ingested Start (2025-09-01T10:05).
+    assert fake.windows == ["2025-09-01T00:00:00", "2025-09-01T10:05:00"]
+    assert [row.job_id for row in first] == ["2025-09-01"]
+    assert [row.job_id for row in second] == ["2025-09-01"]
+    assert second[0].submit_time == first[0].submit_time
+
+
+def test_fetch_since_last_run_refetches_when_window_moves_back(tmp_path):
+    now = datetime(2025, 9, 10, tzinfo=TZ)
+    fake = FakeSacct()
+
+    with JobCache(tmp_path / "jobs.sqlite") as cache:
+        fetch_since_last_run(
+            cache, datetime(2025, 9, 5, tzinfo=TZ), now, timezone="UTC", now=now, runner=fake
+        )
+        fetch_since_last_run(
+            cache, datetime(2025, 9, 1, tzinfo=TZ), now, timezone="UTC", now=now, runner=fake
+        )
+
+    assert fake.windows == ["2025-09-05T00:00:00", "2025-09-01T00:00:00"]
+
+
+def _synthetic_sacct(command):
+    out = io.StringIO()
+    run_fake_sacct(command[1:], out)
+    return out.getvalue().splitlines()
+
+
+def test_fetch_since_last_run_fills_gap_after_high_water_mark(tmp_path, monkeypatch):
+    monkeypatch.setenv(JOBS_PER_DAY_ENV, "50")
+    now = datetime(2025, 2, 1, tzinfo=TZ)
+
+    def fetch(cache, start_day, end_day):
+        return fetch_since_last_run(
+            cache,
+            datetime(2025, 1, start_day, tzinfo=TZ),
+            datetime(2025, 1, end_day, tzinfo=TZ),
+            timezone="UTC",
+            now=now,
+            runner=_synthetic_sacct,
+        )
+
+    with JobCache(tmp_path / "incremental.sqlite") as cache:
+        fetch(cache, 1, 2)
+        fetch(cache, 10, 11)
+        incremental = fetch(cache, 1, 11)
+    with JobCache(tmp_path / "fresh.sqlite") as cache:
+        fresh = fetch(cache, 1, 11)
+
+    assert len(fresh) > 400
+    assert sorted(row.job_id for row in incremental) == sorted(row.job_id for row in fresh)
+
+
+class ActiveJobsSacct:
+    """Return the scripted jobs active in the ``-S``/``-E`` window, like sacct."""
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.windows = []
+
+    def __call__(self, command):
+        lower = command[command.index("-S") + 1]
+        upper = command[command.index("-E") + 1]
+        self.windows.append((lower, upper))
+        return [
+            f"{job_id}|{job_id}|job||alice|{submit}|{start}|COMPLETED|cpu|1|cpu=1|01:00:00"
+            for job_id, submit, start in self.jobs
+            if submit <= upper and start >= lower
+        ]
+
+
+def test_fetch_since_last_run_caps_high_water_mark_at_window_end(tmp_path):
+    now = datetime(2025, 2, 1, tzinfo=TZ)
+    fake = ActiveJobsSacct(
+        [
+            ("1", "2025-01-02T00:00:00", "2025-01-08T00:00:00"),
+            ("2", "2025-01-04T00:00:00", "2025-01-05T00:00:00"),
+        ]
+    )
+
+    def fetch(cache, start_day, end_day):
+        return fetch_since_last_run(
+            cache,
+            datetime(2025, 1, start_day, tzinfo=TZ),
+            datetime(2025, 1, end_day, tzinfo=TZ),
+            timezone="UTC",
+            now=now,
+            runner=fake,
+        )
+
+    with JobCache(tmp_path / "jobs.sqlite") as cache:
+        first = fetch(cache, 1, 3)
+        second = fetch(cache, 1, 11)
+        high_water = cache.watermarks(cache_scope(timezone="UTC"))[1]
+        # Moving the window back must not lower the mark again.
+        fetch_since_last_run(
+            cache,
+            datetime(2024, 12, 31, tzinfo=TZ),
+            datetime(2025, 1, 2, tzinfo=TZ),
+            timezone="UTC",
+            now=now,
+            runner=fake,
+        )
+        assert cache.watermarks(cache_scope(timezone="UTC"))[1] == high_water
+
+    # Job 1 is active in the first window but starts after it.
+    assert first == []
+    assert fake.windows[1][0] == "2025-01-03T00:00:00"
+    assert [row.job_id for row in second] == ["2", "1"]
+    assert high_water == datetime(2025, 1, 8, tzinfo=TZ)
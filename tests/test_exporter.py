@@ -0,0 +1,95 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.request import urlopen
+
+from slurm_waiting_times import cli
+from slurm_waiting_times.exporter import render_metrics
+from slurm_waiting_times.processing import build_job_table
+from slurm_waiting_times.sacct import parse_sacct_output
+from slurm_waiting_times.server import DatasetRefresher, DatasetSnapshot
+
+LINES = [
+    "1|1|a|sbatch a.sh|alice|2025-09-01T10:00:00|2025-09-01T10:00:30|COMPLETED|cpu|1|cpu=4,node=1|00:30:00",
+    "2|2|b|sbatch b.sh|bob|2025-09-01T11:00:00|2025-09-01T12:00:00|COMPLETED|gpu|1|cpu=8,node=1,gres/gpu=1|01:00:00",
+    "3|3|c|sbatch c.sh|bob|2025-09-01T12:00:00|2025-09-01T12:20:00|COMPLETED|gpu|1|cpu=8,node=1,gres/gpu=1|02:00:00",
+    '4|4|d|sbatch d.sh|carol|2025-09-01T12:00:00|2025-09-01T12:02:00|COMPLETED|odd"name|1||00:10:00',
+]
+
+
+def _snapshot(table):
+    now = datetime(2025, 9, 2, tzinfo=timezone.utc)
+    return DatasetSnapshot(
+        table=table,
+        start=now - timedelta(days=1),
+        end=now,
+        refreshed_at=now,
+        generation=1,
+        load_seconds=1.5,
+    )
+
+
+def test_render_metrics_histograms_and_quantiles():
+    table = build_job_table(parse_sacct_output("\n".join(LINES), timezone="UTC"))
+    text = render_metrics(table, _snapshot(table), buckets=(60, 3600)).decode()
+    lines = text.splitlines()
+
+    gpu = 'partition="gpu",job_type="1-gpu"'
+    assert f'slurm_job_wait_seconds_bucket{{{gpu},le="60.0"}} 0' in lines
+    assert f'slurm_job_wait_seconds_bucket{{{gpu},le="3600.0"}} 2' in lines
+    assert f'slurm_job_wait_seconds_bucket{{{gpu},le="+Inf"}} 2' in lines
+    assert f"slurm_job_wait_seconds_count{{{gpu}}} 2" in lines
+    assert f"slurm_job_wait_seconds_sum{{{gpu}}} 4800.0" in lines
+    assert 'slurm_partition_wait_seconds{partition="gpu",quantile="0.5"} 2400.0' in lines
+    assert 'slurm_job_type_wait_seconds_count{job_type="cpu-only"} 2' in lines
+    assert 'slurm_partition_wait_seconds_count{partition="odd\\"name"} 1' in lines
+    assert "slurm_wait_exporter_jobs 4" in lines
+    assert "slurm_wait_exporter_refresh_duration_seconds 1.5" in lines
+    assert lines[-1] == "# EOF"
+
+
+def test_refresh_interval_adapts_to_fetch_duration():
+    refresher = DatasetRefresher(
+        lambda start, end: None,
+        window=timedelta(days=1),
+        interval=60,
+        load_factor=10,
+        max_interval=900,
+        clock=lambda: datetime.now(timezone.utc),
+    )
+    refresher.last_duration = 2
+    assert refresher.next_interval() == 60
+    refresher.last_duration = 30
+    assert refresher.next_interval() == 300
+    refresher.last_duration = 300
+    assert refresher.next_interval() == 900
+
+
+def test_scrapes_are_served_from_the_snapshot(tmp_path, monkeypatch):
+    day = (datetime.now(timezone.utc) - timedelta(hours=12)).strftime("%Y-%m-%d")
+    script = tmp_path / "sacct"
+    script.write_text(
+        "#!/bin/sh\n"
+        'echo "$@" >> "$(dirname "$0")/calls.log"\n'
+        + "".join(
+            f'echo "{line.replace("2025-09-01", day)}"\n'
+            for line in LINES[:3]
+        )
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    args = cli.parse_exporter_arguments(["--port", "0", "--tz", "UTC", "--window-days", "2"])
+    server, _ = cli._create_exporter(args)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    try:
+        for _ in range(3):
+            with urlopen(f"http://{host}:{port}/metrics") as response:
+                assert response.headers["Content-Type"].startswith("application/openmetrics-text")
+                body = response.read().decode()
+        assert "slurm_wait_exporter_jobs 3" in body
+        assert len((tmp_path / "calls.log").read_text().splitlines()) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -1,16 +1,22 @@
+import pickle
 from datetime import datetime, timedelta, timezone
 
+import numpy as np
 import pytest
 
 pytest.importorskip("matplotlib")
 from matplotlib import pyplot as plt
 
 from slurm_waiting_times.histogram import (
+    _bin_counts,
     _format_time_value,
+    _logspace_edges,
+    bin_histogram,
     create_histogram,
     prepare_histogram_values,
+    render_histogram,
 )
-from slurm_waiting_times.models import JobRecord
+from slurm_waiting_times.models import JobRecord, JobTable
 
 
 BASE = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
@@ -67,3 +73,64 @@ def test_format_time_value_rounds_to_minutes():
 def test_format_time_value_includes_days():
     total_seconds = (1 * 24 * 60 + 2 * 60 + 30) * 60
     assert _format_time_value(total_seconds) == "1-02:30"
+
+
+def test_create_histogram_accepts_job_table():
+    table = JobTable.from_columns(
+        job_id=["1", "2"],
+        job_id_raw=["1", "2"],
+        user=["alice", "alice"],
+        partition=["gpu", "gpu"],
+        state=["COMPLETED", "COMPLETED"],
+        alloc_tres=[None, None],
+        job_type=["cpu-only", "cpu-only"],
+        slurm_job_type=[None, None],
+        submit_epoch=[0, 0],
+        start_epoch=[300, 900],
+        nodes=[1, 1],
+        elapsed_seconds=[None, None],
+        tzinfo=timezone.utc,
+    )
+
+    assert prepare_histogram_values(table, use_seconds=False) == [5.0, 15.0]
+    fig = create_histogram(table, use_seconds=False, bins=2, title="Example")
+    assert pytest.approx(fig.axes[0].lines[0].get_xdata()[0], rel=1e-6) == 10.0
+    fig.clf()
+    plt.close(fig)
+
+
+def test_bin_counts_match_numpy_histogram():
+    rng = np.random.default_rng(7)
+    values = rng.lognormal(mean=3, sigma=2, size=5000)
+    edges = _logspace_edges(values.min(), values.max(), bin_count=40)
+    expected, _ = np.histogram(values, bins=edges)
+    counts = _bin_counts(values, edges)
+    assert counts.tolist() == expected.tolist()
+    assert counts.sum() == len(values)
+
+
+def test_bin_histogram_splits_tail_and_counts_every_job():
+    records = [make_record(minutes) for minutes in range(1, 101)]
+    data = bin_histogram(records, use_seconds=False, bins=10)
+    assert data.tail is not None
+    assert data.typical.counts.sum() + data.tail.counts.sum() == 100
+    assert data.tail.counts.sum() == 5
+    assert len(data.typical.counts) == 10
+    assert len(data.tail.counts) == 5
+
+    rows = list(data.bin_rows())
+    assert rows[0][0] == "typical"
+    assert rows[0][1] == pytest.approx(60.0)
+    assert rows[-1][0] == "tail"
+    assert rows[-1][2] == pytest.approx(6000.0)
+
+
+def test_render_histogram_from_pickled_bins():
+    records = [make_record(0), make_record(5), make_record(15)]
+    data = pickle.loads(pickle.dumps(bin_histogram(records, bins=4)))
+    fig = render_histogram(data, title="Example")
+    ax = fig.axes[0]
+    assert ax.patches, "Expected a stairs patch"
+    assert fig._suptitle.get_text() == "Example"
+    fig.clf()
+    plt.close(fig)
@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from slurm_waiting_times.models import Categorical, JobTable, StringPool
+
+
+def make_table() -> JobTable:
+    return JobTable.from_columns(
+        job_id=["1", "1.batch", "2_7"],
+        job_id_raw=["1", "1", "9"],
+        user=["alice", "alice", "bob"],
+        partition=["gpu", "gpu", "cpu"],
+        state=["COMPLETED", "COMPLETED", "FAILED"],
+        alloc_tres=["gres/gpu=1", None, None],
+        job_type=["1-gpu", "cpu-only", "cpu-only"],
+        slurm_job_type=["batch", "batch", None],
+        submit_epoch=[1714557600, 1714557600, 1714561200],
+        start_epoch=[1714557900, 1714557900, 1714561260],
+        nodes=[1, None, 2],
+        elapsed_seconds=[600, None, 30],
+        tzinfo=timezone.utc,
+    )
+
+
+def test_string_pool_round_trips_and_takes():
+    pool = StringPool.from_strings(["a", "bcd", "", "é"])
+
+    assert list(pool) == ["a", "bcd", "", "é"]
+    assert pool[1] == "bcd"
+    assert list(pool.take(np.array([3, 0]))) == ["é", "a"]
+
+
+def test_categorical_encodes_missing_values():
+    column = Categorical.from_values(["x", None, "y", "x"])
+
+    assert column.categories == ("x", "y")
+    assert column.codes.tolist() == [0, -1, 1, 0]
+    assert list(column) == ["x", None, "y", "x"]
+    assert column.equals("x").tolist() == [True, False, False, True]
+    assert not column.equals("z").any()
+
+
+def test_job_table_materialises_records():
+    table = make_table()
+
+    record = table.record(1)
+
+    assert len(table) == 3
+    assert record.job_id == "1.batch"
+    assert record.submit_time == datetime(2024, 5, 1, 10, 0, tzinfo=timezone.utc)
+    assert record.wait_seconds == 300
+    assert record.nodes is None
+    assert record.elapsed_seconds is None
+    assert record.alloc_tres is None
+    assert table.is_step.tolist() == [False, True, False]
+
+
+def test_job_table_take_accepts_masks():
+    table = make_table()
+
+    subset = table.take(np.array([True, False, True]))
+
+    assert [record.job_id for record in subset] == ["1", "2_7"]
+    assert subset.nodes.tolist() == [1, 2]
+    assert subset.user.categories == table.user.categories
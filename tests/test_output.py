@@ -1,6 +1,17 @@
-from datetime import datetime
+import json
+from datetime import datetime, timedelta, timezone
 
-from slurm_waiting_times.output import build_prefix, compact_args
+from slurm_waiting_times.aggregate import GroupSummary
+from slurm_waiting_times.histogram import bin_histogram
+from slurm_waiting_times.models import SacctRow
+from slurm_waiting_times.output import (
+    build_prefix,
+    compact_args,
+    write_group_summaries,
+    write_histogram_bins_csv,
+    write_results_csv,
+)
+from slurm_waiting_times.processing import build_job_table, filter_rows
 
 
 def test_compact_args_sanitises_and_truncates():
@@ -27,3 +38,91 @@ def test_build_prefix_falls_back_to_date():
     now = datetime(2024, 5, 1, 12, 30)
     prefix = build_prefix(now, [])
     assert prefix == "2024-05-01"
+
+
+def test_write_results_csv_accepts_job_table(tmp_path):
+    submit = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    rows = [
+        SacctRow(
+            job_id=job_id,
+            job_id_raw=job_id,
+            job_name=None,
+            submit_line=None,
+            user="alice",
+            submit_time=submit,
+            start_time=submit + timedelta(minutes=wait),
+            state="COMPLETED",
+            partition="gpu",
+            nodes=nodes,
+            alloc_tres=alloc_tres,
+            elapsed_seconds=60,
+        )
+        for job_id, wait, nodes, alloc_tres in [("1", 5, 1, "gres/gpu=1"), ("2", 10, None, None)]
+    ]
+
+    write_results_csv(tmp_path / "records.csv", filter_rows(rows))
+    write_results_csv(tmp_path / "table.csv", filter_rows(build_job_table(rows)))
+
+    assert (tmp_path / "table.csv").read_text() == (tmp_path / "records.csv").read_text()
+
+
+def test_write_histogram_bins_csv(tmp_path):
+    submit = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    rows = [
+        SacctRow(
+            job_id=str(wait),
+            job_id_raw=str(wait),
+            job_name=None,
+            submit_line=None,
+            user="alice",
+            submit_time=submit,
+            start_time=submit + timedelta(minutes=wait),
+            state="COMPLETED",
+            partition="gpu",
+            nodes=1,
+            alloc_tres=None,
+            elapsed_seconds=60,
+        )
+        for wait in (1, 2, 4)
+    ]
+    path = tmp_path / "bins.csv"
+    write_histogram_bins_csv(path, bin_histogram(filter_rows(rows), bins=2))
+
+    lines = path.read_text().splitlines()
+    assert lines[0] == "Panel,LowerSeconds,UpperSeconds,Jobs"
+    assert lines[1].startswith("typical,60.00,")
+    assert sum(int(line.rsplit(",", 1)[1]) for line in lines[1:]) == 3
+
+
+def test_write_group_summaries_as_csv_and_json(tmp_path):
+    summaries = [
+        GroupSummary(("alice", "gpu"), 2, 30.0, 30.0, 54.0, 57.0, 59.4, 60.0),
+        GroupSummary(("bob", ""), 1, 5.0, 5.0, 5.0, 5.0, 5.0, 5.0),
+    ]
+
+    write_group_summaries(tmp_path / "groups.csv", ["user", "partition"], summaries)
+    write_group_summaries(
+        tmp_path / "groups.json", ["user", "partition"], summaries, output_format="json"
+    )
+
+    lines = (tmp_path / "groups.csv").read_text().splitlines()
+    assert lines[0] == (
+        "User,Partition,Jobs,MeanSeconds,MedianSeconds,P90Seconds,P95Seconds,P99Seconds,MaxSeconds"
+    )
+    assert lines[1] == "alice,gpu,2,30.00,30.00,54.00,57.00,59.40,60.00"
+    assert lines[2] == "bob,,1,5.00,5.00,5.00,5.00,5.00,5.00"
+    document = json.loads((tmp_path / "groups.json").read_text())
+    assert document["group_by"] == ["user", "partition"]
+    assert document["groups"][0] == {
+        "user": "alice",
+        "partition": "gpu",
+        "jobs": 2,
+        "wait_seconds": {
+            "mean": 30.0,
+            "median": 30.0,
+            "p90": 54.0,
+            "p95": 57.0,
+            "p99": 59.4,
+            "max": 60.0,
+        },
+    }
@@ -1,7 +1,21 @@
+import fnmatch
 from datetime import datetime, timedelta, timezone
 
-from slurm_waiting_times.models import SacctRow
-from slurm_waiting_times.processing import RuntimeConstraint, determine_job_type, filter_rows
+import pytest
+
+from slurm_waiting_times.models import FilteredJobs, JobRecord, SacctRow
+from slurm_waiting_times.processing import (
+    PatternMatcher,
+    RuntimeConstraint,
+    SlurmJobTypeClassifier,
+    build_job_table,
+    clear_job_type_caches,
+    determine_job_type,
+    filter_rows,
+    job_type_cache_info,
+    wait_values,
+)
+from slurm_waiting_times.sacct import parse_sacct_output, parse_sacct_table
 
 
 TZ = timezone.utc
@@ -161,3 +175,151 @@ def test_filter_rows_runtime_filters():
     filtered = filter_rows(rows, runtime_filters=constraints)
 
     assert [record.job_id for record in filtered] == ["short"]
+
+
+def test_filter_rows_on_job_table_matches_object_path():
+    rows = [
+        make_row("100", 0, 5, user="alice", partition="gpu-a", submit_line="sbatch job.sh"),
+        make_row("100.batch", 0, 5, user="alice", partition="gpu-a"),
+        make_row("200", 0, 50, user="bob", partition="gpu-b", alloc_tres=None, submit_line="salloc"),
+        make_row("300", 0, 90, user="carol", partition="cpu", nodes=2, elapsed_seconds=None),
+        make_row("400", 0, 20, user="alice", partition="gpu-a", elapsed_seconds=4000),
+    ]
+    cases = [
+        {},
+        {"include_steps": True},
+        {"user_filters": ["al*"], "partition_filters": ["gpu*"]},
+        {"job_type": "cpu-only"},
+        {"slurm_job_type": "batch"},
+        {"max_wait_hours": 0.5},
+        {"runtime_filters": [RuntimeConstraint(min_seconds=600, min_inclusive=False)]},
+    ]
+
+    table = build_job_table(rows)
+    for kwargs in cases:
+        expected = filter_rows(rows, **kwargs)
+        actual = list(filter_rows(table, **kwargs))
+        assert [record.job_id for record in actual] == [record.job_id for record in expected]
+        assert [record.wait_seconds for record in actual] == [
+            record.wait_seconds for record in expected
+        ]
+        assert [record.job_type for record in actual] == [record.job_type for record in expected]
+        assert [record.slurm_job_type for record in actual] == [
+            record.slurm_job_type for record in expected
+        ]
+
+
+def test_wait_seconds_span_dst_changes_on_every_path():
+    # Berlin clocks jump from 02:00 to 03:00 on 2025-03-30: one real hour passes.
+    line = (
+        "500|500|job|sbatch job.sh|alice|2025-03-30T01:30:00|2025-03-30T03:30:00"
+        "|COMPLETED|cpu|1|cpu=1|00:10:00"
+    )
+    rows = parse_sacct_output(line, timezone="Europe/Berlin")
+
+    assert [job.wait_seconds for job in filter_rows(rows)] == [3600]
+    assert [job.wait_seconds for job in filter_rows(build_job_table(rows))] == [3600]
+    table = parse_sacct_table([line], timezone="Europe/Berlin")
+    assert [job.wait_seconds for job in filter_rows(table)] == [3600]
+
+
+def test_build_job_table_job_types_match_determine_job_type():
+    rows = [
+        make_row(str(index), 0, 5, alloc_tres=alloc_tres, nodes=nodes)
+        for index, (alloc_tres, nodes) in enumerate(
+            [
+                (None, 1),
+                (None, None),
+                ("gres/gpu=1", 1),
+                ("gres/gpu:a100=4", None),
+                ("gres/gpu=4", 1),
+                ("gres/gpu=4", 0),
+                ("gpu:2", 3),
+                ("cpu=4,mem=8G", 2),
+            ]
+        )
+    ]
+
+    table = build_job_table(rows)
+
+    assert list(table.job_type) == [determine_job_type(row) for row in rows]
+
+
+def test_job_typing_is_memoised_per_distinct_tres():
+    clear_job_type_caches()
+    rows = [make_row(str(index), 0, 5, alloc_tres="gres/gpu=4", nodes=1) for index in range(50)]
+
+    filter_rows(rows)
+
+    info = job_type_cache_info()
+    assert info["job_type"].misses == 1
+    assert info["job_type"].hits == 49
+    assert info["count_gpus"].misses == 1
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["alice", "alicia", "bob", "gpu-a100", "gpu", "cpu[1]", "x", "ALICE", "a.b", "a\nb"],
+)
+def test_pattern_matcher_agrees_with_fnmatch(value):
+    patterns = ["alice", "gpu-*", "b?b", "cpu[[]1]", "a.b", "[!z]"]
+
+    matcher = PatternMatcher(patterns)
+
+    expected = any(fnmatch.fnmatch(value, pattern) for pattern in patterns)
+    assert matcher(value) is expected
+    assert matcher(value) is expected
+
+
+def test_filter_rows_resolves_slurm_job_type_from_later_steps_in_one_pass():
+    def rows():
+        yield make_row("300", 0, 5, submit_line="srun hostname")
+        yield make_row("301", 0, 5, submit_line=None)
+        yield make_row("300.batch", 0, 5)
+        yield make_row("301.0", 0, 5)
+
+    filtered = filter_rows(rows())
+
+    assert [(record.job_id, record.slurm_job_type) for record in filtered] == [
+        ("300", "batch"),
+        ("301", "interactive"),
+    ]
+
+
+def test_slurm_job_type_classifier_prefers_sbatch_submit_lines():
+    classifier = SlurmJobTypeClassifier()
+    classifier.observe(make_row("400", 0, 5, submit_line="  SBATCH run.sh"))
+    classifier.observe(make_row("401", 0, 5, submit_line="salloc -N1"))
+    classifier.observe(make_row("402", 0, 5, submit_line="   "))
+
+    assert classifier.resolve("400") == "batch"
+    assert classifier.resolve("401") == "interactive"
+    assert classifier.resolve("402") is None
+    assert classifier.resolve("unknown") is None
+
+
+def test_filter_rows_references_rows_instead_of_copying():
+    rows = [
+        make_row("10", 0, 5, submit_line="sbatch job.sh"),
+        make_row("10.batch", 0, 5),
+        make_row("11", 0, 30, alloc_tres=None, submit_line="salloc"),
+    ]
+
+    jobs = filter_rows(rows, slurm_job_type="batch")
+
+    assert isinstance(jobs, FilteredJobs)
+    assert jobs.rows == [rows[0]] and jobs.rows[0] is rows[0]
+    job = jobs[0]
+    assert (job.job_id, job.user, job.submit_time) == ("10", "alice", rows[0].submit_time)
+    assert (job.wait_seconds, job.job_type, job.slurm_job_type) == (300.0, "1-gpu", "batch")
+    assert wait_values(jobs) == [300.0]
+    assert [view.row for view in filter_rows(rows)] == [rows[0], rows[2]]
+
+
+def test_job_records_remain_usable_as_filtered_jobs():
+    row = make_row("1", 0, 7)
+    fields = {name: getattr(row, name) for name in SacctRow.__dataclass_fields__}
+    record = JobRecord(**fields, wait_seconds=420.0)
+
+    assert wait_values([record]) == [420.0]
+    assert record.job_type is None
@@ -0,0 +1,67 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from slurm_waiting_times.histogram import bin_histogram
+from slurm_waiting_times.models import JobRecord
+from slurm_waiting_times.render import RenderJob, render_figures
+
+BASE = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def make_record(wait_minutes: float) -> JobRecord:
+    return JobRecord(
+        job_id="1",
+        job_id_raw="1",
+        job_name=None,
+        submit_line=None,
+        user="alice",
+        submit_time=BASE,
+        start_time=BASE + timedelta(minutes=wait_minutes),
+        state="COMPLETED",
+        partition="gpu",
+        nodes=1,
+        alloc_tres=None,
+        elapsed_seconds=None,
+        wait_seconds=wait_minutes * 60,
+        job_type=None,
+        slurm_job_type=None,
+    )
+
+
+def _jobs(tmp_path, count):
+    data = bin_histogram([make_record(minutes) for minutes in (1, 5, 30, 90)], bins=4)
+    return [
+        RenderJob(data=data, title=f"Report {index}", path=tmp_path / f"report-{index}.png")
+        for index in range(count)
+    ]
+
+
+def test_render_figures_serially_reports_timings(tmp_path):
+    jobs = _jobs(tmp_path, 2)
+    results = render_figures(jobs)
+    assert [result.path for result in results] == [job.path for job in jobs]
+    assert all(result.seconds > 0 for result in results)
+    assert all(job.path.stat().st_size > 0 for job in jobs)
+
+
+def test_render_figures_in_process_pool(tmp_path):
+    jobs = _jobs(tmp_path, 3)
+    pools = []
+
+    def factory(workers):
+        pools.append(workers)
+        return ProcessPoolExecutor(workers)
+
+    results = render_figures(jobs, workers=2, executor_factory=factory)
+    assert pools == [2]
+    assert [result.path for result in results] == [job.path for job in jobs]
+    assert all(job.path.stat().st_size > 0 for job in jobs)
+
+
+def test_render_figures_rejects_invalid_worker_count(tmp_path):
+    with pytest.raises(ValueError):
+        render_figures(_jobs(tmp_path, 1), workers=0)
@@ -1,6 +1,26 @@
-from datetime import datetime
+import dataclasses
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 
-from slurm_waiting_times.sacct import build_sacct_command, parse_sacct_output
+import pytest
+
+from slurm_waiting_times.sacct import (
+    SacctError,
+    build_sacct_command,
+    build_sharded_commands,
+    fetch_sharded_rows,
+    iter_sacct_rows,
+    parse_sacct_output,
+    parse_sacct_table,
+    stream_sacct,
+)
+from slurm_waiting_times.processing import build_job_table
+from slurm_waiting_times import sacct_json
+from slurm_waiting_times.synthetic import WorkloadSpec, generate_sacct_json, generate_sacct_lines
 
 
 def test_parse_sacct_output_skips_invalid_rows():
@@ -29,6 +49,19 @@ def test_parse_sacct_output_skips_invalid_rows():
     assert rows[1].elapsed_seconds == ((1 * 24 + 1) * 3600)
 
 
+def test_parse_sacct_output_shares_repeated_categorical_values():
+    spec = WorkloadSpec(jobs_per_day=200, seed=3)
+    start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    end = start + timedelta(days=1)
+    text = "\n".join(generate_sacct_lines(start, end, spec))
+
+    for output in (text, "\n".join(generate_sacct_json(start, end, spec))):
+        rows = parse_sacct_output(output, timezone="UTC")
+        for field in ("user", "state", "partition", "alloc_tres"):
+            values = [getattr(row, field) for row in rows if getattr(row, field)]
+            assert len({id(value) for value in values}) == len(set(values))
+
+
 def test_parse_sacct_output_warns_on_bad_timestamp(caplog):
     bad_output = (
         "123|123|job|sbatch script.sh|alice|not-a-time|2024-05-01T10:05:00|COMPLETED|debug|1|cpu=1,gres/gpu=1|00:10:00"
@@ -79,3 +112,236 @@ def test_build_sacct_command_uses_specific_users_when_requested():
 
     assert "-a" not in command
     assert command[command.index("--user") + 1] == "alice,bob"
+
+
+def test_stream_sacct_yields_lines_incrementally():
+    command = [sys.executable, "-c", "print('first|line'); print('second|line')"]
+
+    lines = stream_sacct(command)
+
+    assert next(lines) == "first|line"
+    assert list(lines) == ["second|line"]
+
+
+def test_stream_sacct_raises_on_failure():
+    command = [
+        sys.executable,
+        "-c",
+        "import sys; print('partial'); sys.stderr.write('boom'); sys.exit(3)",
+    ]
+
+    with pytest.raises(SacctError, match="exit code 3: boom"):
+        list(stream_sacct(command))
+
+
+def test_iter_sacct_rows_consumes_lines_lazily():
+    def lines():
+        yield "123|123|job-a|sbatch a.sh|alice|2024-05-01T10:00:00|2024-05-01T10:05:00|COMPLETED|debug|1||00:30:00"
+        raise AssertionError("iterator advanced too far")
+
+    rows = iter_sacct_rows(lines(), timezone="UTC")
+
+    assert next(rows).job_id == "123"
+
+
+def test_build_sharded_commands_splits_window_per_day():
+    start = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    end = datetime(2025, 9, 3, 23, 59, 59, tzinfo=timezone.utc)
+
+    commands = build_sharded_commands(start, end, shard=timedelta(days=1), users=["alice"])
+
+    assert [command[command.index("-S") + 1] for command in commands] == [
+        "2025-09-01T00:00:00",
+        "2025-09-02T00:00:00",
+        "2025-09-03T00:00:00",
+    ]
+    assert all(command[command.index("--user") + 1] == "alice" for command in commands)
+
+
+def test_fetch_sharded_rows_merges_and_deduplicates_with_bounded_workers():
+    start = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    end = datetime(2025, 9, 4, tzinfo=timezone.utc)
+    commands = build_sharded_commands(start, end, shard=timedelta(days=1), include_steps=True)
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def runner(command):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        day = command[command.index("-S") + 1][:10]
+        return [
+            # A long-running job that every shard reports.
+            "1|1|long|sbatch a.sh|alice|2025-08-31T10:00:00|2025-08-31T11:00:00|RUNNING|cpu|1||00:00:00",
+            "1.batch|1|batch||alice|2025-08-31T10:00:00|2025-08-31T11:00:00|RUNNING|cpu|1||00:00:00",
+            f"{day}|{day}|short||bob|{day}T10:00:00|{day}T10:05:00|COMPLETED|cpu|1||00:01:00",
+        ]
+
+    rows = fetch_sharded_rows(commands, workers=2, timezone="UTC", runner=runner)
+
+    assert [row.job_id for row in rows] == [
+        "1",
+        "1.batch",
+        "2025-09-01",
+        "2025-09-02",
+        "2025-09-03",
+    ]
+    assert peak == 2
+
+
+def test_parse_sacct_output_handles_long_multiline_rows():
+    continuation = [f"      echo 'line {index}'" for index in range(20000)]
+    output = "\n".join(
+        [
+            "1|1|interactive|salloc bash -c",
+            *continuation,
+            "    |carol|2025-08-30T17:40:10|2025-08-30T17:45:10|COMPLETED|gpu|1||00:05:00",
+            "2|2|next|sbatch b.sh|dave|2025-08-30T18:00:00|2025-08-30T18:01:00|COMPLETED|cpu|1||00:01:00",
+        ]
+    )
+
+    rows = parse_sacct_output(output, timezone="UTC")
+
+    # That parsing such rows stays linear is checked by the
+    # parse_multiline_submit_line benchmark stage.
+    assert [row.job_id for row in rows] == ["1", "2"]
+    assert rows[0].submit_line.count("\n") == 20000
+
+
+def test_parse_sacct_output_keeps_extra_separators_in_last_field():
+    output = "1|1|job|sbatch a.sh|alice|2024-05-01T10:00:00|2024-05-01T10:05:00|COMPLETED|cpu|1||00:01:00|extra"
+
+    rows = parse_sacct_output(output, timezone="UTC")
+
+    assert len(rows) == 1
+    assert rows[0].elapsed_seconds is None
+
+
+def test_parse_sacct_output_warns_on_truncated_row(caplog):
+    output = "1|1|job|salloc bash -c\n  echo unterminated"
+
+    with caplog.at_level("WARNING"):
+        rows = parse_sacct_output(output, timezone="UTC")
+
+    assert rows == []
+    assert "malformed sacct row" in caplog.text
+
+
+def _comparable(row):
+    values = dataclasses.asdict(row)
+    # JSON only reports the state itself, not e.g. "CANCELLED by 1000".
+    values["state"] = values["state"].split(" ", 1)[0]
+    return values
+
+
+@pytest.mark.parametrize("include_steps", [True, False])
+def test_iter_sacct_rows_detects_json_and_matches_text_rows(include_steps, monkeypatch):
+    # Small blocks make jobs straddle reads of the incremental decoder.
+    monkeypatch.setattr(sacct_json, "_BLOCK_LINES", 7)
+    window = (datetime(2025, 9, 1), datetime(2025, 9, 1, 12))
+    spec = WorkloadSpec(jobs_per_day=400, multiline_fraction=0.2)
+    text = generate_sacct_lines(*window, spec, include_steps=include_steps)
+    document = "".join(
+        generate_sacct_json(*window, spec, include_steps=include_steps, tzinfo=ZoneInfo("UTC"))
+    )
+
+    text_rows = list(iter_sacct_rows(text, timezone="UTC"))
+    json_rows = list(iter_sacct_rows(["", *document.splitlines()], timezone="UTC"))
+
+    assert len(json_rows) == len(text_rows) > 100
+    assert [_comparable(row) for row in json_rows] == [_comparable(row) for row in text_rows]
+    assert any(row.submit_line and "\n" in row.submit_line for row in json_rows)
+
+
+def test_sacct_json_handles_slurm_value_variants():
+    job = {
+        "job_id": 42,
+        "array": {"job_id": 40, "task_id": 2},
+        "name": "train",
+        "submit_line": "sbatch train.sh",
+        "user": "alice",
+        "partition": "gpu",
+        "state": {"current": "COMPLETED"},
+        "allocation_nodes": 1,
+        "time": {"submission": 1714557600, "start": 1714557900, "elapsed": 60},
+        "tres": {
+            "allocated": [
+                {"type": "node", "name": "", "count": 1},
+                {"type": "mem", "name": "", "count": 1000},
+                {"type": "gres", "name": "gpu", "count": {"set": True, "number": 2}},
+                {"type": "energy", "name": "", "count": {"set": False, "number": 0}},
+            ]
+        },
+        "steps": [
+            {
+                "step": {"id": "42.batch", "name": "batch"},
+                "state": "FAILED",
+                "nodes": {"count": 1},
+                "time": {"start": {"set": True, "number": 1714557900}, "elapsed": 50},
+            },
+            {"step": {"id": "42.1", "name": "x"}, "time": {"start": 0}},
+        ],
+    }
+    document = json.dumps({"meta": {}, "jobs": [job], "errors": []}, indent=1)
+
+    rows = parse_sacct_output(document, timezone="UTC")
+
+    assert [row.job_id for row in rows] == ["40_2", "40_2.batch"]
+    assert rows[0].job_id_raw == "42"
+    assert rows[0].state == "COMPLETED"
+    assert rows[0].alloc_tres == "gres/gpu=2,mem=1000M,node=1"
+    assert rows[0].start_time.isoformat() == "2024-05-01T10:05:00+00:00"
+    assert rows[1].job_id_raw == "42.batch"
+    assert rows[1].state == "FAILED"
+    assert rows[1].elapsed_seconds == 50
+
+
+def test_sacct_json_reports_malformed_output(caplog):
+    assert parse_sacct_output('{"jobs": [], "errors": ["boom"]}') == []
+    assert "boom" in caplog.text
+
+    with pytest.raises(SacctError, match="Malformed sacct JSON"):
+        parse_sacct_output('{"jobs": [{"job_id": 1}')
+
+
+def test_iter_json_jobs_uses_ijson_when_installed():
+    pytest.importorskip("ijson")
+    lines = json.dumps({"jobs": [{"job_id": 1}, {"job_id": 2}]}, indent=2).splitlines()
+    assert [job["job_id"] for job in sacct_json.iter_json_jobs(lines)] == [1, 2]
+
+
+def test_build_sacct_command_requests_json():
+    command = build_sacct_command(
+        datetime(2024, 5, 1), datetime(2024, 5, 2), output_format="json"
+    )
+    assert command[:2] == ["sacct", "--json"]
+    assert not any(part.startswith("--format") for part in command)
+    assert "-X" in command
+
+    with pytest.raises(ValueError):
+        build_sacct_command(datetime(2024, 5, 1), datetime(2024, 5, 2), output_format="xml")
+
+
+@pytest.mark.parametrize("output_format", ["text", "json"])
+def test_parse_sacct_table_matches_row_based_table(output_format):
+    window = (datetime(2025, 9, 1), datetime(2025, 9, 1, 6))
+    spec = WorkloadSpec(jobs_per_day=300)
+    if output_format == "json":
+        lines = "".join(generate_sacct_json(*window, spec, tzinfo=ZoneInfo("UTC"))).splitlines()
+    else:
+        lines = list(generate_sacct_lines(*window, spec))
+
+    table = parse_sacct_table(lines, timezone="Europe/Berlin")
+    expected = build_job_table(parse_sacct_output("\n".join(lines), timezone="Europe/Berlin"))
+
+    assert len(table) == len(expected) > 50
+    for column in ("submit_epoch", "start_epoch", "wait_seconds", "nodes", "is_step"):
+        assert (getattr(table, column) == getattr(expected, column)).all()
+    assert list(table.slurm_job_type) == list(expected.slurm_job_type)
+    assert list(table.job_type) == list(expected.job_type)
+    assert [record.start_time for record in table] == [record.start_time for record in expected]
@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from slurm_waiting_times import cli
+from slurm_waiting_times.server import QueryCache, QueryError, parse_query
+
+FAKE_SACCT = """#!/bin/sh
+echo "$@" >> "$(dirname "$0")/calls.log"
+echo "1|1|a|sbatch a.sh|alice|{day}T10:00:00|{day}T10:05:00|COMPLETED|cpu|1|cpu=4,node=1|00:30:00"
+echo "2|2|b|salloc|bob|{day}T11:00:00|{day}T12:00:00|COMPLETED|gpu|1|cpu=8,node=1,gres/gpu=1|01:00:00"
+echo "3|3|c|sbatch c.sh|bob|{day}T12:00:00|{day}T12:20:00|COMPLETED|gpu|2|cpu=64,node=2,gres/gpu=8|02:00:00"
+"""
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    day = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
+    script = tmp_path / "sacct"
+    script.write_text(FAKE_SACCT.format(day=day))
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    args = cli.parse_serve_arguments(["--port", "0", "--tz", "UTC", "--window-days", "3"])
+    http_server, _ = cli._create_server(args)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    host, port = http_server.server_address[:2]
+    yield f"http://{host}:{port}", tmp_path / "calls.log", http_server
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def _get_json(url):
+    with urlopen(url) as response:
+        return json.load(response)
+
+
+def test_serve_answers_filtered_stats_from_memory(server):
+    base, calls, http_server = server
+
+    everything = _get_json(f"{base}/stats")
+    assert everything["jobs"] == 3
+    assert everything["wait_seconds"]["max"] == 3600
+
+    gpu = _get_json(f"{base}/stats?partition=gpu&job_type=1-gpu")
+    assert gpu["jobs"] == 1
+    assert gpu["mean_wait"] == "01:00"
+
+    batch = _get_json(f"{base}/stats?slurm_job_type=batch&stats=approx")
+    assert batch["jobs"] == 2
+
+    assert _get_json(f"{base}/healthz")["jobs"] == 3
+    assert len(calls.read_text().splitlines()) == 1
+
+    cache = http_server.RequestHandlerClass.service.cache
+    hits = cache.hits
+    assert _get_json(f"{base}/stats?partition=gpu&job_type=1-gpu") == gpu
+    assert cache.hits == hits + 1
+
+
+def test_serve_renders_png(server):
+    pytest.importorskip("matplotlib")
+    base, _, _ = server
+    with urlopen(f"{base}/histogram.png?user=bob") as response:
+        assert response.headers["Content-Type"] == "image/png"
+        assert response.read().startswith(b"\x89PNG")
+
+
+def test_serve_rejects_invalid_queries(server):
+    base, _, _ = server
+    with pytest.raises(HTTPError) as excinfo:
+        urlopen(f"{base}/stats?job_type=gpu")
+    assert excinfo.value.code == 400
+    assert "job_type" in json.load(excinfo.value)["error"]
+
+
+def test_parse_query_mirrors_cli_options():
+    spec, mode = parse_query(
+        {
+            "user": ["alice,bob"],
+            "runtime": [">00:10:00", "<02:00:00"],
+            "include_steps": ["true"],
+            "max_wait_hours": ["12"],
+            "stats": ["approx"],
+        }
+    )
+    assert spec.user == ["alice", "bob"]
+    assert spec.runtime == [">00:10:00", "<02:00:00"]
+    assert spec.include_steps is True
+    assert spec.max_wait_hours == 12.0
+    assert mode == "approx"
+
+    with pytest.raises(QueryError):
+        parse_query({"bins": ["many"]})
+
+
+def test_query_cache_expires_entries():
+    now = [0.0]
+    cache = QueryCache(10, max_entries=2, clock=lambda: now[0])
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    now[0] = 11
+    assert cache.get("a") is None
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+
+
+def test_serve_reports_unexpected_errors_as_json(server, monkeypatch, caplog):
+    base, _, http_server = server
+    service = http_server.RequestHandlerClass.service
+
+    def fail(params):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(service, "stats", fail)
+    with pytest.raises(HTTPError) as excinfo:
+        urlopen(f"{base}/stats")
+    assert excinfo.value.code == 500
+    assert json.load(excinfo.value) == {"error": "internal server error"}
+    assert "boom" in caplog.text
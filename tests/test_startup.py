@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+import pytest
+
+
+def _imported_modules(code: str) -> set[str]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        line.rsplit("|", 1)[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import slurm_waiting_times.cli",
+        "from slurm_waiting_times.cli import main\n"
+        "try:\n"
+        "    main(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass",
+        "from slurm_waiting_times.cli import main\n"
+        "main(['--start', '2024-05-01', '--end', '2024-05-02', '--dry-run'])",
+    ],
+    ids=["import", "help", "dry-run"],
+)
+def test_cli_startup_does_not_import_matplotlib(code):
+    modules = _imported_modules(code)
+    assert "slurm_waiting_times.cli" in modules
+    assert not any(name.split(".")[0] == "matplotlib" for name in modules)
@@ -0,0 +1,82 @@
+import random
+import statistics
+
+import pytest
+
+from slurm_waiting_times.stats import (
+    DDSketch,
+    ExactStatistics,
+    percentile,
+    summarize,
+)
+from slurm_waiting_times.time_utils import freedman_diaconis_bins
+
+
+def waits(count: int, seed: int) -> list[float]:
+    rng = random.Random(seed)
+    return [0.0 if rng.random() < 0.05 else rng.lognormvariate(6, 2) for _ in range(count)]
+
+
+def test_exact_summary_matches_statistics_module():
+    values = waits(1001, seed=1)
+
+    summary = summarize(values, mode="exact")
+
+    assert summary.count == 1001
+    assert summary.mean == pytest.approx(statistics.mean(values))
+    assert summary.median == statistics.median(values)
+    assert summary.p95 == percentile(sorted(values), 0.95)
+    assert summary.maximum == max(values)
+    assert summary.freedman_diaconis_bins() == freedman_diaconis_bins(values)
+
+
+def test_sketch_quantiles_are_within_relative_accuracy():
+    values = waits(20000, seed=2)
+    ordered = sorted(values)
+
+    summary = summarize(values, mode="approx")
+
+    assert summary.count == len(values)
+    assert summary.mean == pytest.approx(statistics.fmean(values))
+    assert summary.maximum == ordered[-1]
+    for fraction, estimate in [(0.5, summary.median), (0.95, summary.p95), (0.25, summary.q1)]:
+        exact = ordered[int(fraction * (len(ordered) - 1))]
+        assert estimate == pytest.approx(exact, rel=0.011)
+
+
+def test_sketches_merge_like_the_union_of_their_samples():
+    first, second = waits(5000, seed=3), waits(7000, seed=4)
+    left, right, union = DDSketch(), DDSketch(), DDSketch()
+    left.update(first)
+    right.update(second)
+    union.update(first + second)
+
+    left.merge(right)
+
+    assert left.summary().count == union.summary().count
+    assert left.summary().mean == pytest.approx(union.summary().mean)
+    for fraction in (0.1, 0.5, 0.9, 0.99):
+        assert left.quantile(fraction) == union.quantile(fraction)
+
+
+def test_sketch_bucket_count_is_bounded():
+    sketch = DDSketch(max_buckets=16)
+
+    sketch.update(float(2**exponent) for exponent in range(64))
+
+    assert len(sketch._buckets) <= 16
+    assert sketch.quantile(1.0) == 2.0**63
+
+
+def test_exact_statistics_merge_and_empty_errors():
+    left, right = ExactStatistics(), ExactStatistics()
+    left.update([1.0, 3.0])
+    right.add(2.0)
+
+    left.merge(right)
+
+    assert left.summary().median == 2.0
+    with pytest.raises(ValueError):
+        ExactStatistics().summary()
+    with pytest.raises(ValueError):
+        summarize([1.0], mode="bogus")
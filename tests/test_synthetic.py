@@ -0,0 +1,75 @@
+import io
+import os
+from datetime import datetime
+
+from slurm_waiting_times.processing import filter_rows
+from slurm_waiting_times.sacct import build_sacct_command, iter_sacct_rows, run_sacct
+from slurm_waiting_times.synthetic import (
+    JOBS_PER_DAY_ENV,
+    WorkloadSpec,
+    generate_sacct_lines,
+    run_fake_sacct,
+    write_sacct_shim,
+)
+
+START = datetime(2025, 9, 1)
+END = datetime(2025, 9, 3)
+
+
+def _lines(**kwargs):
+    return list(generate_sacct_lines(START, END, WorkloadSpec(jobs_per_day=500), **kwargs))
+
+
+def test_generated_lines_cover_slurm_features():
+    lines = _lines()
+    rows = list(iter_sacct_rows(lines, timezone="UTC"))
+
+    assert any("\n" in line for line in lines), "expected multi-line submit lines"
+    assert any("_" in row.job_id and "." not in row.job_id for row in rows), "expected array tasks"
+    assert any(row.job_id.endswith(".batch") for row in rows)
+    assert any(row.job_id.endswith(".extern") for row in rows)
+    assert len({row.alloc_tres for row in rows}) > 20
+    # Jobs submitted before the window are reported while still active in it.
+    assert all(row.submit_time.isoformat()[:19] <= END.isoformat() for row in rows)
+    assert any(row.submit_time.isoformat()[:19] < START.isoformat() for row in rows)
+
+    jobs = filter_rows(rows)
+    assert {record.slurm_job_type for record in jobs} == {"batch", "interactive"}
+    assert {record.job_type for record in jobs} >= {"cpu-only", "1-gpu", "single-node", "multi-node"}
+    waits = sorted(record.wait_seconds for record in jobs)
+    assert waits[len(waits) // 2] < 600 < waits[-1]
+
+
+def test_generation_is_deterministic_and_split_invariant():
+    whole = _lines(include_steps=False)
+    spec = WorkloadSpec(jobs_per_day=500)
+    # Both bounds are inclusive, like ``sacct -S/-E``.
+    first = list(generate_sacct_lines(START, datetime(2025, 9, 2, 6, 29, 59), spec, include_steps=False))
+    second = list(generate_sacct_lines(datetime(2025, 9, 2, 6, 30), END, spec, include_steps=False))
+    assert first == list(dict.fromkeys(first))
+    assert list(dict.fromkeys(first + second)) == whole
+    # Jobs active across the split are reported by both sub-windows.
+    assert set(first) & set(second)
+    assert not any("." in line.split("|", 1)[0] for line in whole)
+
+
+def test_fake_sacct_honours_filters():
+    out = io.StringIO()
+    command = build_sacct_command(START, END, partitions=["gpu"])
+    run_fake_sacct(command[1:], out)
+    rows = list(iter_sacct_rows(out.getvalue().splitlines(), timezone="UTC"))
+    assert rows
+    assert {row.partition for row in rows} == {"gpu"}
+
+
+def test_sacct_shim_on_path(tmp_path, monkeypatch):
+    shim_dir = tmp_path / "fake-sacct"
+    write_sacct_shim(shim_dir)
+    monkeypatch.setenv("PATH", f"{shim_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv(JOBS_PER_DAY_ENV, "50")
+
+    output = run_sacct(build_sacct_command(START, END))
+    rows = list(iter_sacct_rows(output.splitlines(), timezone="UTC"))
+    submitted = [row for row in rows if row.submit_time.isoformat()[:19] >= START.isoformat()]
+    assert 90 <= len(submitted) <= 100
+    assert len(rows) > len(submitted)
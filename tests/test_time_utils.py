@@ -1,14 +1,19 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pytest
 from zoneinfo import ZoneInfo
 
 from slurm_waiting_times.time_utils import (
+    format_epochs,
+    local_dates,
     format_timedelta_hms,
     freedman_diaconis_bins,
     parse_datetime,
     parse_cli_datetime_window,
     parse_duration_to_seconds,
+    parse_epoch_seconds,
+    parse_sacct_timestamp,
+    split_window,
 )
 
 
@@ -109,3 +114,64 @@ def test_parse_duration_to_seconds_valid(value, expected):
 def test_parse_duration_to_seconds_invalid(value):
     with pytest.raises(ValueError):
         parse_duration_to_seconds(value)
+
+
+def test_split_window_aligns_to_midnight_and_clips_edges():
+    tz = ZoneInfo("UTC")
+    start = datetime(2025, 9, 1, 12, tzinfo=tz)
+    end = datetime(2025, 9, 3, 6, tzinfo=tz)
+
+    windows = split_window(start, end, timedelta(days=1))
+
+    assert windows == [
+        (start, datetime(2025, 9, 2, tzinfo=tz)),
+        (datetime(2025, 9, 2, tzinfo=tz), datetime(2025, 9, 3, tzinfo=tz)),
+        (datetime(2025, 9, 3, tzinfo=tz), end),
+    ]
+
+
+def test_split_window_returns_single_window_when_shorter_than_step():
+    tz = ZoneInfo("UTC")
+    start = datetime(2025, 9, 1, 1, tzinfo=tz)
+    end = datetime(2025, 9, 1, 2, tzinfo=tz)
+
+    assert split_window(start, end, timedelta(weeks=1)) == [(start, end)]
+
+
+def test_parse_sacct_timestamp_fast_path_matches_parse_datetime():
+    tz = ZoneInfo("Europe/Berlin")
+    parse_sacct_timestamp.cache_clear()
+
+    first = parse_sacct_timestamp("2025-03-30T03:30:00", tz)
+    second = parse_sacct_timestamp("2025-03-30T03:30:00", tz)
+
+    assert first == parse_datetime("2025-03-30T03:30:00", tz)
+    assert second is first
+    assert parse_sacct_timestamp.cache_info().hits == 1
+
+
+def test_parse_sacct_timestamp_falls_back_for_other_formats():
+    tz = ZoneInfo("UTC")
+
+    assert parse_sacct_timestamp(" 2024/05/01 12:34:56", tz) == datetime(2024, 5, 1, 12, 34, 56, tzinfo=tz)
+    assert parse_sacct_timestamp("2024-05-01T12:34+01", tz) == datetime(2024, 5, 1, 11, 34, tzinfo=tz)
+    with pytest.raises(ValueError):
+        parse_sacct_timestamp("not-a-time", tz)
+
+
+def test_parse_epoch_seconds_uses_zone_of_naive_values():
+    assert parse_epoch_seconds("1970-01-01T01:00:00", ZoneInfo("UTC")) == 3600
+    assert parse_epoch_seconds("1970-01-01T01:00:00", ZoneInfo("Europe/Berlin")) == 0
+
+
+@pytest.mark.parametrize("zone", ["UTC", "Europe/Berlin", "Australia/Lord_Howe", "Asia/Kolkata"])
+def test_format_epochs_matches_isoformat_across_dst_changes(zone):
+    tz = ZoneInfo(zone)
+    # Around the October 2024 clock changes of Berlin and Lord Howe (30 minutes).
+    epochs = list(range(1727538000, 1727560000, 347)) + list(range(1729990000, 1730000000, 611))
+
+    expected = [datetime.fromtimestamp(epoch, tz).isoformat() for epoch in epochs]
+    assert format_epochs(epochs, tz) == expected
+    assert format_epochs([], tz) == []
+    dates = [datetime.fromtimestamp(epoch, tz).date() for epoch in epochs]
+    assert local_dates(epochs, tz).tolist() == dates